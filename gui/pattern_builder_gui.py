@@ -12,12 +12,19 @@ from midi_engine.playback import reproducir_nota
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 
-from rhythm_engine.patterns import DURACIONES, RitmoPattern
-from storage_engine.rhythm_storage import load_patterns, save_patterns
+from rhythm_engine.patterns import DURACIONES, RitmoPattern, RitmoCompuesto
+from storage_engine.rhythm_storage import (
+    load_patterns, schedule_save_patterns, record_pattern_changes, dedupe_patterns,
+    export_patterns, load_feature_table, save_feature_table, DEFAULT_FILE
+)
+from storage_engine.watcher import FileWatcher, diff_lists, apply_diff, remap_index, pattern_diff_key
 
 import threading
 import copy
 
+# cada cuánto se revisa si rhythms.json cambió en disco
+WATCH_INTERVAL_MS = 1000
+
 
 ## ----------------------------------------------------------------
 ## Class: RhythmBuilderGUI
@@ -38,9 +45,18 @@ class RhythmBuilderGUI:
 
         # Datos
         self.patterns = load_patterns()
+        self.features = load_feature_table()
+        self._sort_col = None
+        self._sort_desc = False
         self.current_index = None
         self.current_compas = 0
         self.edit_buffer = None
+        self._skip_select = None  # selección restaurada por código (no recargar el editor)
+
+        # Cambios hechos a rhythms.json por otros programas
+        self._watcher = FileWatcher()
+        self._watcher.watch(DEFAULT_FILE, self._on_library_changed)
+        self.root.after(WATCH_INTERVAL_MS, self._poll_watcher)
 
         # Layout
         frame_editor = ttk.LabelFrame(root, text="Editor de patrón")
@@ -90,17 +106,29 @@ class RhythmBuilderGUI:
         ttk.Button(act, text="Play (preview)", command=self.play_preview).grid(row=0, column=2, padx=3)
 
         # ----- Patrones guardados -----
+        # columnas de features: (id de columna, columna en TablaFeatures, título)
+        self.feature_cols = [
+            ("Densidad", "densidad", "Dens."),
+            ("Silencios", "ratio_silencios", "Sil."),
+            ("Sincopa", "sincopa", "Sínc."),
+            ("Entropia", "entropia", "Entr."),
+            ("Larga", "nota_mas_larga", "Larga"),
+        ]
+
         self.tree = ttk.Treeview(
             frame_saved,
-            columns=("Name","Compases"),
+            columns=("Name","Compases") + tuple(c[0] for c in self.feature_cols),
             show="headings",
             height=18,
             selectmode="extended"   # <--- ESTA LÍNEA
         )
-        self.tree.heading("Name", text="Name")
-        self.tree.heading("Compases", text="#Compases")
+        self.tree.heading("Name", text="Name", command=lambda: self.sort_tree("Name"))
+        self.tree.heading("Compases", text="#Compases", command=lambda: self.sort_tree("Compases"))
         self.tree.column("Name", width=160)
         self.tree.column("Compases", width=80, anchor="center")
+        for col_id, _, titulo in self.feature_cols:
+            self.tree.heading(col_id, text=titulo, command=lambda c=col_id: self.sort_tree(c))
+            self.tree.column(col_id, width=55, anchor="center")
         self.tree.grid(row=0, column=0, sticky="nsew")
         self.tree.bind("<Delete>", self._on_delete_key)
         frame_saved.rowconfigure(0, weight=1)
@@ -117,6 +145,17 @@ class RhythmBuilderGUI:
         ttk.Button(rb, text="Delete", command=self.delete_pattern).grid(row=0, column=2, padx=3)
         ttk.Button(rb, text="Combine", command=self.combine_patterns).grid(row=0, column=3, padx=3)
         ttk.Button(rb, text="Export JSON", command=self.export_json).grid(row=0, column=4, padx=3)
+        ttk.Button(rb, text="Dedupe", command=self.dedupe_library).grid(row=1, column=0, padx=3, pady=(3,0))
+
+        # Filtro por features, ej: "densidad>4 sincopa<=2"
+        ff = ttk.Frame(frame_saved)
+        ff.grid(row=2, column=0, sticky="ew")
+        ttk.Label(ff, text="Filtro:").grid(row=0, column=0, sticky="w")
+        self.filter_var = tk.StringVar()
+        entry_filter = ttk.Entry(ff, textvariable=self.filter_var)
+        entry_filter.grid(row=0, column=1, sticky="ew", padx=5)
+        entry_filter.bind("<Return>", lambda e: self.update_tree())
+        ff.columnconfigure(1, weight=1)
 
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
 
@@ -129,7 +168,7 @@ class RhythmBuilderGUI:
             p = self.patterns[0]
             self.entry_name.delete(0, tk.END)
             self.entry_name.insert(0, p.name)
-            self.current_compas = 0 if p.compases else -1
+            self.current_compas = 0 if p.num_compases() else -1
             self.refresh_editor()
         else:
             # No hay patrones: dejar editor vacío (no crear automáticamente)
@@ -243,7 +282,7 @@ class RhythmBuilderGUI:
     ## param event: Evento de Tkinter (opcional).
     ## ------------------------------------------------------------
     def delete_tiempo(self, event=None):
-        p = self.get_current_pattern()
+        p = self.get_editable_pattern()
         if not p:
             return
 
@@ -270,7 +309,7 @@ class RhythmBuilderGUI:
     ## param event: Evento de Tkinter (opcional).
     ## ------------------------------------------------------------
     def insert_tiempo(self, event=None):
-        p = self.get_current_pattern()
+        p = self.get_editable_pattern()
         if not p:
             return
 
@@ -318,7 +357,7 @@ class RhythmBuilderGUI:
 
         try:
             while True:
-                for compas in p.compases:
+                for compas in p.iter_compases():
                     i = 0
                     while i < len(compas):
                         e = compas[i]
@@ -415,16 +454,16 @@ class RhythmBuilderGUI:
             messagebox.showwarning("Nada seleccionado","Selecciona un patrón")
             return
 
-        i = list(self.tree.get_children()).index(sel[0])
+        i = int(sel[0])
         self.current_index = i
 
         # ⚠️ EN VEZ DE EDITAR EL ORIGINAL, HACEMOS COPIA
-        self.edit_buffer = copy.deepcopy(self.patterns[i])
+        self.edit_buffer = self._make_buffer(self.patterns[i])
 
         self.entry_name.delete(0, tk.END)
         self.entry_name.insert(0, self.edit_buffer.name)
 
-        self.current_compas = 0 if self.edit_buffer.compases else -1
+        self.current_compas = 0 if self.edit_buffer.num_compases() else -1
         self.refresh_editor()
 
     ## ------------------------------------------------------------
@@ -439,7 +478,7 @@ class RhythmBuilderGUI:
 
         # Obtener los índices reales según el orden del Treeview
         indices = sorted(
-            [list(self.tree.get_children()).index(item) for item in sel],
+            [int(item) for item in sel],
             reverse=True
         )
 
@@ -453,7 +492,7 @@ class RhythmBuilderGUI:
         for i in indices:
             del self.patterns[i]
 
-        save_patterns(self.patterns)
+        record_pattern_changes(self.patterns, [{"op": "delete", "index": i} for i in indices])
 
         self.current_index = None
         self.update_tree()
@@ -478,7 +517,7 @@ class RhythmBuilderGUI:
         p.name = name
         self.entry_name.delete(0, tk.END)
         self.entry_name.insert(0, name)
-        save_patterns(self.patterns)
+        schedule_save_patterns(self.patterns)
         self.update_tree()
         messagebox.showinfo("Guardado","Patrón guardado")
 
@@ -493,10 +532,20 @@ class RhythmBuilderGUI:
         # Actualizar nombre
         self.edit_buffer.name = self.entry_name.get() or self.edit_buffer.name
 
-        # Guardar cambios en la lista real
-        self.patterns[self.current_index] = copy.deepcopy(self.edit_buffer)
+        # Guardar cambios en la lista real (si el patrón se borró en disco
+        # mientras se editaba, se vuelve a agregar al final)
+        if self.current_index is None:
+            self.patterns.append(self._make_buffer(self.edit_buffer))
+            self.current_index = len(self.patterns) - 1
+            op = "add"
+        else:
+            self.patterns[self.current_index] = self._make_buffer(self.edit_buffer)
+            op = "update"
 
-        save_patterns(self.patterns)
+        record_pattern_changes(self.patterns, [{
+            "op": op, "index": self.current_index,
+            "value": self.patterns[self.current_index].to_dict()
+        }])
         self.update_tree()
         messagebox.showinfo("Guardado", "Patrones guardados")    
 
@@ -508,8 +557,7 @@ class RhythmBuilderGUI:
         path = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[('JSON','*.json')])
         if not path:
             return
-        from storage_engine.rhythm_storage import save_patterns as sp
-        sp(self.patterns, path)
+        export_patterns(self.patterns, path)
         messagebox.showinfo("Export","Exportado")
 
     ## ------------------------------------------------------------
@@ -529,10 +577,38 @@ class RhythmBuilderGUI:
         name = simpledialog.askstring("Combine","Nombre del nuevo patrón:") or f"merge_{sel_a}_{sel_b}"
         new = self.patterns[sel_a].merge(self.patterns[sel_b], name)
         self.patterns.append(new)
-        save_patterns(self.patterns)
+        record_pattern_changes(self.patterns, [
+            {"op": "add", "index": len(self.patterns) - 1, "value": new.to_dict()}
+        ])
         self.update_tree()
         messagebox.showinfo("Combine","Patrón combinado creado")
 
+    ## ------------------------------------------------------------
+    ## Function: dedupe_library
+    ## Description: Muestra el reporte de patrones duplicados (mismo contenido,
+    ##              distinto nombre) y permite eliminarlos.
+    ## ------------------------------------------------------------
+    def dedupe_library(self):
+        unicos, reporte = dedupe_patterns(self.patterns)
+        resumen = (f"Patrones: {reporte['patterns_total']} ({reporte['patterns_unique']} únicos)\n"
+                   f"Compases: {reporte['bars_total']} ({reporte['bars_unique']} únicos)")
+
+        if not reporte["duplicates"]:
+            messagebox.showinfo("Dedupe", resumen + "\n\nNo hay patrones duplicados.")
+            return
+
+        grupos = "\n".join(" = ".join(g["names"]) for g in reporte["duplicates"][:20])
+        if not messagebox.askyesno("Dedupe", f"{resumen}\n\nDuplicados:\n{grupos}\n\n"
+                                             "¿Eliminar duplicados (se conserva el primero)?"):
+            return
+
+        self.patterns = unicos
+        schedule_save_patterns(self.patterns)
+        self.current_index = None
+        self.edit_buffer = None
+        self.update_tree()
+        self.refresh_editor()
+
     ## ------------------------------------------------------------
     ## Function: on_tree_select
     ## Description: Manejador de evento cuando se selecciona un patrón en el Treeview.
@@ -542,9 +618,13 @@ class RhythmBuilderGUI:
         sel = self.tree.selection()
         if not sel:
             return
-        i = list(self.tree.get_children()).index(sel[0])
+        if self._skip_select is not None and tuple(sel) == self._skip_select:
+            # selección restaurada tras una recarga: mantener el buffer de edición
+            self._skip_select = None
+            return
+        i = int(sel[0])
         self.current_index = i
-        self.edit_buffer = copy.deepcopy(self.patterns[i])
+        self.edit_buffer = self._make_buffer(self.patterns[i])
 
         self.entry_name.delete(0, tk.END)
         self.entry_name.insert(0, self.edit_buffer.name)
@@ -559,6 +639,29 @@ class RhythmBuilderGUI:
     def get_current_pattern(self):
         return self.edit_buffer
 
+    ## ------------------------------------------------------------
+    ## Function: get_editable_pattern
+    ## Description: Devuelve el patrón en edición listo para modificarse.
+    ##              Un RitmoCompuesto se aplana aquí, en la primera edición.
+    ## ------------------------------------------------------------
+    def get_editable_pattern(self):
+        p = self.edit_buffer
+        if isinstance(p, RitmoCompuesto):
+            p = p.flatten()
+            self.edit_buffer = p
+        return p
+
+    ## ------------------------------------------------------------
+    ## Function: _make_buffer
+    ## Description: Copia de trabajo de un patrón. Los compuestos se mantienen
+    ##              perezosos (solo lectura) hasta que se editan.
+    ## param pattern: RitmoPattern o RitmoCompuesto.
+    ## ------------------------------------------------------------
+    def _make_buffer(self, pattern):
+        if isinstance(pattern, RitmoCompuesto):
+            return pattern
+        return copy.deepcopy(pattern)
+
     ## ------------------------------------------------------------
     ## Function: refresh_editor
     ## Description: Actualiza la vista del editor según el patrón y compás actuales.
@@ -569,7 +672,7 @@ class RhythmBuilderGUI:
             self.list_compas.delete(0, tk.END)
             self.lbl_compas.config(text="Compás: -")
             return
-        n = len(p.compases)
+        n = p.num_compases()
         if n == 0:
             self.lbl_compas.config(text="Compás: (vacío)")
             return
@@ -580,7 +683,7 @@ class RhythmBuilderGUI:
         total, full = p.compas_estado(self.current_compas)
         self.lbl_compas.config(text=f"Compás: {self.current_compas+1}/{n} ( {total}/{full} )")
         self.list_compas.delete(0, tk.END)
-        for e in p.compases[self.current_compas]:
+        for e in p.compas(self.current_compas):
             self.list_compas.insert(tk.END, e)
 
     ## ------------------------------------------------------------
@@ -588,7 +691,7 @@ class RhythmBuilderGUI:
     ## Description: Agrega un nuevo compás al patrón actual.
     ## ------------------------------------------------------------
     def add_compas(self):
-        p = self.get_current_pattern()
+        p = self.get_editable_pattern()
         if not p:
             return
         p.add_compas()
@@ -600,7 +703,7 @@ class RhythmBuilderGUI:
     ## Description: Elimina el compás actual del patrón después de confirmar.
     ## ------------------------------------------------------------
     def delete_compas(self):
-        p = self.get_current_pattern()
+        p = self.get_editable_pattern()
         if not p or len(p.compases) == 0:
             return
         if messagebox.askyesno("Eliminar compás","¿Eliminar compás actual?"):
@@ -629,7 +732,7 @@ class RhythmBuilderGUI:
         p = self.get_current_pattern()
         if not p:
             return
-        if self.current_compas < len(p.compases)-1:
+        if self.current_compas < p.num_compases()-1:
             self.current_compas += 1
             self.refresh_editor()
 
@@ -643,7 +746,7 @@ class RhythmBuilderGUI:
         Si hay un tiempo seleccionado → modificarlo (solo si cabe)
         Si no hay selección → agregar al final (solo si cabe)
         """
-        p = self.get_current_pattern()
+        p = self.get_editable_pattern()
         if not p:
             return
 
@@ -682,7 +785,106 @@ class RhythmBuilderGUI:
     ## ------------------------------------------------------------
     def update_tree(self):
         self.tree.delete(*self.tree.get_children())
-        for p in self.patterns:
-            self.tree.insert("", tk.END, values=(p.name, len(p.compases)))
+
+        # recalcular features solo de patrones nuevos/editados (save() reemplaza
+        # el objeto en self.patterns; la tabla solo hashea objetos que no vio)
+        if self.features.actualizar(self.patterns):
+            try:
+                save_feature_table(self.features)
+            except OSError as exc:
+                print("No se pudo guardar el cache de features:", exc)
+
+        indices = range(len(self.patterns))
+        filtro = self.filter_var.get().strip()
+        if filtro:
+            try:
+                indices = self.features.filtrar(filtro)
+            except ValueError as exc:
+                print("❌", exc)
+                self.root.bell()
+
+        if self._sort_col == "Name":
+            indices = sorted(indices, key=lambda i: self.patterns[i].name.lower(), reverse=self._sort_desc)
+        elif self._sort_col == "Compases":
+            indices = sorted(indices, key=lambda i: self.patterns[i].num_compases(), reverse=self._sort_desc)
+        elif self._sort_col:
+            columna = next(c[1] for c in self.feature_cols if c[0] == self._sort_col)
+            indices = self.features.ordenar(columna, self._sort_desc, indices)
+
+        # iid = índice en self.patterns (el orden visual puede ser otro)
+        for i in indices:
+            i = int(i)
+            self.tree.insert("", tk.END, iid=str(i), values=self._row_values(i))
+
+    ## ------------------------------------------------------------
+    ## Function: _row_values
+    ## Description: Valores de la fila del Treeview para el patrón i.
+    ## ------------------------------------------------------------
+    def _row_values(self, i):
+        p = self.patterns[i]
+        feats = [self.features[c[1]][i] for c in self.feature_cols]
+        valores = [f"{v:.2f}" for v in feats[:-1]] + [int(feats[-1])]
+        return (p.name, p.num_compases(), *valores)
+
+    ## ------------------------------------------------------------
+    ## Function: _poll_watcher
+    ## Description: Revisa cada WATCH_INTERVAL_MS si rhythms.json cambió en disco.
+    ## ------------------------------------------------------------
+    def _poll_watcher(self):
+        self._watcher.poll()
+        self.root.after(WATCH_INTERVAL_MS, self._poll_watcher)
+
+    ## ------------------------------------------------------------
+    ## Function: _on_library_changed
+    ## Description: rhythms.json cambió fuera de la GUI. Se aplica a
+    ##              self.patterns solo el diff contra lo leído; si ningún
+    ##              índice se movió se actualizan solo las filas cambiadas,
+    ##              si no se reconstruye el Treeview. La selección y el
+    ##              patrón en edición (edit_buffer) se conservan.
+    ## param path: ruta del archivo que cambió.
+    ## ------------------------------------------------------------
+    def _on_library_changed(self, path):
+        nuevos = load_patterns(path)
+        ops = diff_lists(self.patterns, nuevos, pattern_diff_key)
+        if not ops:
+            return
+
+        seleccion = [remap_index(ops, int(i), follow_replace=True) for i in self.tree.selection()]
+        seleccion = tuple(str(i) for i in seleccion if i is not None)
+        self.current_index = remap_index(ops, self.current_index, follow_replace=True)
+
+        apply_diff(self.patterns, ops, nuevos)
+
+        if all(tag == "replace" and i2 - i1 == j2 - j1 for tag, i1, i2, j1, j2 in ops) \
+                and not self.filter_var.get().strip() and self._sort_col is None:
+            if self.features.actualizar(self.patterns):
+                try:
+                    save_feature_table(self.features)
+                except OSError as exc:
+                    print("No se pudo guardar el cache de features:", exc)
+            for tag, i1, i2, j1, j2 in ops:
+                for i in range(j1, j2):
+                    self.tree.item(str(i), values=self._row_values(i))
+            return
+
+        self.update_tree()
+        seleccion = tuple(i for i in seleccion if self.tree.exists(i))
+        if seleccion:
+            self._skip_select = seleccion
+            self.tree.selection_set(seleccion)
+
+    ## ------------------------------------------------------------
+    ## Function: sort_tree
+    ## Description: Ordena el Treeview por la columna indicada (click en el encabezado).
+    ##              Un segundo click invierte el orden.
+    ## param col_id: id de la columna del Treeview.
+    ## ------------------------------------------------------------
+    def sort_tree(self, col_id):
+        if self._sort_col == col_id:
+            self._sort_desc = not self._sort_desc
+        else:
+            self._sort_col = col_id
+            self._sort_desc = False
+        self.update_tree()
 
 
@@ -7,7 +7,11 @@
 
 import re
 import os
+import time
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox, simpledialog, filedialog
 
 from midi_engine.chords import (
@@ -15,11 +19,40 @@ from midi_engine.chords import (
     reproducir_acorde_mientras,
     detener_acorde,
     reproducir_notas_secuenciales_threaded,
-    reproducir_notas_ordenadas_threaded
+    reproducir_notas_ordenadas_threaded,
+    reproducir_progresion_threaded
 )
 from midi_engine.notes_db import BD_Notas_Midi
-from storage_engine.voicing_storage import load_voicings, save_voicings
-
+from midi_engine.chord_names import sugerir_nombre, verificar_nombres
+from midi_engine.voice_leading import ConduccionDeVoces
+from storage_engine.voicing_storage import (
+    ARCHIVO_VOICINGS, load_voicings, schedule_save_voicings, save_voicings_as_other_file, record_voicing_changes,
+    read_voicings_file, save_voicings_stream
+)
+from storage_engine.saver import atomic_write_json, flush_pending_saves
+from storage_engine.voicing_stream import iter_voicing_batches
+from storage_engine.sqlite_storage import SQLiteLibrary, is_sqlite_library
+from storage_engine.binary_storage import is_binary_library
+from storage_engine.content_store import StoreError, is_manifest_file
+from storage_engine.watcher import FileWatcher, diff_lists, apply_diff, voicing_diff_key
+from storage_engine.voicing_record import VoicingRecord, normalize_voicing, normalize_voicings
+from storage_engine.pitch_index import PitchClassIndex
+from storage_engine.similarity_index import SimilarityIndex
+from storage_engine.workspace import VoicingWorkspace, qualified_name
+
+# JSON más grandes que esto se cargan por partes (ver _stream_voicings)
+STREAM_MIN_BYTES = 8 * 1024 * 1024
+STREAM_BATCH = 500
+# filas por consulta al abrir una librería SQLite (page_voicings); se muestran de a STREAM_BATCH
+SQLITE_PAGE = 5000
+# lotes leídos que todavía no se mostraron; el hilo lector espera si hay más
+STREAM_MAX_PENDING = 4
+IO_POLL_MS = 30
+# tiempo máximo por tick de Tk ejecutando llamadas encoladas (ver _poll_io)
+IO_POLL_BUDGET_S = 0.02
+WATCH_INTERVAL_MS = 1000
+# namespace de la librería en edición (self.voicings) dentro del workspace
+WORKING_NAMESPACE = "voicings"
 
 
 ## --------------------------------------------------------------------------------------------------------------------
@@ -61,6 +94,34 @@ class VoicingBuilderGUI:
         # exit
         self.menu_file.add_command(label="Exit", command=self.quit)
 
+        # Search menu
+        menu_search = tk.Menu(menubar, tearoff=False)
+        menubar.add_cascade(label="Search", menu=menu_search)
+        menu_search.add_command(label="Find by pitch classes...", command=self.find_by_pitch_classes)
+        menu_search.add_command(label="Check voicing names", command=self.check_voicing_names)
+
+        # Tools menu
+        menu_tools = tk.Menu(menubar, tearoff=False)
+        menubar.add_cascade(label="Tools", menu=menu_tools)
+        menu_tools.add_command(label="Voice leading...", command=self.voice_leading)
+
+        # Workspace menu (los submenús se arman al abrirlos, ver update_workspace_menu)
+        menu_workspace = tk.Menu(menubar, tearoff=False, postcommand=self.update_workspace_menu)
+        menubar.add_cascade(label="Workspace", menu=menu_workspace)
+        menu_workspace.add_command(label="Add File...", command=self.add_workspace_file)
+        self.workspace_switch_menu = tk.Menu(menu_workspace, tearoff=False)
+        menu_workspace.add_cascade(label="Switch To", menu=self.workspace_switch_menu)
+        self.workspace_remove_menu = tk.Menu(menu_workspace, tearoff=False)
+        menu_workspace.add_cascade(label="Remove", menu=self.workspace_remove_menu)
+        self.workspace_pin_menu = tk.Menu(menu_workspace, tearoff=False)
+        menu_workspace.add_cascade(label="Keep Loaded", menu=self.workspace_pin_menu)
+        menu_workspace.add_separator()
+        menu_workspace.add_command(label="Unload Inactive Files", command=self.unload_workspace_files)
+        menu_search.add_separator()
+        menu_search.add_command(label="Find name in workspace...", command=self.find_name_in_workspace)
+        menu_search.add_command(label="Find pitch classes in workspace...",
+                                command=self.find_pitch_classes_in_workspace)
+
         # Cargar lista de recientes y actualizar el menu
         self.recent_files = self.load_recent_files()
         self.update_recent_menu()
@@ -77,9 +138,43 @@ class VoicingBuilderGUI:
 
         # Datos
         # load_voicings() debe devolver lista de dicts con keys: name, root, notes
-        self.voicings = load_voicings()
+        try:
+            self.voicings = load_voicings()
+        except StoreError as e:
+            # no se abre con la lista vacía: el primer guardado pisaría el manifiesto
+            messagebox.showerror("Error", f"No se pudo leer la librería de voicings:\n{e}")
+            self.root.destroy()
+            raise
         self.current_voicing_name = None  # nombre del voicing que estamos editando
         self.current_voicing_index = None
+        # Lectura/escritura de archivos en segundo plano (ver _run_io)
+        self._load_token = 0  # se incrementa en cada carga; descarta resultados de cargas viejas
+        self._cancel_event = threading.Event()
+        self._prev_voicings = None
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="voicing-io")
+        self._io_queue = queue.Queue()
+
+        # Cambios hechos a voicings.json por otros programas (ver _on_library_changed)
+        self._local_changes = 0
+        self._watcher = FileWatcher()
+        self._watcher.watch(ARCHIVO_VOICINGS, self._on_library_changed)
+        # Índices sobre self.voicings que se arman al usarlos (ver _invalidate_indexes)
+        self._pitch_index = None
+        self._similarity_index = None
+        self._indexes_version = 0  # cambia con _invalidate_indexes (índices armados en segundo plano)
+        self._conduccion = None
+        self._last_progression = ""
+        # Otros archivos abiertos a la vez (ver storage_engine/workspace.py); la
+        # librería en edición es un namespace más y va primero para los hotkeys
+        self.workspace = VoicingWorkspace()
+        self.workspace.attach(WORKING_NAMESPACE, self.voicings)
+        archivos, residentes = self.load_workspace_files()
+        for path in archivos:
+            if os.path.exists(path):
+                ns = self.workspace.add(path)
+                self.workspace.pin(ns, path in residentes)
+        self._preload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workspace-load")
+        self._preload_workspace()
         self.preview_enabled = tk.BooleanVar(value=False)
 
         # ------------------------------
@@ -201,6 +296,13 @@ class VoicingBuilderGUI:
                         command=self.assign_hotkey)
         btn_hotkey.grid(row=5, column=0, pady=3, sticky="ew")
 
+        btn_similar = ttk.Button(frame_saved, text="Similar",
+                                 command=self.find_similar_voicings)
+        btn_similar.grid(row=6, column=0, pady=3, sticky="ew")
+
+        # se deshabilitan mientras una carga por partes no terminó (ver _set_editing)
+        self._edit_buttons = [self.btn_save_as, btn_delete_voicing, btn_rename_voicing,
+                              btn_move_up, btn_move_down, btn_hotkey]
 
         self.update_tree()
 
@@ -209,6 +311,26 @@ class VoicingBuilderGUI:
                                       variable=self.preview_enabled)
         chk_preview.grid(row=3, column=0, padx=5, pady=5, sticky="w")
 
+        # Progreso de carga/guardado (oculto si no hay nada en curso)
+        self.frame_progress = ttk.Frame(root)
+        self.frame_progress.grid(row=3, column=1, padx=10, pady=5, sticky="ew")
+        self.lbl_progress = ttk.Label(self.frame_progress, text="")
+        self.lbl_progress.grid(row=0, column=0, sticky="w")
+        self.progress = ttk.Progressbar(self.frame_progress, orient=tk.HORIZONTAL, length=200)
+        self.progress.grid(row=0, column=1, padx=5)
+        ttk.Button(self.frame_progress, text="Cancel",
+                   command=self._cancel_io).grid(row=0, column=2)
+        self.frame_progress.grid_remove()
+        # archivos del workspace sin cargar (sus hotkeys no suenan hasta cargarlos)
+        self.lbl_workspace = ttk.Label(root, text="")
+        self.lbl_workspace.grid(row=4, column=0, columnspan=2, padx=10, sticky="w")
+        self._update_workspace_status()
+        self._destroyed = False
+        self._poll_io_id = self.root.after(IO_POLL_MS, self._poll_io)
+        self._poll_watcher_id = self.root.after(WATCH_INTERVAL_MS, self._poll_watcher)
+        # main.py cierra la ventana con destroy() sin pasar por quit()
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
         # -----------------------------------------------------------------
         # Selección inicial: si hay voicings, seleccionar el primero y cargarlo
         # -----------------------------------------------------------------
@@ -239,6 +361,8 @@ class VoicingBuilderGUI:
     ## Description: Asigna un hotkey al voicing seleccionado.
     ## ------------------------------
     def assign_hotkey(self):
+        if self._editing_locked():
+            return
         sel = self.tree.selection()
         if not sel:
             messagebox.showwarning("Nada seleccionado", "Selecciona un voicing.")
@@ -254,20 +378,61 @@ class VoicingBuilderGUI:
 
         hk = hk.lower()
 
+        cambiados = set()
+
         # evitar duplicados
-        for v in self.voicings:
+        for i, v in enumerate(self.voicings):
             if v.get("hotkey") == hk:
                 v["hotkey"] = ""   # quitarlo del anterior
+                cambiados.add(i)
 
         # asignar al actual
-        for v in self.voicings:
+        for i, v in enumerate(self.voicings):
             if v["name"] == nombre:
                 v["hotkey"] = hk
+                cambiados.add(i)
 
-        save_voicings(self.voicings)
+        self._record_changes([
+            {"op": "update", "index": i, "value": self.voicings[i]} for i in sorted(cambiados)
+        ])
         messagebox.showinfo("Hotkey", f"Hotkey '{hk}' asignado al voicing '{nombre}'.")
 
 
+    ## ------------------------------
+    ## Function: _record_changes
+    ## Description: Guarda cambios pequeños como registros del journal
+    ##              (ver storage_engine/journal.py) en vez de reescribir todo.
+    ## \param records: lista de registros {"op", "index", ...}.
+    ## ------------------------------
+    def _record_changes(self, records):
+        if records:
+            self._local_changes += 1
+            self._invalidate_indexes()
+            record_voicing_changes(self.voicings, records)
+
+
+    ## ------------------------------
+    ## Function: _editing_locked
+    ## Description: True (y se avisa) si hay una carga por partes en curso:
+    ##              self.voicings está a medio llenar y un cambio guardaría
+    ##              la lista incompleta (journal, compactación).
+    ## ------------------------------
+    def _editing_locked(self):
+        if self._prev_voicings is None:
+            return False
+        messagebox.showinfo("Cargando", "Espera a que termine la carga (o cancélala) para editar.")
+        return True
+
+
+    ## ------------------------------
+    ## Function: _set_editing
+    ## Description: Habilita o deshabilita los botones que modifican la librería.
+    ## ------------------------------
+    def _set_editing(self, enabled):
+        for btn in self._edit_buttons:
+            btn.state(["!disabled"] if enabled else ["disabled"])
+
+
     ## ------------------------------
     ## Function: on_voicing_click
     ## Description: Maneja el click en un voicing del treeview.
@@ -282,16 +447,18 @@ class VoicingBuilderGUI:
         if not values:
             return
 
-        # values = (root, name, notes)
-        root_note = values[0]
+        # values = (root, name, notes); las filas están en el mismo orden que self.voicings
         nombre = values[1]
-        notas_str = values[2]
-
-        # Normalizar notas_str -> lista
-        notas = [n.strip() for n in notas_str.split(",") if n.strip()]
+        idx = self.tree.index(item)
+        if not (idx < len(self.voicings) and self.voicings[idx].get("name") == nombre):
+            idx = next((i for i, v in enumerate(self.voicings) if v["name"] == nombre), None)
+        if idx is None:
+            return
+        voicing = self.voicings[idx]
+        root_note = voicing.get("root", "")
+        notas = voicing.get("notes", [])
 
         # Guardar referencia
-        idx = next((i for i, v in enumerate(self.voicings) if v["name"] == nombre), None)
         self.current_voicing_index = idx
         self.current_voicing_name = nombre
 
@@ -335,7 +502,7 @@ class VoicingBuilderGUI:
 
         # Reproducir preview si está habilitado
         if self.preview_enabled.get():
-            reproducir_acorde_threaded(self.player, notas, duracion=1.0)
+            reproducir_acorde_threaded(self.player, voicing, duracion=1.0)
 
 
     ## ------------------------------
@@ -444,6 +611,8 @@ class VoicingBuilderGUI:
     ## Description: Guarda el voicing actual con un nuevo nombre.
     ## ------------------------------
     def save_voicing_as(self):
+        if self._editing_locked():
+            return
         notas = list(self.voicing_listbox.get(0, tk.END))
         if not notas:
             messagebox.showwarning("Vacío", "No hay notas en el voicing.")
@@ -457,20 +626,26 @@ class VoicingBuilderGUI:
             return
         root_full = f"{root_note}{root_oct}"
 
-        nombre = simpledialog.askstring("Save As", "Nombre del voicing:")
+        # nombre sugerido a partir de las notas y la root (ver midi_engine/chord_names.py)
+        sugerido = sugerir_nombre(notas, root_full)
+        nombre = simpledialog.askstring("Save As", "Nombre del voicing:", initialvalue=sugerido or "")
         if not nombre:
             return
 
         # Remover si ya existía con ese nombre
+        borrados = [i for i, v in enumerate(self.voicings) if v["name"] == nombre]
         self.voicings = [v for v in self.voicings if v["name"] != nombre]
 
         # Agregar nuevo voicing con root
-        self.voicings.append({"name": nombre, "root": root_full, "notes": notas})
+        self.voicings.append(VoicingRecord(name=nombre, root=root_full, notes=notas))
         self.current_voicing_name = nombre
         self.current_voicing_index = next((i for i, v in enumerate(self.voicings) if v["name"] == nombre), None)
         self.lbl_current_name.config(text=f"Current voicing: {nombre}")
 
-        save_voicings(self.voicings)
+        self._record_changes(
+            [{"op": "delete", "index": i} for i in reversed(borrados)] +
+            [{"op": "add", "index": len(self.voicings) - 1, "value": self.voicings[-1]}]
+        )
         self.update_tree()
 
         # Seleccionar el nuevo voicing en el tree
@@ -488,6 +663,8 @@ class VoicingBuilderGUI:
     ## Description: Guarda los cambios en el voicing actualmente seleccionado.
     ## ------------------------------
     def save_existing_voicing(self):
+        if self._editing_locked():
+            return
         if not self.current_voicing_name:
             return  # nada que guardar
 
@@ -501,13 +678,12 @@ class VoicingBuilderGUI:
             return
         root_full = f"{root_note}{root_oct}"
 
-        for v in self.voicings:
+        for i, v in enumerate(self.voicings):
             if v["name"] == self.current_voicing_name:
                 v["notes"] = notas
                 v["root"] = root_full
+                self._record_changes([{"op": "update", "index": i, "value": v}])
                 break
-
-        save_voicings(self.voicings)
         self.update_tree()
         messagebox.showinfo("Guardado", f"Voicing '{self.current_voicing_name}' actualizado.")
 
@@ -525,12 +701,37 @@ class VoicingBuilderGUI:
     ## ------------------------------
     def update_tree(self):
         self.tree.delete(*self.tree.get_children())
-        for v in self.voicings:
+        self._insert_rows(self.voicings)
+
+
+    ## ------------------------------
+    ## Function: _insert_rows
+    ## Description: Agrega al tree una fila por voicing (al final, o a partir
+    ##              de la posición `index`).
+    ## ------------------------------
+    def _insert_rows(self, voicings, index=None):
+        self._invalidate_indexes()
+        for k, v in enumerate(voicings):
             notas_str = ", ".join(v.get("notes", []))
             root_val = v.get("root", "?")
             name = v.get("name", "(unnamed)")
             hotkey = v.get("hotkey", "")
-            self.tree.insert("", tk.END, values=(root_val, name, notas_str, hotkey))
+            pos = tk.END if index is None else index + k
+            self.tree.insert("", pos, values=(root_val, name, notas_str, hotkey))
+
+
+    ## ------------------------------
+    ## Function: _invalidate_indexes
+    ## Description: Descarta los índices armados sobre self.voicings (búsqueda
+    ##              por clases de altura, similitud, conducción de voces); se vuelven a
+    ##              armar la próxima vez que se usen.
+    ## ------------------------------
+    def _invalidate_indexes(self):
+        self._indexes_version += 1
+        self._pitch_index = None
+        self._similarity_index = None
+        self._conduccion = None
+        self.workspace.attach(WORKING_NAMESPACE, self.voicings)
 
 
     ## ------------------------------
@@ -538,6 +739,8 @@ class VoicingBuilderGUI:
     ## Description: Elimina el voicing seleccionado.
     ## ------------------------------
     def delete_voicing(self):
+        if self._editing_locked():
+            return
         sel = self.tree.selection()
         if not sel:
             messagebox.showwarning("Nada seleccionado", "Selecciona un voicing.")
@@ -547,8 +750,9 @@ class VoicingBuilderGUI:
         nombre = self.tree.item(item, "values")[1]  # (root, name, notes)
 
         if messagebox.askyesno("Eliminar", f"¿Eliminar voicing '{nombre}'?"):
+            borrados = [i for i, v in enumerate(self.voicings) if v["name"] == nombre]
             self.voicings = [v for v in self.voicings if v["name"] != nombre]
-            save_voicings(self.voicings)
+            self._record_changes([{"op": "delete", "index": i} for i in reversed(borrados)])
             self.update_tree()
 
             if nombre == self.current_voicing_name:
@@ -560,6 +764,8 @@ class VoicingBuilderGUI:
     ## Description: Renombra el voicing seleccionado.
     ## ------------------------------
     def rename_voicing(self):
+        if self._editing_locked():
+            return
         sel = self.tree.selection()
         if not sel:
             messagebox.showwarning("Nada seleccionado", "Selecciona un voicing.")
@@ -577,9 +783,10 @@ class VoicingBuilderGUI:
             messagebox.showerror("Error", "Ya existe un voicing con ese nombre.")
             return
 
-        for v in self.voicings:
+        for i, v in enumerate(self.voicings):
             if v["name"] == old_name:
                 v["name"] = new_name
+                self._record_changes([{"op": "update", "index": i, "value": v}])
                 break
 
         # Actualizar estado actual si era el seleccionado
@@ -587,7 +794,6 @@ class VoicingBuilderGUI:
             self.current_voicing_name = new_name
             self.lbl_current_name.config(text=f"Current voicing: {new_name}")
 
-        save_voicings(self.voicings)
         self.update_tree()
 
         # re-seleccionar el item renombrado
@@ -603,6 +809,8 @@ class VoicingBuilderGUI:
     ## Description: Mueve el voicing seleccionado hacia arriba en la lista.
     ## ------------------------------
     def move_voicing_up(self):
+        if self._editing_locked():
+            return
         sel = self.tree.selection()
         if not sel:
             return
@@ -616,7 +824,7 @@ class VoicingBuilderGUI:
 
         self.voicings[idx - 1], self.voicings[idx] = self.voicings[idx], self.voicings[idx - 1]
 
-        save_voicings(self.voicings)
+        self._record_changes([{"op": "move", "index": idx, "to": idx - 1}])
         self.update_tree()
 
         # re-seleccionar la nueva posición
@@ -630,6 +838,8 @@ class VoicingBuilderGUI:
     ## Description: Mueve el voicing seleccionado hacia abajo en la lista.
     ## ------------------------------
     def move_voicing_down(self):
+        if self._editing_locked():
+            return
         sel = self.tree.selection()
         if not sel:
             return
@@ -643,7 +853,7 @@ class VoicingBuilderGUI:
 
         self.voicings[idx + 1], self.voicings[idx] = self.voicings[idx], self.voicings[idx + 1]
 
-        save_voicings(self.voicings)
+        self._record_changes([{"op": "move", "index": idx, "to": idx + 1}])
         self.update_tree()
 
         children = self.tree.get_children()
@@ -702,13 +912,16 @@ class VoicingBuilderGUI:
 
         self.active_hotkeys.add(hk)
 
-        # buscar voicing
-        for v in self.voicings:
-            if v.get("hotkey") == hk:
-                notas = v.get("notes", [])
-                if notas:
-                    reproducir_acorde_mientras(self.player, notas, hk)
-                return
+        # buscar voicing (librería en edición primero, después los otros archivos del workspace)
+        encontrado = self.workspace.hotkey(hk)
+        if encontrado is not None:
+            v = encontrado[2]
+            if v.get("notes"):
+                # el record ya trae las notas MIDI calculadas
+                reproducir_acorde_mientras(self.player, v, hk)
+        elif self.workspace.unloaded():
+            # puede estar en un archivo sin cargar: se avisa en vez de no hacer nada
+            self._update_workspace_status(f"Hotkey '{hk}' no encontrado en los archivos cargados.")
 
 
     ## ------------------------------
@@ -728,12 +941,9 @@ class VoicingBuilderGUI:
         self.active_hotkeys.remove(hk)
 
         # buscar voicing y apagar
-        for v in self.voicings:
-            if v.get("hotkey") == hk:
-                notas = v.get("notes", [])
-                if notas:
-                    detener_acorde(hk)
-                return
+        encontrado = self.workspace.hotkey(hk)
+        if encontrado is not None and encontrado[2].get("notes"):
+            detener_acorde(hk)
 
 
     ## ------------------------------
@@ -749,32 +959,617 @@ class VoicingBuilderGUI:
         ruta = filedialog.askopenfilename(
             initialdir=data_dir,
             title="Seleccionar archivo JSON",
-            filetypes=[("JSON Files", "*.json")]
+            filetypes=[("JSON Files", "*.json"), ("Manifest", "*.vman"), ("Binary Library", "*.vbin"), ("SQLite Library", "*.sqlite *.db")]
         )
         if not ruta:
             return
 
-        # Abrir archivo seleccionado
-        import json
+        # Abrir archivo seleccionado (JSON o librería SQLite)
         try:
-            with open(ruta, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            self.open_voicings_file(ruta)
         except Exception as e:
             messagebox.showerror("Error", f"Error al leer el archivo:\n{e}")
+
+
+    ## ------------------------------
+    ## Function: open_voicings_file
+    ## Description: Carga los voicings de `path` como librería actual.
+    ##              La lectura se hace en un hilo de fondo (ver _run_io); los
+    ##              JSON grandes y las librerías SQLite (por páginas) llegan
+    ##              por lotes y se van mostrando.
+    ## param path: ruta al archivo (JSON, .vbin o SQLite).
+    ## ------------------------------
+    def open_voicings_file(self, path):
+        # una carga nueva invalida cualquier carga anterior todavía en curso
+        self._cancel_io()
+        self._load_token += 1
+        token = self._load_token
+        cancelado = self._cancel_event
+
+        es_sqlite = is_sqlite_library(path)
+        es_json = not (es_sqlite or is_binary_library(path))
+        if es_sqlite or (es_json and os.path.getsize(path) >= STREAM_MIN_BYTES and not is_manifest_file(path)):
+            # si se cancela a mitad se vuelve a la librería anterior
+            self._prev_voicings = self.voicings
+            self.voicings = []
+            self.tree.delete(*self.tree.get_children())
+            self._set_editing(False)
+
+            # backpressure: a lo sumo STREAM_MAX_PENDING lotes esperando a Tk
+            pendientes = threading.Semaphore(STREAM_MAX_PENDING)
+
+            def lotes():
+                if es_sqlite:
+                    # la primera página se muestra enseguida, sin leer toda la librería
+                    with SQLiteLibrary(path) as lib:
+                        total = lib.count_voicings()
+                        for inicio in range(0, total, SQLITE_PAGE):
+                            pagina = lib.page_voicings(inicio, SQLITE_PAGE)
+                            if not pagina:
+                                break
+                            self._post(self._set_progress, token, (inicio + len(pagina)) / total)
+                            for k in range(0, len(pagina), STREAM_BATCH):
+                                yield pagina[k:k + STREAM_BATCH]
+                    return
+                total = os.path.getsize(path)
+                progreso = lambda leidos: self._post(self._set_progress, token, leidos / total)
+                yield from iter_voicing_batches(path, STREAM_BATCH, progreso=progreso)
+
+            def trabajo():
+                for lote in lotes():
+                    lote = normalize_voicings(lote)
+                    while not pendientes.acquire(timeout=0.1):
+                        if cancelado.is_set():
+                            return None
+                    if cancelado.is_set():
+                        return None
+                    self._post(self._on_batch_loaded, token, lote, pendientes)
+                return None
+        else:
+            self._prev_voicings = None
+
+            def trabajo():
+                return read_voicings_file(path)
+
+        self._run_io(f"Cargando {os.path.basename(path)}...", token, trabajo,
+                     lambda voicings: self._on_file_loaded(path, voicings),
+                     self._on_load_error)
+
+
+    ## ------------------------------
+    ## Function: _on_batch_loaded
+    ## Description: (hilo de Tk) Agrega un lote leído por partes.
+    ## ------------------------------
+    def _on_batch_loaded(self, token, lote, pendientes):
+        pendientes.release()
+        if token != self._load_token:
             return
+        self.voicings.extend(lote)
+        self._insert_rows(lote)
+
 
-        voicings = data.get("voicings", [])
+    ## ------------------------------
+    ## Function: _on_load_error
+    ## Description: (hilo de Tk) Error al leer: si la carga era por partes se
+    ##              vuelve a la librería anterior (como _cancel_io), así no se
+    ##              editan ni se guardan los voicings a medio cargar.
+    ## ------------------------------
+    def _on_load_error(self, e):
+        if self._prev_voicings is not None:
+            self.voicings = self._prev_voicings
+            self._prev_voicings = None
+            self.update_tree()
+            self._set_editing(True)
+        messagebox.showerror("Error", f"Error al leer el archivo:\n{e}")
 
-        save_voicings(voicings)
 
-        self.voicings = voicings
-        self.update_tree()
+    ## ------------------------------
+    ## Function: _on_file_loaded
+    ## Description: (hilo de Tk) Aplica el resultado de open_voicings_file.
+    ## param voicings: lista completa, o None si llegó por lotes.
+    ## ------------------------------
+    def _on_file_loaded(self, path, voicings):
+        if voicings is not None:
+            self.voicings = voicings
+            self.update_tree()
+        self._prev_voicings = None
+        self._set_editing(True)
+
+        schedule_save_voicings(self.voicings)
 
         # Añadir a recientes y actualizar menu
+        self.add_recent_file(path)
+
+
+    ## ------------------------------
+    ## Function: _run_io
+    ## Description: Ejecuta `trabajo` en el pool de hilos mostrando la barra
+    ##              de progreso. on_done / on_error se llaman en el hilo de Tk
+    ##              y solo si `token` sigue siendo la carga vigente (None = siempre).
+    ## ------------------------------
+    def _run_io(self, texto, token, trabajo, on_done, on_error):
+        self._show_progress(texto)
+        future = self._io_pool.submit(trabajo)
+
+        def terminado(f):
+            # hilo del pool: solo se encola, Tk se toca desde _poll_io
+            if f.cancelled():
+                return
+            exc = f.exception()
+            if exc is not None:
+                self._post(self._finish_io, token, on_error, exc)
+            else:
+                self._post(self._finish_io, token, on_done, f.result())
+
+        future.add_done_callback(terminado)
+
+
+    def _finish_io(self, token, callback, value):
+        if token is not None and token != self._load_token:
+            return
+        self._hide_progress()
+        callback(value)
+
+
+    ## ------------------------------
+    ## Function: _post
+    ## Description: Encola una llamada para el hilo de Tk (seguro desde
+    ##              cualquier hilo); _poll_io la ejecuta con root.after.
+    ## ------------------------------
+    def _post(self, fn, *args):
+        self._io_queue.put((fn, args))
+
+
+    def _poll_io(self):
+        # con presupuesto de tiempo: si queda trabajo se sigue en el próximo
+        # tick (enseguida) y Tk puede redibujar y atender eventos entre medio
+        limite = time.monotonic() + IO_POLL_BUDGET_S
         try:
-            self.add_recent_file(ruta)
+            while time.monotonic() < limite:
+                fn, args = self._io_queue.get_nowait()
+                fn(*args)
+            demora = 1
+        except queue.Empty:
+            demora = IO_POLL_MS
+        if not self._destroyed:
+            self._poll_io_id = self.root.after(demora, self._poll_io)
+
+
+    ## ------------------------------
+    ## Function: _cancel_io
+    ## Description: Cancela la operación en curso (botón Cancel). Un resultado
+    ##              que llegue tarde se descarta por el token.
+    ## ------------------------------
+    def _cancel_io(self):
+        self._cancel_event.set()
+        self._cancel_event = threading.Event()
+        self._load_token += 1
+        if self._prev_voicings is not None:
+            self.voicings = self._prev_voicings
+            self._prev_voicings = None
+            self.update_tree()
+            self._set_editing(True)
+        self._hide_progress()
+
+
+    def _set_progress(self, token, fraccion):
+        if token != self._load_token:
+            return
+        self.progress.config(mode="determinate", value=min(100, fraccion * 100))
+
+
+    def _show_progress(self, texto):
+        self.lbl_progress.config(text=texto)
+        self.progress.config(mode="indeterminate", value=0)
+        self.progress.start(50)
+        self.frame_progress.grid()
+
+
+    def _hide_progress(self):
+        self.progress.stop()
+        self.frame_progress.grid_remove()
+
+
+    ## ------------------------------
+    ## Function: _poll_watcher
+    ## Description: Revisa cada WATCH_INTERVAL_MS si voicings.json cambió en disco.
+    ## ------------------------------
+    def _poll_watcher(self):
+        self._watcher.poll()
+        if not self._destroyed:
+            self._poll_watcher_id = self.root.after(WATCH_INTERVAL_MS, self._poll_watcher)
+
+
+    ## ------------------------------
+    ## Function: _on_library_changed
+    ## Description: voicings.json cambió fuera de la GUI: se relee en segundo
+    ##              plano y se aplica solo la diferencia (ver _apply_reload).
+    ## ------------------------------
+    def _on_library_changed(self, path):
+        cambios = self._local_changes
+        future = self._io_pool.submit(load_voicings)
+        future.add_done_callback(lambda f: self._post(self._apply_reload, path, cambios, f))
+
+
+    ## ------------------------------
+    ## Function: _apply_reload
+    ## Description: (hilo de Tk) Aplica al tree y a self.voicings el diff mínimo
+    ##              contra lo leído. Las filas que no cambiaron conservan su
+    ##              item (y la selección); el voicing en edición no se toca.
+    ## ------------------------------
+    def _apply_reload(self, path, cambios, future):
+        # hubo cambios locales (o una carga por partes) mientras se leía:
+        # lo leído ya está viejo, se vuelve a intentar en el próximo poll
+        if cambios != self._local_changes or self._prev_voicings is not None:
+            self._watcher.invalidate(path)
+            return
+        if future.exception() is not None:
+            return
+
+        nuevos = future.result()
+        ops = diff_lists(self.voicings, nuevos, voicing_diff_key)
+        if not ops:
+            return
+
+        def borrar(i1, i2):
+            self._invalidate_indexes()
+            self.tree.delete(*self.tree.get_children()[i1:i2])
+
+        apply_diff(self.voicings, ops, nuevos, on_delete=borrar,
+                   on_insert=lambda i, nuevos_v: self._insert_rows(nuevos_v, index=i))
+
+        # el índice del voicing en edición puede haberse movido
+        if self.current_voicing_name is not None:
+            self.current_voicing_index = next(
+                (i for i, v in enumerate(self.voicings) if v["name"] == self.current_voicing_name), None)
+
+
+    ## ------------------------------
+    ## Function: find_by_pitch_classes
+    ## Description: Selecciona en el tree los voicings que cumplen una búsqueda
+    ##              por clases de altura (ver storage_engine/pitch_index.py):
+    ##              "C E G Bb" (cualquier transposición), "=C E G Bb" (exacto),
+    ##              ">E Bb" (contiene), "<C D E G A" (subconjunto), "ic6".
+    ## ------------------------------
+    def find_by_pitch_classes(self):
+        query = simpledialog.askstring(
+            "Find by pitch classes",
+            "Notas (C E G Bb = cualquier transposición)\n"
+            "=exacto   >contiene   <subconjunto   ic1..ic6 = clase de intervalo",
+            parent=self.root)
+        if not query:
+            return
+        if self._pitch_index is None:
+            self._pitch_index = PitchClassIndex.from_voicings(self.voicings)
+        try:
+            indices = self._pitch_index.search(query)
+        except ValueError as e:
+            messagebox.showerror("Búsqueda inválida", str(e))
+            return
+
+        children = self.tree.get_children()
+        items = [children[i] for i in indices if i < len(children)]
+        self.tree.selection_set(items)
+        if items:
+            self.tree.see(items[0])
+            self.tree.focus(items[0])
+        messagebox.showinfo("Find by pitch classes", f"{len(items)} voicings encontrados.")
+
+
+    ## ------------------------------
+    ## Function: find_similar_voicings
+    ## Description: Selecciona en el tree los voicings más parecidos al
+    ##              seleccionado (ver storage_engine/similarity_index.py) y
+    ##              los lista de más a menos parecido.
+    ## ------------------------------
+    def find_similar_voicings(self, k=20):
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showwarning("Nada seleccionado", "Selecciona un voicing.")
+            return
+        idx = self.tree.index(sel[0])
+        if idx >= len(self.voicings) or not self.voicings[idx].valid:
+            messagebox.showwarning("Similar", "El voicing seleccionado no tiene notas válidas.")
+            return
+
+        if self._similarity_index is None:
+            # armarlo cuesta ~1.7 s con 500k voicings: se hace en el pool sobre
+            # una copia de la lista y se vuelve a pedir cuando está listo
+            lista = list(self.voicings)
+            version = self._indexes_version
+
+            def listo(indice):
+                if version != self._indexes_version:
+                    # la librería cambió mientras se armaba: hay que volver a armarlo
+                    self.find_similar_voicings(k)
+                    return
+                self._similarity_index = indice
+                self._show_similar(idx, k)
+
+            self._run_io("Armando índice de similitud...", self._load_token,
+                         lambda: SimilarityIndex.from_voicings(lista), listo,
+                         lambda e: messagebox.showerror("Error", f"Error al armar el índice:\n{e}"))
+            return
+        self._show_similar(idx, k)
+
+
+    def _show_similar(self, idx, k):
+        vecinos = self._similarity_index.nearest(self.voicings[idx].midi_sorted, k=k, exclude=idx)
+        if not vecinos:
+            messagebox.showinfo("Similar", "No hay otros voicings.")
+            return
+
+        children = self.tree.get_children()
+        items = [children[i] for i, _ in vecinos if i < len(children)]
+        self.tree.selection_set(items)
+        self.tree.see(items[0])
+        self.tree.focus(items[0])
+
+        lineas = [f"{d:5.1f}  {self.voicings[i].get('name', '(unnamed)')}:  {', '.join(self.voicings[i]['notes'])}"
+                  for i, d in vecinos]
+        messagebox.showinfo("Similar",
+                            f"Más parecidos a '{self.voicings[idx].get('name', '(unnamed)')}':\n\n"
+                            + "\n".join(lineas))
+
+
+    ## ------------------------------
+    ## Function: voice_leading
+    ## Description: Pide una progresión ("Cm6 G7 Cm6") y, opcionalmente, la
+    ##              nota aguda de cada acorde; elige de la librería los
+    ##              voicings con menor movimiento de voces (ver
+    ##              midi_engine/voice_leading.py) y los reproduce.
+    ## ------------------------------
+    def voice_leading(self):
+        progresion = simpledialog.askstring(
+            "Voice leading", "Progresión (símbolos separados por espacios):",
+            initialvalue=self._last_progression, parent=self.root)
+        if not progresion or not progresion.split():
+            return
+        self._last_progression = progresion
+        agudas = simpledialog.askstring(
+            "Voice leading",
+            "Nota aguda de cada acorde (opcional, \"-\" = libre), ej: G4 - F4",
+            parent=self.root)
+        agudas = agudas.split() if agudas and agudas.strip() else None
+
+        if self._conduccion is None:
+            self._conduccion = ConduccionDeVoces(self.voicings)
+        conduccion = self._conduccion
+        cancelado = self._cancel_event
+
+        def mostrar(resultado):
+            voicings, total = resultado
+            if voicings is None:
+                return
+            reproducir_progresion_threaded(self.player, voicings, duracion=1.0)
+            lineas = [f"{v['name']}:  {', '.join(v['notes'])}" for v in voicings]
+            messagebox.showinfo("Voice leading",
+                                f"Movimiento total: {total} semitonos\n\n" + "\n".join(lineas))
+
+        self._run_io("Buscando conducción de voces...", None,
+                     lambda: conduccion.optimizar(progresion, agudas, cancelado=cancelado),
+                     mostrar,
+                     lambda e: messagebox.showerror("Voice leading", str(e)))
+
+
+    ## ------------------------------
+    ## Function: check_voicing_names
+    ## Description: Selecciona los voicings cuyo nombre no coincide con sus
+    ##              notas y root, y muestra el nombre sugerido de cada uno.
+    ## ------------------------------
+    def check_voicing_names(self):
+        errores = verificar_nombres(self.voicings)
+        if not errores:
+            messagebox.showinfo("Check voicing names", "Todos los nombres coinciden con sus notas.")
+            return
+
+        children = self.tree.get_children()
+        items = [children[i] for i, _, _ in errores if i < len(children)]
+        self.tree.selection_set(items)
+        if items:
+            self.tree.see(items[0])
+            self.tree.focus(items[0])
+
+        lineas = [f"{nombre}  ->  {sugerido or '(no reconocido)'}" for _, nombre, sugerido in errores[:20]]
+        if len(errores) > 20:
+            lineas.append(f"... y {len(errores) - 20} más")
+        messagebox.showwarning("Check voicing names",
+                               f"{len(errores)} voicings con nombre distinto a sus notas:\n\n" + "\n".join(lineas))
+
+
+    ## ------------------------------
+    ## Function: add_workspace_file
+    ## Description: Agrega un archivo al workspace (ver storage_engine/workspace.py)
+    ##              y lo precarga en segundo plano.
+    ## ------------------------------
+    def add_workspace_file(self):
+        ruta = filedialog.askopenfilename(
+            initialdir=os.path.join(os.path.dirname(self._get_data_dir()), "data"),
+            title="Agregar archivo al workspace",
+            filetypes=[("JSON Files", "*.json"), ("Manifest", "*.vman"), ("Binary Library", "*.vbin"), ("SQLite Library", "*.sqlite *.db")]
+        )
+        if not ruta:
+            return
+        self.workspace.add(ruta)
+        self.save_workspace_files()
+        self._preload_workspace()
+        self._update_workspace_status()
+
+
+    ## ------------------------------
+    ## Function: _preload_workspace
+    ## Description: Lee en segundo plano los archivos del workspace que todavía
+    ##              no están cargados (hasta workspace.max_loaded), así cambiar
+    ##              a uno de ellos no espera la lectura.
+    ## ------------------------------
+    def _preload_workspace(self):
+        residentes, otros = [], []
+        for ns in self.workspace.unloaded():
+            (residentes if self.workspace.is_pinned(ns) else otros).append(ns)
+        # los residentes (Keep Loaded) siempre; del resto, los que entran sin expulsar
+        for ns in residentes + otros[:self.workspace.max_loaded]:
+            self._preload_pool.submit(self._preload_namespace, ns)
+
+
+    def _preload_namespace(self, ns):
+        try:
+            self.workspace.load(ns)
         except Exception:
-            pass
+            pass  # el error se muestra si se cambia a ese archivo
+        self._post(self._update_workspace_status)
+
+
+    ## ------------------------------
+    ## Function: _update_workspace_status
+    ## Description: Muestra debajo del tree qué archivos del workspace no
+    ##              están cargados (no participan en hotkeys ni búsquedas).
+    ## ------------------------------
+    def _update_workspace_status(self, aviso=""):
+        sin_cargar = self.workspace.unloaded()
+        texto = f"Not loaded: {', '.join(sin_cargar)}" if sin_cargar else ""
+        if aviso:
+            texto = f"{aviso}  {texto}" if texto else aviso
+        self.lbl_workspace.config(text=texto)
+
+
+    ## ------------------------------
+    ## Function: update_workspace_menu
+    ## Description: Reconstruye los submenús Switch To y Remove (al abrir el menú).
+    ## ------------------------------
+    def update_workspace_menu(self):
+        self.workspace_switch_menu.delete(0, tk.END)
+        self.workspace_remove_menu.delete(0, tk.END)
+        self.workspace_pin_menu.delete(0, tk.END)
+        archivos = [ns for ns in self.workspace.namespaces() if self.workspace.path(ns) is not None]
+        if not archivos:
+            for menu in (self.workspace_switch_menu, self.workspace_remove_menu, self.workspace_pin_menu):
+                menu.add_command(label="(no files)", state="disabled")
+            return
+        self._pin_vars = {}
+        for ns in archivos:
+            estado = "" if self.workspace.is_loaded(ns) else "  (not loaded)"
+            self.workspace_switch_menu.add_command(label=ns + estado,
+                                                   command=lambda ns=ns: self.switch_workspace_file(ns))
+            self.workspace_remove_menu.add_command(label=ns, command=lambda ns=ns: self.remove_workspace_file(ns))
+            var = self._pin_vars[ns] = tk.BooleanVar(value=self.workspace.is_pinned(ns))
+            self.workspace_pin_menu.add_checkbutton(label=ns, variable=var,
+                                                    command=lambda ns=ns: self.toggle_workspace_pin(ns))
+
+
+    ## ------------------------------
+    ## Function: toggle_workspace_pin
+    ## Description: Keep Loaded: el archivo queda residente (se carga ya y no
+    ##              se expulsa al cambiar de archivo), o vuelve al LRU.
+    ## ------------------------------
+    def toggle_workspace_pin(self, ns):
+        if ns not in self.workspace:
+            return
+        self.workspace.pin(ns, not self.workspace.is_pinned(ns))
+        self.save_workspace_files()
+        self._preload_workspace()
+        self._update_workspace_status()
+
+
+    ## ------------------------------
+    ## Function: switch_workspace_file
+    ## Description: Pasa a editar una copia del archivo `ns` del workspace
+    ##              (igual que abrirlo con Load, pero si ya está cargado no se
+    ##              vuelve a leer).
+    ## ------------------------------
+    def switch_workspace_file(self, ns):
+        if ns not in self.workspace:
+            return
+        path = self.workspace.path(ns)
+        self._cancel_io()
+        if self.workspace.is_loaded(ns):
+            self._on_file_loaded(path, [normalize_voicing(v) for v in self.workspace.load(ns)])
+            self._update_workspace_status()
+            return
+
+        def cargado(voicings):
+            self._on_file_loaded(path, [normalize_voicing(v) for v in voicings])
+            # cargarlo pudo expulsar otro archivo (los de Keep Loaded no)
+            self._update_workspace_status()
+
+        self._load_token += 1
+        token = self._load_token
+        self._run_io(f"Cargando {ns}...", token, lambda: self.workspace.load(ns), cargado,
+                     lambda e: messagebox.showerror("Error", f"Error al leer el archivo:\n{e}"))
+
+
+    def remove_workspace_file(self, ns):
+        if ns in self.workspace:
+            self.workspace.remove(ns)
+            self.save_workspace_files()
+            self._update_workspace_status()
+
+
+    ## ------------------------------
+    ## Function: unload_workspace_files
+    ## Description: Libera la memoria de los archivos del workspace (siguen en
+    ##              el workspace y se vuelven a leer al usarlos).
+    ## ------------------------------
+    def unload_workspace_files(self):
+        liberados = [ns for ns in self.workspace.namespaces()
+                     if not self.workspace.is_pinned(ns) and self.workspace.evict(ns)]
+        self._update_workspace_status()
+        messagebox.showinfo("Workspace", f"{len(liberados)} archivos descargados de memoria.")
+
+
+    ## ------------------------------
+    ## Function: find_name_in_workspace
+    ## Description: Busca un nombre de voicing en todos los archivos cargados
+    ##              del workspace ("namespace:nombre" busca en uno solo).
+    ## ------------------------------
+    def find_name_in_workspace(self):
+        nombre = simpledialog.askstring("Find name in workspace", "Nombre (o namespace:nombre):",
+                                        parent=self.root)
+        if not nombre:
+            return
+        self._show_workspace_results("Find name in workspace", self.workspace.find_name(nombre.strip()))
+
+
+    ## ------------------------------
+    ## Function: find_pitch_classes_in_workspace
+    ## Description: find_by_pitch_classes sobre todos los archivos cargados del workspace.
+    ## ------------------------------
+    def find_pitch_classes_in_workspace(self):
+        query = simpledialog.askstring(
+            "Find pitch classes in workspace",
+            "Notas (C E G Bb = cualquier transposición)\n"
+            "=exacto   >contiene   <subconjunto   ic1..ic6 = clase de intervalo",
+            parent=self.root)
+        if not query:
+            return
+        try:
+            resultados = self.workspace.search(query)
+        except ValueError as e:
+            messagebox.showerror("Búsqueda inválida", str(e))
+            return
+        self._show_workspace_results("Find pitch classes in workspace", resultados)
+
+
+    ## ------------------------------
+    ## Function: _show_workspace_results
+    ## Description: Lista resultados (namespace, índice, voicing) del workspace;
+    ##              los de la librería en edición se seleccionan en el tree.
+    ## ------------------------------
+    def _show_workspace_results(self, titulo, resultados):
+        if not resultados:
+            messagebox.showinfo(titulo, "Ningún voicing encontrado (solo se buscan los archivos cargados).")
+            return
+
+        children = self.tree.get_children()
+        items = [children[i] for ns, i, _ in resultados if ns == WORKING_NAMESPACE and i < len(children)]
+        self.tree.selection_set(items)
+        if items:
+            self.tree.see(items[0])
+            self.tree.focus(items[0])
+
+        lineas = [f"{qualified_name(ns, v)}:  {', '.join(v.get('notes', []))}" for ns, _, v in resultados[:30]]
+        if len(resultados) > 30:
+            lineas.append(f"... y {len(resultados) - 30} más")
+        messagebox.showinfo(titulo, f"{len(resultados)} voicings encontrados:\n\n" + "\n".join(lineas))
 
 
     ## ------------------------------
@@ -782,6 +1577,8 @@ class VoicingBuilderGUI:
     ## Description: Guarda los voicings actuales en otro archivo JSON.
     ## ------------------------------
     def save_voicings_as_other_file(self):
+        if self._editing_locked():
+            return
         # Ruta absoluta a la carpeta 'data' dentro de 'storage_engine'
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         data_dir = os.path.join(base_dir, "storage_engine", "data")
@@ -790,21 +1587,42 @@ class VoicingBuilderGUI:
             initialdir=data_dir,
             title="Guardar archivo JSON como",
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json")]
+            filetypes=[("JSON Files", "*.json"), ("Manifest", "*.vman"), ("Binary Library", "*.vbin"), ("SQLite Library", "*.sqlite *.db")]
         )
         if not ruta:
             return
 
-        # Guardar en el archivo seleccionado
-        import json
-        data = {"voicings": self.voicings}
-        with open(ruta, "w") as f:
-            json.dump(data, f, indent=4)
-
-        messagebox.showinfo("Guardado", f"Voicings guardados en '{ruta}'.")
+        # Guardar en el archivo seleccionado (escritura atómica, en segundo plano
+        # sobre una copia: la GUI puede seguir editando)
+        copia = [dict(v, notes=list(v.get("notes", []))) for v in self.voicings]
+        # con el token vigente: Cancel lo cambia y "Guardado" ya no se muestra
+        token = self._load_token
+        cancelado = self._cancel_event
+
+        def lotes():
+            # Cancel a mitad de la escritura: la excepción aborta la escritura
+            # atómica y el archivo destino queda como estaba
+            for i in range(0, len(copia), STREAM_BATCH):
+                if cancelado.is_set():
+                    raise InterruptedError("Guardado cancelado")
+                yield copia[i:i + STREAM_BATCH]
+
+        def trabajo():
+            if cancelado.is_set():
+                return None
+            if is_sqlite_library(ruta):
+                # SQLite se escribe por lotes en transacciones separadas: se
+                # guarda entero o nada
+                return save_voicings_as_other_file(copia, ruta)
+            return save_voicings_stream(lotes(), ruta)
+
+        def guardado(_):
+            messagebox.showinfo("Guardado", f"Voicings guardados en '{ruta}'.")
+            # agregar a recientes
+            self.add_recent_file(ruta)
 
-        # agregar a recientes
-        self.add_recent_file(ruta)
+        self._run_io(f"Guardando {os.path.basename(ruta)}...", token, trabajo, guardado,
+                     lambda e: messagebox.showerror("Error", f"Error al guardar el archivo:\n{e}"))
 
 
     ## ------------------------------
@@ -812,9 +1630,39 @@ class VoicingBuilderGUI:
     ## Description: Cierra la aplicación.
     ## ------------------------------
     def quit(self):
+        self._cancel_io()
+        self._shutdown(wait=True)
         self.root.quit()
 
 
+    ## ------------------------------
+    ## Function: _on_destroy
+    ## Description: La ventana se destruyó (p. ej. Toplevel cerrado desde
+    ##              main.py): se cortan los ciclos de after y los pools.
+    ## ------------------------------
+    def _on_destroy(self, event):
+        # <Destroy> llega también por cada widget hijo
+        if event.widget is not self.root or self._destroyed:
+            return
+        self._shutdown(wait=False)
+
+
+    def _shutdown(self, wait):
+        self._destroyed = True
+        self._cancel_event.set()
+        self._load_token += 1
+        for after_id in (self._poll_io_id, self._poll_watcher_id):
+            if after_id is not None:
+                try:
+                    self.root.after_cancel(after_id)
+                except tk.TclError:
+                    pass
+        self._poll_io_id = self._poll_watcher_id = None
+        self._preload_pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=wait, cancel_futures=not wait)
+        flush_pending_saves()
+
+
     ## ------------------------------
     ## Function: _get_data_dir
     ## Description: Ruta absoluta al folder storage_engine/data
@@ -851,9 +1699,7 @@ class VoicingBuilderGUI:
         data_dir = self._get_data_dir()
         os.makedirs(data_dir, exist_ok=True)
         path = os.path.join(data_dir, "recent_files.json")
-        with open(path, "w", encoding="utf-8") as f:
-            import json
-            json.dump({"recent": self.recent_files}, f, indent=4)
+        atomic_write_json(path, {"recent": self.recent_files})
 
 
     ## ------------------------------
@@ -905,20 +1751,9 @@ class VoicingBuilderGUI:
     def load_recent_file(self, path):
         """Carga un archivo reciente y lo aplica (similar a load_other_json pero sin dialog)."""
         try:
-            import json
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            voicings = data.get("voicings", [])
-
-            save_voicings(voicings)
-
-            self.voicings = voicings
-            self.update_tree()
+            self.open_voicings_file(path)
 
             # messagebox.showinfo("Loaded", f"Loaded voicings from '{path}'.")
-
-            # actualizar lista de recientes
-            self.add_recent_file(path)
         except Exception as e:
             messagebox.showerror("Error", f"Error loading file:\n{e}")
 
@@ -930,4 +1765,36 @@ class VoicingBuilderGUI:
     def clear_recent_files(self):
         self.recent_files = []
         self.save_recent_files()
-        self.update_recent_menu()
\ No newline at end of file
+        self.update_recent_menu()
+
+
+    ## ------------------------------
+    ## Function: load_workspace_files
+    ## Description: Carga las rutas del workspace guardadas en workspace.json.
+    ## \return: (rutas, rutas marcadas Keep Loaded)
+    ## ------------------------------
+    def load_workspace_files(self):
+        path = os.path.join(self._get_data_dir(), "workspace.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                import json
+                data = json.load(f)
+                if not isinstance(data, dict):
+                    return [], set()
+                return data.get("files", []), set(data.get("pinned", []))
+        except Exception:
+            return [], set()
+
+
+    ## ------------------------------
+    ## Function: save_workspace_files
+    ## Description: Guarda las rutas de los archivos del workspace en workspace.json.
+    ## ------------------------------
+    def save_workspace_files(self):
+        data_dir = self._get_data_dir()
+        os.makedirs(data_dir, exist_ok=True)
+        archivos = [ns for ns in self.workspace.namespaces() if self.workspace.path(ns) is not None]
+        atomic_write_json(os.path.join(data_dir, "workspace.json"), {
+            "files": [self.workspace.path(ns) for ns in archivos],
+            "pinned": [self.workspace.path(ns) for ns in archivos if self.workspace.is_pinned(ns)],
+        })
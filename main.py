@@ -2,6 +2,7 @@ import tkinter as tk
 from midi_engine.midi_setup import iniciar_sistema_midi
 from gui.voicing_builder_gui import VoicingBuilderGUI
 from gui.pattern_builder_gui import RhythmBuilderGUI
+from storage_engine.saver import flush_pending_saves
 
 
 ## -----------------------------
@@ -82,6 +83,9 @@ def main():
 
     root.mainloop()
 
+    # escribir guardados diferidos pendientes antes de salir
+    flush_pending_saves()
+
 
 ## -----------------------------
 ## Main execution
@@ -0,0 +1,295 @@
+## ======================================================
+## File: midi_engine/chord_names.py
+## ======================================================
+"""
+Reconocimiento de acordes: a partir de las clases de altura de un voicing y
+su root, el nombre que usa la librería ("m6", "dim7", "m6 1Inv", ...).
+
+Todo sale de tablas de 4096 máscaras x 12 roots armadas una vez al importar:
+
+    CANDIDATOS[mascara]   [(puntaje, root, calidad)] de mejor a peor
+    POSIBLE[mascara, root, calidad]  True si ese acorde coincide
+    MEJOR[mascara, root]  índice en CALIDADES del mejor acorde (-1 = ninguno)
+    MEJOR_ROOT[mascara, bajo]  root más probable si el voicing no tiene root
+    POSICION[calidad, intervalo]  orden de esa nota dentro del acorde (-1 = no
+                                  es nota del acorde), para calcular la inversión
+
+Un acorde coincide si las clases de altura son exactamente las suyas, o las
+suyas sin la quinta justa (puntaje peor). Menor puntaje = más común.
+Con arrays de máscaras/roots/bajos, etiquetar una librería entera es solo
+indexar estas tablas (ver etiquetar_masivo).
+"""
+import re
+
+import numpy as np
+
+try:
+    from .pitch_sets import CLASE_DE_NOTA, mascara_de_midi, rotar
+except ImportError:
+    from pitch_sets import CLASE_DE_NOTA, mascara_de_midi, rotar
+
+## --------------------------------------------------------------------------------------------------------------------
+##                                           GLOBAL VARIABLES
+## --------------------------------------------------------------------------------------------------------------------
+
+## -----------------------------
+## Variable: CALIDADES
+## Description: (símbolo, intervalos desde la root) en orden de preferencia.
+## -----------------------------
+CALIDADES = (
+    ("maj", (0, 4, 7)),
+    ("m", (0, 3, 7)),
+    ("7", (0, 4, 7, 10)),
+    ("m7", (0, 3, 7, 10)),
+    ("maj7", (0, 4, 7, 11)),
+    ("m6", (0, 3, 7, 9)),
+    ("6", (0, 4, 7, 9)),
+    ("m7b5", (0, 3, 6, 10)),
+    ("dim7", (0, 3, 6, 9)),
+    ("dim", (0, 3, 6)),
+    ("aug", (0, 4, 8)),
+    ("sus4", (0, 5, 7)),
+    ("sus2", (0, 2, 7)),
+    ("7sus4", (0, 5, 7, 10)),
+    ("mMaj7", (0, 3, 7, 11)),
+    ("aug7", (0, 4, 8, 10)),
+    ("maj7#5", (0, 4, 8, 11)),
+    ("7b5", (0, 4, 6, 10)),
+    ("add9", (0, 2, 4, 7)),
+    ("madd9", (0, 2, 3, 7)),
+    ("6/9", (0, 2, 4, 7, 9)),
+    ("m6/9", (0, 2, 3, 7, 9)),
+    ("9", (0, 2, 4, 7, 10)),
+    ("m9", (0, 2, 3, 7, 10)),
+    ("maj9", (0, 2, 4, 7, 11)),
+    ("7b9", (0, 1, 4, 7, 10)),
+    ("7#9", (0, 3, 4, 7, 10)),
+    ("7#11", (0, 4, 6, 7, 10)),
+    ("maj7#11", (0, 4, 6, 7, 11)),
+    ("m11", (0, 2, 3, 5, 7, 10)),
+    ("11", (0, 2, 4, 5, 7, 10)),
+    ("13", (0, 2, 4, 7, 9, 10)),
+    ("5", (0, 7)),
+)
+
+SIMBOLOS = tuple(s for s, _ in CALIDADES)
+
+# otras formas de escribir la misma calidad -> símbolo de CALIDADES. Se busca
+# primero tal cual ("M7" no es "m7") y si no, sin mayúsculas ("Dim7" -> "dim7").
+ALIAS = {
+    "M": "maj", "M7": "maj7", "M6": "6", "M9": "maj9", "major": "maj",
+    "min": "m", "minor": "m", "-": "m", "min7": "m7", "-7": "m7", "min6": "m6", "-6": "m6",
+    "ma7": "maj7", "Δ7": "maj7", "Δ": "maj7", "ø": "m7b5", "ø7": "m7b5",
+    "°7": "dim7", "o7": "dim7", "°": "dim", "o": "dim", "+": "aug", "+7": "aug7", "sus": "sus4",
+}
+_SIN_MAYUSCULAS = {s.lower(): s for s, _ in CALIDADES}
+
+PUNTAJE_SIN_QUINTA = 100
+
+_INVERSION = re.compile(r"^(\d+)\s*inv$", re.IGNORECASE)
+_SIMBOLO = re.compile(r"^([A-G][#b]?)([^/\s]*)(?:/\S*)?$")
+
+
+def _armar_tablas():
+    candidatos = [[] for _ in range(4096)]
+    posible = np.zeros((4096, 12, len(CALIDADES)), dtype=bool)
+    posicion = np.full((len(CALIDADES), 12), -1, dtype=np.int8)
+
+    for q, (_, intervalos) in enumerate(CALIDADES):
+        for k, iv in enumerate(intervalos):
+            posicion[q, iv] = k
+        base = sum(1 << iv for iv in intervalos)
+        variantes = [(base, q)]
+        if 7 in intervalos and len(intervalos) > 3:
+            variantes.append((base & ~(1 << 7), PUNTAJE_SIN_QUINTA + q))
+        for mascara, puntaje in variantes:
+            for root in range(12):
+                candidatos[rotar(mascara, root)].append((puntaje, root, q))
+                posible[rotar(mascara, root), root, q] = True
+
+    mejor = np.full((4096, 12), -1, dtype=np.int16)
+    mejor_root = np.full((4096, 12), -1, dtype=np.int8)
+    for mascara, lista in enumerate(candidatos):
+        lista.sort()
+        for puntaje, root, q in reversed(lista):
+            mejor[mascara, root] = q
+        # sin root conocida: el mejor puntaje, y a igual puntaje la root en el bajo
+        for bajo in range(12):
+            if lista:
+                _, r, _ = min(lista, key=lambda c: (c[0], c[1] != bajo))
+                mejor_root[mascara, bajo] = r
+    return candidatos, posible, mejor, mejor_root, posicion
+
+
+CANDIDATOS, POSIBLE, MEJOR, MEJOR_ROOT, POSICION = _armar_tablas()
+
+
+## --------------------------------------------------------------------------------------------------------------------
+##                                            FUNCTIONS
+## --------------------------------------------------------------------------------------------------------------------
+
+def clase_de_root(root):
+    """Clase de altura de una root como "C3" o "Eb" (None si no es válida)."""
+    if not root:
+        return None
+    return CLASE_DE_NOTA.get(root.rstrip("0123456789-"))
+
+
+def nombre_con_inversion(calidad, inversion):
+    """Nombre con la convención de la librería: "m6", "m6 1Inv", ..."""
+    if calidad < 0:
+        return None
+    simbolo = SIMBOLOS[calidad]
+    return f"{simbolo} {inversion}Inv" if inversion > 0 else simbolo
+
+
+## -----------------------------
+## Function: reconocer
+## Description: Mejor acorde para un voicing.
+## \param mascara: clases de altura (12 bits).
+## \param root: clase de altura de la root, o None para deducirla.
+## \param bajo: clase de altura de la nota más grave (para la inversión).
+## \return: (root, índice en CALIDADES, inversión) o None si no hay acorde.
+## -----------------------------
+def reconocer(mascara, root=None, bajo=None):
+    if root is None:
+        root = int(MEJOR_ROOT[mascara, bajo if bajo is not None else 0])
+        if root < 0:
+            return None
+    calidad = int(MEJOR[mascara, root])
+    if calidad < 0:
+        return None
+    inversion = 0
+    if bajo is not None:
+        inversion = max(0, int(POSICION[calidad, (bajo - root) % 12]))
+    return root, calidad, inversion
+
+
+## -----------------------------
+## Function: candidatos
+## Description: Todos los acordes posibles de una máscara, de mejor a peor.
+## \param root: si se indica, solo los que tienen esa root.
+## \return: lista de (root, símbolo)
+## -----------------------------
+def candidatos(mascara, root=None):
+    return [(r, SIMBOLOS[q]) for _, r, q in CANDIDATOS[mascara] if root is None or r == root]
+
+
+## -----------------------------
+## Function: sugerir_nombre
+## Description: Nombre sugerido para un voicing (VoicingRecord o lista de
+##              nombres de nota), p. ej. "m6 1Inv". None si no se reconoce.
+## -----------------------------
+def sugerir_nombre(notas, root=None):
+    midi = getattr(notas, "midi", None)
+    if midi is None:
+        try:
+            from .notes_db import BD_Notas_Midi
+        except ImportError:
+            from notes_db import BD_Notas_Midi
+        midi = [BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi]
+    if not midi:
+        return None
+    resultado = reconocer(mascara_de_midi(midi), clase_de_root(root), min(midi) % 12)
+    if resultado is None:
+        return None
+    return nombre_con_inversion(resultado[1], resultado[2])
+
+
+## -----------------------------
+## Function: calidad_de_nombre
+## Description: Separa un nombre de la librería ("Dim7 3Inv", "m6 2") en
+##              (índice de calidad o -1, inversión o None).
+##              La inversión es None si el nombre tiene otros agregados
+##              ("m6 1Inv Drop2"): ahí "1Inv" es la del voicing cerrado del
+##              que se partió, no se puede comparar con el bajo.
+## -----------------------------
+def calidad_de_nombre(nombre):
+    partes = nombre.split()
+    if not partes:
+        return -1, None
+    simbolo = partes[0]
+    if simbolo not in SIMBOLOS:
+        simbolo = ALIAS.get(simbolo) or _SIN_MAYUSCULAS.get(simbolo.lower(), simbolo)
+    calidad = SIMBOLOS.index(simbolo) if simbolo in SIMBOLOS else -1
+    inversion = 0
+    for p in partes[1:]:
+        m = _INVERSION.match(p)
+        if m:
+            inversion = int(m.group(1))
+        elif not p.isdigit():  # "m6 2": solo numeración
+            return calidad, None
+    return calidad, inversion
+
+
+## -----------------------------
+## Function: parsear_acorde
+## Description: Símbolo de acorde de una progresión ("Cm6", "F#7", "Bb",
+##              "Ebmaj7/G"; lo que sigue a "/" se ignora).
+## \return: (clase de la root, índice en CALIDADES), o ValueError.
+## -----------------------------
+def parsear_acorde(simbolo):
+    m = _SIMBOLO.match(simbolo.strip())
+    if not m:
+        raise ValueError(f"Acorde no válido: '{simbolo}'")
+    root = CLASE_DE_NOTA[m.group(1)]
+    calidad = m.group(2) or "maj"
+    if calidad not in SIMBOLOS:
+        calidad = ALIAS.get(calidad) or _SIN_MAYUSCULAS.get(calidad.lower(), calidad)
+    if calidad not in SIMBOLOS:
+        raise ValueError(f"Calidad de acorde desconocida: '{simbolo}'")
+    return root, SIMBOLOS.index(calidad)
+
+
+## -----------------------------
+## Function: etiquetar_masivo
+## Description: Reconoce muchos voicings a la vez (solo indexado de tablas).
+## \param mascaras: array de máscaras.
+## \param roots: array de clases de root (-1 = desconocida).
+## \param bajos: array de clases de la nota más grave.
+## \return: (roots, calidades, inversiones) como arrays; calidad -1 = sin acorde.
+## -----------------------------
+def etiquetar_masivo(mascaras, roots, bajos):
+    mascaras = np.asarray(mascaras, dtype=np.int64)
+    bajos = np.asarray(bajos, dtype=np.int64)
+    roots = np.asarray(roots, dtype=np.int64)
+    roots = np.where(roots < 0, MEJOR_ROOT[mascaras, bajos], roots)
+    calidades = np.where(roots < 0, -1, MEJOR[mascaras, roots % 12])
+    inversiones = np.where(calidades < 0, 0,
+                           POSICION[np.maximum(calidades, 0), (bajos - roots) % 12])
+    return roots, calidades, np.maximum(inversiones, 0)
+
+
+## -----------------------------
+## Function: verificar_nombres
+## Description: Voicings cuyo nombre no coincide con sus notas: la calidad
+##              del nombre no es un acorde posible con esa root, o la
+##              inversión del nombre no coincide con la nota del bajo.
+## \param voicings: lista de VoicingRecord.
+## \return: [(índice, nombre, nombre sugerido o None)]
+## -----------------------------
+def verificar_nombres(voicings):
+    filas = [(i, v.pc_mask, v.midi_sorted[0], v.get("root"), v.get("name", ""))
+             for i, v in enumerate(voicings) if getattr(v, "valid", False)]
+    if not filas:
+        return []
+    validos, mascaras, bajos, roots_str, nombres = zip(*filas)
+    mascaras = np.array(mascaras, dtype=np.int64)
+    bajos = np.array(bajos, dtype=np.int64) % 12
+
+    # roots y nombres se repiten mucho ("C3", "m6", "dim7 1Inv"): se parsea cada uno una vez
+    cache_root = {r: clase_de_root(r) for r in set(roots_str)}
+    roots = np.array([-1 if cache_root[r] is None else cache_root[r] for r in roots_str], dtype=np.int64)
+    parseados = {x: calidad_de_nombre(x) for x in set(nombres)}
+    cal_nombre = np.array([parseados[x][0] for x in nombres], dtype=np.int64)
+    inv_nombre = np.array([-1 if parseados[x][1] is None else parseados[x][1] for x in nombres], dtype=np.int64)
+
+    roots, calidades, inversiones = etiquetar_masivo(mascaras, roots, bajos)
+
+    q = np.maximum(cal_nombre, 0)
+    r = roots % 12
+    ok = (cal_nombre >= 0) & (roots >= 0) & POSIBLE[mascaras, r, q]
+    ok &= (inv_nombre < 0) | (np.maximum(POSICION[q, (bajos - r) % 12], 0) == inv_nombre)
+
+    return [(validos[k], nombres[k], nombre_con_inversion(int(calidades[k]), int(inversiones[k])))
+            for k in np.nonzero(~ok)[0]]
@@ -25,19 +25,35 @@ holding_flags = {}   # estado por hotkey → True/False
 ##                                            FUNCTIONS
 ## --------------------------------------------------------------------------------------------------------------------
 
+## -----------------------------
+## Function: _midi_de
+## Description: Números MIDI de `notas`, que puede ser una lista de nombres
+##              (["C4", "E4"]) o un voicing normalizado (VoicingRecord de
+##              storage_engine), cuyos datos MIDI ya están calculados.
+## \param ordenadas: True para obtenerlas de grave a agudo.
+## -----------------------------
+def _midi_de(notas, ordenadas=False):
+    if hasattr(notas, "midi_sorted"):
+        return notas.midi_sorted if ordenadas else notas.midi
+    midi_nums = [BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi]
+    if ordenadas:
+        midi_nums.sort()
+    return midi_nums
+
+
 ## -----------------------------
 ## Function: reproducir_acorde
 ##
 ## Description: Reproduce un acorde dado una lista de notas y duracion.
 ##
 ## \param player: Objeto del reproductor MIDI.
-## \param notas: Lista de notas (ej. ["C4", "E4", "G4"]).
+## \param notas: Lista de notas (ej. ["C4", "E4", "G4"]) o VoicingRecord.
 ## \param duracion: Duraciรณn en segundos.
 ##
 ## \return: None
 ## -----------------------------
 def reproducir_acorde(player, notas, duracion):
-    midi_nums = [BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi]
+    midi_nums = _midi_de(notas)
     for m in midi_nums:
         player.note_on(m, 127)
     time.sleep(duracion)
@@ -51,7 +67,7 @@ def reproducir_acorde(player, notas, duracion):
 ## Description: Reproduce un acorde en un hilo independiente.
 ##
 ## \param player: Objeto del reproductor MIDI.
-## \param notas: Lista de notas (ej. ["C4", "E4", "G4"]).
+## \param notas: Lista de notas (ej. ["C4", "E4", "G4"]) o VoicingRecord.
 ## \param duracion: Duracion en segundos.
 ##
 ## \return: None
@@ -95,7 +111,7 @@ def apagar_todas_las_notas(player):
 ## -----------------------------
 def reproducir_notas_secuenciales(player, notas, duracion):
     # Convertir notas a números MIDI
-    midi_nums = [BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi]
+    midi_nums = _midi_de(notas)
 
     for m in midi_nums:
         player.note_on(m, 120)
@@ -132,11 +148,8 @@ def reproducir_notas_secuenciales_threaded(player, notas, duracion):
 ## \param duracion: duración de cada nota
 ## -----------------------------
 def reproducir_notas_ordenadas(player, notas, duracion):
-    # Convertir notas a números MIDI válidos
-    midi_nums = [BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi]
-
-    # Ordenar por gravedad (menor = más grave)
-    midi_nums.sort()
+    # Convertir notas a números MIDI válidos, ordenadas por gravedad (menor = más grave)
+    midi_nums = _midi_de(notas, ordenadas=True)
 
     # Reproducir secuencialmente
     for m in midi_nums:
@@ -162,16 +175,46 @@ def reproducir_notas_ordenadas_threaded(player, notas, duracion):
     ).start()
 
 
+## -----------------------------
+## Function: reproducir_progresion
+## Description: Reproduce una lista de acordes uno detrás de otro.
+##
+## \param player: reproductor MIDI
+## \param acordes: lista de voicings (listas de notas, VoicingRecord o
+##                 dicts con "notes")
+## \param duracion: duración de cada acorde en segundos
+## -----------------------------
+def reproducir_progresion(player, acordes, duracion):
+    for acorde in acordes:
+        if isinstance(acorde, dict) and not hasattr(acorde, "midi"):
+            acorde = acorde.get("notes", [])
+        reproducir_acorde(player, acorde, duracion)
+
+
+## -----------------------------
+## Function: reproducir_progresion_threaded
+## Description: Versión con hilo independiente.
+## -----------------------------
+def reproducir_progresion_threaded(player, acordes, duracion):
+    apagar_todas_las_notas(player)
+
+    threading.Thread(
+        target=reproducir_progresion,
+        args=(player, acordes, duracion),
+        daemon=True
+    ).start()
+
+
 ## -----------------------------
 ## Function: reproducir_acorde_mientras
 ## Description: Reproduce un acorde mientras se mantenga presionada una hotkey.
 ##
 ## \param player: Objeto del reproductor MIDI.
-## \param notas: Lista de notas (ej. ["C4", "E4", "G4"]).
+## \param notas: Lista de notas (ej. ["C4", "E4", "G4"]) o VoicingRecord.
 ## \param hotkey: Identificador único para la hotkey.
 ## -----------------------------
 def reproducir_acorde_mientras(player, notas, hotkey):
-    midi_nums = [BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi]
+    midi_nums = _midi_de(notas)
 
     # Marcar que esta hotkey está activa
     holding_flags[hotkey] = True
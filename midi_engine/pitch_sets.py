@@ -0,0 +1,112 @@
+## ======================================================
+## File: midi_engine/pitch_sets.py
+## ======================================================
+"""
+Conjuntos de clases de altura como máscaras de 12 bits (bit 0 = C,
+bit 1 = C#/Db, ..., bit 11 = B).
+
+Tablas precalculadas (arrays NumPy de 4096 entradas, indexadas por máscara):
+
+    FORMA_T[m]        menor rotación de m: igual para todas las transposiciones
+                      (el "tipo de acorde" sin importar la fundamental)
+    FORMA_PRIMA[m]    menor entre FORMA_T de m y de su inversión (T/I)
+    CARDINAL[m]       cantidad de clases de altura
+    VECTOR_INTERVALOS[m, ic - 1]  cantidad de intervalos de la clase ic (1..6)
+"""
+import numpy as np
+
+CLASES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+CLASES_BEMOL = ("C", "Db", "D", "Eb", "E", "F", "Gb", "G", "Ab", "A", "Bb", "B")
+
+# nombre de nota (sin octava) -> clase de altura
+CLASE_DE_NOTA = {
+    "C": 0, "B#": 0, "C#": 1, "Db": 1, "D": 2, "D#": 3, "Eb": 3,
+    "E": 4, "Fb": 4, "E#": 5, "F": 5, "F#": 6, "Gb": 6, "G": 7,
+    "G#": 8, "Ab": 8, "A": 9, "A#": 10, "Bb": 10, "B": 11, "Cb": 11,
+}
+
+TODAS = 0xFFF
+
+
+## -----------------------------
+## Function: mascara_de_midi
+## Description: Máscara de clases de altura de una secuencia de notas MIDI.
+## -----------------------------
+def mascara_de_midi(midi_nums):
+    mascara = 0
+    for m in midi_nums:
+        mascara |= 1 << (m % 12)
+    return mascara
+
+
+## -----------------------------
+## Function: mascara_de_nombres
+## Description: Máscara a partir de nombres con o sin octava ("C", "Eb4").
+## \return: máscara, o ValueError si algún nombre no es válido.
+## -----------------------------
+def mascara_de_nombres(nombres):
+    mascara = 0
+    for n in nombres:
+        base = n.rstrip("0123456789-")
+        if base not in CLASE_DE_NOTA:
+            raise ValueError(f"Nota no válida: '{n}'")
+        mascara |= 1 << CLASE_DE_NOTA[base]
+    return mascara
+
+
+def rotar(mascara, k):
+    """Transpone la máscara k semitonos hacia arriba."""
+    k %= 12
+    return ((mascara << k) | (mascara >> (12 - k))) & TODAS
+
+
+def invertir(mascara):
+    """Inversión alrededor de C (clase p -> -p)."""
+    resultado = 0
+    for p in range(12):
+        if mascara >> p & 1:
+            resultado |= 1 << (-p % 12)
+    return resultado
+
+
+## -----------------------------
+## Function: nota_de_midi
+## Description: Nombre con octava de un número MIDI (60 -> "C4"), con la
+##              misma convención que BD_Notas_Midi.
+## \param bemoles: True para "Eb4" en vez de "D#4".
+## -----------------------------
+def nota_de_midi(m, bemoles=False):
+    clases = CLASES_BEMOL if bemoles else CLASES
+    return f"{clases[m % 12]}{m // 12 - 1}"
+
+
+def clases_de(mascara):
+    return [p for p in range(12) if mascara >> p & 1]
+
+
+def nombres_de(mascara):
+    return [CLASES[p] for p in clases_de(mascara)]
+
+
+def _tablas():
+    m = np.arange(4096, dtype=np.int64)
+    rot = np.stack([((m << k) | (m >> (12 - k))) & TODAS for k in range(12)])
+    forma_t = rot.min(axis=0)
+
+    bits = (m[:, None] >> np.arange(12)) & 1  # (4096, 12)
+    inv = (bits[:, (-np.arange(12)) % 12] << np.arange(12)).sum(axis=1)
+    forma_prima = np.minimum(forma_t, forma_t[inv])
+
+    cardinal = bits.sum(axis=1)
+
+    # vector de intervalos: para cada ic, pares (p, p + ic) presentes
+    vector = np.zeros((4096, 6), dtype=np.int64)
+    for ic in range(1, 7):
+        pares = bits & bits[:, (np.arange(12) + ic) % 12]
+        vector[:, ic - 1] = pares.sum(axis=1) // (2 if ic == 6 else 1)
+
+    return (forma_t.astype(np.uint16), forma_prima.astype(np.uint16),
+            cardinal.astype(np.uint8), vector.astype(np.uint8))
+
+
+FORMA_T, FORMA_PRIMA, CARDINAL, VECTOR_INTERVALOS = _tablas()
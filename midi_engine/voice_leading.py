@@ -0,0 +1,193 @@
+## ======================================================
+## File: midi_engine/voice_leading.py
+## ======================================================
+"""
+Conducción de voces: para una progresión ("Cm6 G7 Cm6 ...") elige de la
+librería un voicing por acorde minimizando el movimiento total de las voces.
+
+- candidatos: los voicings cuyas clases de altura forman el acorde con esa
+  root (ver chord_names.POSIBLE). Con transponer=True también sirven los de
+  la misma calidad en otra root, transpuestos lo menos posible (-5..+6
+  semitonos) para conservar su registro.
+- distancia entre dos voicings: suma de |a_i - b_i| entre sus notas
+  ordenadas de grave a aguda. Si tienen distinta cantidad de notas, el más
+  chico se completa repitiendo su nota aguda.
+- búsqueda: Viterbi (programación dinámica) acorde por acorde; la matriz
+  de distancias entre candidatos de dos acordes seguidos se calcula con
+  NumPy, por bloques para acotar la memoria.
+- agudas: opcionalmente, la nota aguda fija de cada acorde.
+"""
+import numpy as np
+
+try:
+    from .chord_names import POSIBLE, parsear_acorde
+    from .pitch_sets import nota_de_midi
+    from .notes_db import BD_Notas_Midi
+except ImportError:
+    from chord_names import POSIBLE, parsear_acorde
+    from pitch_sets import nota_de_midi
+    from notes_db import BD_Notas_Midi
+
+RANGO = (28, 96)  # E1..C7
+# elementos (int16) de la matriz de distancias que se calculan de una vez
+BLOQUE = 1 << 22
+
+
+def _rotar_array(mascaras, k):
+    return ((mascaras << k) | (mascaras >> (12 - k))) & 0xFFF
+
+
+class ConduccionDeVoces:
+    """Librería preparada para buscar conducciones (arrays NumPy).
+
+    `voicings` son dicts de la librería (si son VoicingRecord se usan sus
+    datos MIDI ya calculados)."""
+
+    def __init__(self, voicings):
+        self.voicings = voicings
+        validos, ordenadas = [], []
+        for i, v in enumerate(voicings):
+            midi = getattr(v, "midi_sorted", None)
+            if midi is None:
+                notas = v.get("notes", [])
+                midi = sorted(BD_Notas_Midi[n] for n in notas if n in BD_Notas_Midi)
+                if len(midi) != len(notas):
+                    continue
+            if midi:
+                validos.append(i)
+                ordenadas.append(midi)
+        self.indices = np.array(validos, dtype=np.int64)
+        self.ancho = max((len(m) for m in ordenadas), default=1)
+
+        self.mascaras = np.zeros(len(validos), dtype=np.int64)
+        # notas ordenadas, completadas repitiendo la aguda hasta `ancho`
+        self.midi = np.zeros((len(validos), self.ancho), dtype=np.int16)
+        for fila, notas in enumerate(ordenadas):
+            self.midi[fila, :len(notas)] = list(notas)
+            self.midi[fila, len(notas):] = notas[-1]
+        if len(validos):
+            bits = np.left_shift(1, self.midi % 12)
+            self.mascaras = np.bitwise_or.reduce(bits.astype(np.int64), axis=1)
+        self.graves = self.midi[:, 0] if len(validos) else np.zeros(0, dtype=np.int16)
+        self.agudas = self.midi[:, -1] if len(validos) else np.zeros(0, dtype=np.int16)
+
+    ## -----------------------------
+    ## Function: candidatos
+    ## Description: Voicings (y transposiciones) que sirven para un acorde.
+    ## \return: (matriz MIDI (k, ancho), filas de origen (k,), semitonos (k,))
+    ## -----------------------------
+    def candidatos(self, root, calidad, transponer=True, aguda=None, rango=RANGO):
+        filas, desplazamientos = [], []
+        for k in (range(12) if transponer else (0,)):
+            ok = POSIBLE[_rotar_array(self.mascaras, k), root, calidad]
+            if not ok.any():
+                continue
+            f = np.nonzero(ok)[0]
+            if aguda is None:
+                # la transposición más cercana (-5..+6): se conserva el registro del voicing
+                d = np.full(len(f), k if k <= 6 else k - 12, dtype=np.int16)
+            else:
+                # la octava que deja la nota aguda donde se pidió (si existe)
+                d = (aguda - self.agudas[f]).astype(np.int16)
+                f, d = f[d % 12 == k], d[d % 12 == k]
+            dentro = (self.graves[f] + d >= rango[0]) & (self.agudas[f] + d <= rango[1])
+            if dentro.any():
+                filas.append(f[dentro])
+                desplazamientos.append(d[dentro])
+        if not filas:
+            return np.zeros((0, self.ancho), dtype=np.int16), np.zeros(0, np.int64), np.zeros(0, np.int16)
+
+        filas = np.concatenate(filas)
+        desplazamientos = np.concatenate(desplazamientos)
+        midi = self.midi[filas] + desplazamientos[:, None]
+        # el mismo resultado desde dos voicings iguales se cuenta una vez
+        _, unicos = np.unique(midi, axis=0, return_index=True)
+        unicos.sort()
+        return midi[unicos], filas[unicos], desplazamientos[unicos]
+
+    ## -----------------------------
+    ## Function: optimizar
+    ## Description: Mejor voicing para cada acorde de la progresión.
+    ## \param progresion: lista de símbolos (["Cm6", "G7"]) o texto separado por espacios.
+    ## \param agudas: lista (mismo largo) de notas agudas fijas: MIDI, nombre
+    ##                ("G4") o None para dejarla libre.
+    ## \param cancelado: threading.Event opcional para abortar.
+    ## \return: (lista de voicings {"name", "root", "notes"}, movimiento total
+    ##          en semitonos), o (None, None) si se canceló.
+    ## -----------------------------
+    def optimizar(self, progresion, agudas=None, transponer=True, cancelado=None):
+        if isinstance(progresion, str):
+            progresion = progresion.split()
+        if not progresion:
+            return [], 0
+        acordes = [parsear_acorde(s) for s in progresion]
+        agudas = _agudas_midi(agudas, len(acordes))
+
+        cands = []
+        for simbolo, (root, calidad), aguda in zip(progresion, acordes, agudas):
+            c = self.candidatos(root, calidad, transponer, aguda)
+            if not len(c[0]):
+                raise ValueError(f"No hay voicings en la librería para '{simbolo}'")
+            cands.append(c)
+
+        # Viterbi: costo[b] = mínimo movimiento acumulado terminando en el candidato b
+        costo = np.zeros(len(cands[0][0]), dtype=np.int64)
+        previos = []
+        for (a, _, _), (b, _, _) in zip(cands, cands[1:]):
+            if cancelado is not None and cancelado.is_set():
+                return None, None
+            nuevo = np.empty(len(b), dtype=np.int64)
+            previo = np.empty(len(b), dtype=np.int64)
+            paso = max(1, BLOQUE // (len(a) * self.ancho))
+            a32 = a.astype(np.int32)
+            for j in range(0, len(b), paso):
+                d = np.abs(a32[:, None, :] - b[None, j:j + paso, :]).sum(axis=2)
+                total = costo[:, None] + d
+                previo[j:j + paso] = total.argmin(axis=0)
+                nuevo[j:j + paso] = total[previo[j:j + paso], np.arange(total.shape[1])]
+            costo = nuevo
+            previos.append(previo)
+
+        # reconstruir el camino de atrás para adelante
+        elegido = int(costo.argmin())
+        total = int(costo[elegido])
+        camino = [elegido]
+        for previo in reversed(previos):
+            elegido = int(previo[elegido])
+            camino.append(elegido)
+        camino.reverse()
+
+        return [self._resultado(s, c, k) for s, c, k in zip(progresion, cands, camino)], total
+
+    def _resultado(self, simbolo, cands, k):
+        _, filas, desplazamientos = cands
+        origen = self.voicings[self.indices[filas[k]]]
+        d = int(desplazamientos[k])
+        resultado = {"name": f"{simbolo} ({origen.get('name', '')})"}
+        if d == 0:
+            resultado["root"] = origen.get("root", simbolo)
+            resultado["notes"] = list(origen["notes"])
+        else:
+            # transpuesto: se pierde la ortografía original (D# / Eb)
+            root_midi = BD_Notas_Midi.get(origen.get("root"))
+            resultado["root"] = nota_de_midi(root_midi + d) if root_midi is not None else simbolo
+            resultado["notes"] = [nota_de_midi(BD_Notas_Midi[n] + d) for n in origen["notes"]]
+        return resultado
+
+
+def _agudas_midi(agudas, n):
+    if agudas is None:
+        return [None] * n
+    if len(agudas) != n:
+        raise ValueError("Tiene que haber una nota aguda (o None) por acorde")
+    resultado = []
+    for a in agudas:
+        if a is None or a in ("", "-"):
+            resultado.append(None)
+        elif isinstance(a, str):
+            if a not in BD_Notas_Midi:
+                raise ValueError(f"Nota no válida: '{a}'")
+            resultado.append(BD_Notas_Midi[a])
+        else:
+            resultado.append(int(a))
+    return resultado
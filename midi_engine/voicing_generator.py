@@ -0,0 +1,205 @@
+## ======================================================
+## File: midi_engine/voicing_generator.py
+## ======================================================
+"""
+Generador de variantes: a partir de voicings cerrados (en estado
+fundamental) arma sus inversiones, drop-2, drop-3, drop-2-4 y las 12
+transposiciones, con la misma convención de nombres que las librerías
+incluidas ("m6", "m6 1Inv", "m6 1Inv Drop2", ...).
+
+- inversión k: las k notas más graves suben una octava.
+- drop-N: la N-ésima nota contando desde la aguda baja una octava. Las notas
+  se guardan en el orden del voicing cerrado (como voicingsDrop2_*.json).
+- transposición: -5..+6 semitonos (las 12 roots, lo más cerca posible del
+  registro original). La root se transpone con las notas; el nombre no cambia.
+- rango: se descartan las variantes con alguna nota fuera de `rango`.
+
+Todo se calcula con arrays NumPy (una matriz por cantidad de notas) y el
+resultado sale por lotes para guardarlo con save_voicings_stream en
+cualquier formato.
+
+Uso por línea de comandos:
+    python -m midi_engine.voicing_generator voicingsClose.json salida.sqlite
+    python -m midi_engine.voicing_generator entrada.json salida.json --drops Drop2 --no-transpose
+"""
+import sys
+import argparse
+
+import numpy as np
+
+try:
+    from .notes_db import BD_Notas_Midi
+    from .pitch_sets import nota_de_midi
+except ImportError:
+    from notes_db import BD_Notas_Midi
+    from pitch_sets import nota_de_midi
+
+## --------------------------------------------------------------------------------------------------------------------
+##                                           GLOBAL VARIABLES
+## --------------------------------------------------------------------------------------------------------------------
+RANGO = (36, 84)  # C2..C6
+TRANSPOSICIONES = tuple(range(-5, 7))
+
+## -----------------------------
+## Variable: DROPS
+## Description: nombre -> voces (contando desde la aguda) que bajan una octava.
+## -----------------------------
+DROPS = {
+    "Drop2": (2,),
+    "Drop3": (3,),
+    "Drop24": (2, 4),
+}
+
+LOTE = 5000
+# voicings de origen que se procesan juntos (ver generar_variantes)
+BLOQUE = 256
+
+
+## --------------------------------------------------------------------------------------------------------------------
+##                                            FUNCTIONS
+## --------------------------------------------------------------------------------------------------------------------
+
+## -----------------------------
+## Function: _variantes_de_grupo
+## Description: Variantes de voicings que tienen la misma cantidad de notas.
+## \param base: (m, n) MIDI ordenado de grave a agudo.
+## \return: lista de (matriz (m, n), sufijo del nombre, clave de orden)
+## -----------------------------
+def _variantes_de_grupo(base, inversiones, drops):
+    n = base.shape[1]
+    variantes = []
+    for k in range(n if inversiones else 1):
+        inv = np.concatenate([base[:, k:], base[:, :k] + 12], axis=1)
+        sufijo_inv = f" {k}Inv" if k else ""
+        variantes.append((inv, sufijo_inv, (k, 0)))
+        for d, (nombre, voces) in enumerate(drops, 1):
+            if max(voces) > n:
+                continue
+            # el voicing cerrado está ordenado: la voz v desde arriba es la columna n - v
+            drop = inv.copy()
+            for v in voces:
+                drop[:, n - v] -= 12
+            variantes.append((drop, f"{sufijo_inv} {nombre}", (k, d)))
+    return variantes
+
+
+## -----------------------------
+## Function: _filas_de_bloque
+## Description: Variantes de los voicings[inicio:fin], ya en el orden de
+##              salida (voicing de origen, inversión, drop, transposición).
+##              El orden se calcula con lexsort sobre las claves, sin ordenar
+##              filas en Python.
+## \return: generador de (notas MIDI, root MIDI, nombre)
+## -----------------------------
+def _filas_de_bloque(voicings, inicio, fin, inversiones, drops, desplazamientos, rango):
+    # agrupar por cantidad de notas (cada grupo es una matriz)
+    grupos = {}
+    for i in range(inicio, fin):
+        notas = voicings[i].get("notes", [])
+        midi = [BD_Notas_Midi.get(n) for n in notas]
+        if not midi or None in midi:
+            continue
+        root = BD_Notas_Midi.get(voicings[i].get("root"), min(midi))
+        grupos.setdefault(len(midi), []).append((i, sorted(midi), root))
+
+    segmentos = []  # (notas, roots, origen, sufijo) de cada (grupo, variante)
+    claves = []  # (origen, k, d, t, segmento, fila) por fila que entra en el rango
+    for n, items in grupos.items():
+        origen = np.array([i for i, _, _ in items], dtype=np.int64)
+        base = np.array([m for _, m, _ in items], dtype=np.int16)
+        roots = np.array([r for _, _, r in items], dtype=np.int16)
+
+        for matriz, sufijo, (k, d) in _variantes_de_grupo(base, inversiones, drops):
+            # (m, t, n): todas las transposiciones de una vez
+            todas = matriz[:, None, :] + desplazamientos[None, :, None]
+            ok = (todas.min(axis=2) >= rango[0]) & (todas.max(axis=2) <= rango[1])
+            filas, ts = np.nonzero(ok)
+            if not len(filas):
+                continue
+            seg = len(segmentos)
+            segmentos.append((todas[filas, ts].tolist(), (roots[filas] + desplazamientos[ts]).tolist(),
+                              origen[filas].tolist(), sufijo))
+            claves.append(np.stack([origen[filas], np.full(len(filas), k), np.full(len(filas), d), ts,
+                                    np.full(len(filas), seg), np.arange(len(filas))]))
+
+    if not claves:
+        return
+    claves = np.concatenate(claves, axis=1)
+    orden = np.lexsort(claves[3::-1])
+    for seg, fila in zip(claves[4, orden].tolist(), claves[5, orden].tolist()):
+        notas, roots, origenes, sufijo = segmentos[seg]
+        yield notas[fila], roots[fila], voicings[origenes[fila]].get("name", "(unnamed)") + sufijo
+
+
+## -----------------------------
+## Function: generar_variantes
+## Description: Genera las variantes de `voicings` por lotes. Se procesan
+##              BLOQUE voicings de origen por vez, así el primer lote sale
+##              sin haber armado todas las variantes.
+## \param voicings: voicings cerrados (dicts con name, root, notes).
+## \param inversiones: incluir las inversiones 1..n-1.
+## \param drops: nombres de DROPS a aplicar (a cada inversión).
+## \param transponer: incluir las 12 transposiciones.
+## \param rango: (MIDI mínimo, MIDI máximo) permitido.
+## \param bemoles: escribir las notas transpuestas con b en vez de #.
+## \return: generador de listas de voicings (dicts), en orden: voicing de
+##          origen, inversión, drop, transposición. Sin repetir (notas, root).
+## -----------------------------
+def generar_variantes(voicings, inversiones=True, drops=tuple(DROPS), transponer=True,
+                      rango=RANGO, bemoles=False, lote=LOTE):
+    drops = [(d, DROPS[d]) for d in drops]
+    desplazamientos = np.array(TRANSPOSICIONES if transponer else (0,), dtype=np.int16)
+    nombres_midi = [nota_de_midi(m, bemoles) for m in range(128)]
+
+    vistos = set()
+    salida = []
+    for inicio in range(0, len(voicings), BLOQUE):
+        fin = min(inicio + BLOQUE, len(voicings))
+        for midi, root, nombre in _filas_de_bloque(voicings, inicio, fin, inversiones, drops,
+                                                   desplazamientos, rango):
+            # mismas notas con otra root (C m6 / A m7b5 1Inv) es otro voicing
+            clave = (tuple(midi), root)
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            salida.append({"name": nombre, "root": nombres_midi[root],
+                           "notes": [nombres_midi[m] for m in midi]})
+            if len(salida) >= lote:
+                yield salida
+                salida = []
+    if salida:
+        yield salida
+
+
+def _main(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m midi_engine.voicing_generator",
+        description="Genera inversiones, drops y transposiciones de voicings cerrados.")
+    parser.add_argument("source", help="librería de voicings cerrados")
+    parser.add_argument("output", help="librería resultante (.json, .vman, .vbin, .sqlite)")
+    parser.add_argument("--no-inversions", action="store_true", help="no generar inversiones")
+    parser.add_argument("--drops", default=",".join(DROPS),
+                        help=f"drops separados por coma ({', '.join(DROPS)}; vacío = ninguno)")
+    parser.add_argument("--no-transpose", action="store_true", help="no generar transposiciones")
+    parser.add_argument("--range", nargs=2, type=int, default=RANGO, metavar=("LOW", "HIGH"),
+                        help="rango MIDI permitido")
+    parser.add_argument("--flats", action="store_true", help="escribir las notas con b")
+    args = parser.parse_args(argv)
+
+    drops = [d for d in args.drops.split(",") if d]
+    for d in drops:
+        if d not in DROPS:
+            parser.error(f"drop desconocido: {d}")
+
+    from storage_engine.voicing_storage import read_voicings_file, save_voicings_stream
+    voicings = read_voicings_file(args.source)
+    total = save_voicings_stream(
+        generar_variantes(voicings, not args.no_inversions, drops, not args.no_transpose,
+                          tuple(args.range), args.flats),
+        args.output)
+    print(f"{len(voicings)} voicings -> {total} variantes en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,221 @@
+## ======================================================
+## File: midi_engine/voicing_search.py
+## ======================================================
+"""
+Enumerador de voicings de un acorde con restricciones, p. ej. "todos los
+voicings de 4 notas de C7 entre C3 y C6, sin saltos de más de una quinta y
+con la séptima arriba":
+
+    EnumeradorVoicings("C7", 4, rango=("C3", "C6"), max_salto=7, aguda=10)
+
+Las notas se eligen de grave a aguda. El número de voicings que completan
+un estado parcial (última nota, notas que faltan, intervalos ya usados,
+dobles disponibles) se calcula con programación dinámica memoizada, igual
+que rhythm_engine/enumerator.py, lo que permite:
+    - contar sin enumerar,
+    - podar: una rama cuyo conteo es 0 no se recorre (además, antes de
+      recurrir se descartan las ramas a las que no les alcanzan las notas
+      para cubrir los intervalos obligatorios o que se salen del rango),
+    - obtener "el n-ésimo voicing" directamente,
+    - generar los voicings de forma perezosa, ya como dicts de la librería
+      ({"name", "root", "notes"}) listos para save_voicings.
+
+Los intervalos se indican en semitonos desde la root (0 = root, 4 = tercera
+mayor, 7 = quinta, 10 = séptima menor, ...).
+"""
+import random
+from functools import lru_cache
+
+try:
+    from .notes_db import BD_Notas_Midi
+    from .chord_names import CALIDADES, POSICION, parsear_acorde, nombre_con_inversion
+    from .pitch_sets import nota_de_midi
+except ImportError:
+    from notes_db import BD_Notas_Midi
+    from chord_names import CALIDADES, POSICION, parsear_acorde, nombre_con_inversion
+    from pitch_sets import nota_de_midi
+
+
+def _midi(nota):
+    if isinstance(nota, str):
+        if nota not in BD_Notas_Midi:
+            raise ValueError(f"Nota no válida: '{nota}'")
+        return BD_Notas_Midi[nota]
+    return int(nota)
+
+
+class EnumeradorVoicings:
+    """Enumera los voicings de `acorde` que cumplen las restricciones.
+
+    param acorde: símbolo ("C7", "Ebm6", ...).
+    param n_notas: cantidad de notas del voicing.
+    param rango: (nota más grave, nota más aguda) permitidas, MIDI o nombre.
+    param min_salto / max_salto: intervalo entre notas vecinas (semitonos).
+    param max_dobles: cuántas notas pueden repetir un intervalo ya usado.
+    param duplicables: intervalos que se pueden doblar (None = todos).
+    param omitibles: intervalos del acorde que pueden faltar (p. ej. (7,)).
+    param aguda: intervalo que tiene que quedar arriba (None = cualquiera).
+    param bajo: intervalo que tiene que quedar abajo (None = cualquiera).
+    param bemoles: escribir las notas con b en vez de #.
+    """
+
+    def __init__(self, acorde, n_notas=4, rango=("C3", "C6"), min_salto=1, max_salto=12,
+                 max_dobles=0, duplicables=None, omitibles=(), aguda=None, bajo=None, bemoles=False):
+        self.simbolo = acorde
+        self.root, self.calidad = parsear_acorde(acorde)
+        intervalos = CALIDADES[self.calidad][1]
+        for iv in tuple(omitibles) + tuple(x for x in (aguda, bajo) if x is not None):
+            if iv not in intervalos:
+                raise ValueError(f"{iv} no es un intervalo de {acorde} {intervalos}")
+        if n_notas < 1:
+            raise ValueError("El voicing necesita al menos una nota")
+
+        self.n_notas = n_notas
+        self.grave, self.agudo = _midi(rango[0]), _midi(rango[1])
+        self.min_salto = max(1, min_salto)
+        self.max_salto = max_salto
+        self.max_dobles = max(0, max_dobles)
+        self.bemoles = bemoles
+
+        # bit i = intervalo i desde la root
+        self._obligatorios = sum(1 << iv for iv in intervalos if iv not in omitibles)
+        self._duplicables = sum(1 << iv for iv in (intervalos if duplicables is None else duplicables))
+        self._aguda = aguda
+        self._bajo = bajo
+        # notas del acorde dentro del rango, con su bit
+        self._notas = [(m, 1 << ((m - self.root) % 12)) for m in range(self.grave, self.agudo + 1)
+                       if (m - self.root) % 12 in intervalos]
+        self._contar = lru_cache(maxsize=None)(self._contar_estado)
+
+    ## -----------------------------
+    ## Function: _siguientes
+    ## Description: Notas que pueden seguir a `ultimo` (None = primera nota)
+    ##              con sus estados resultantes.
+    ## -----------------------------
+    def _siguientes(self, ultimo, restantes, usados, dobles):
+        if ultimo is None:
+            desde, hasta = self.grave, self.agudo
+        else:
+            desde, hasta = ultimo + self.min_salto, min(ultimo + self.max_salto, self.agudo)
+        for m, bit in self._notas:
+            if m < desde:
+                continue
+            if m > hasta:
+                break
+            iv = (m - self.root) % 12
+            if ultimo is None and self._bajo is not None and iv != self._bajo:
+                continue
+            if restantes == 1 and self._aguda is not None and iv != self._aguda:
+                continue
+            doble = 1 if usados & bit else 0
+            if doble and (not dobles or not self._duplicables & bit):
+                continue
+            yield m, (m, restantes - 1, usados | bit, dobles - doble)
+
+    ## -----------------------------
+    ## Function: _contar_estado
+    ## Description: Número de formas de completar el voicing desde un estado.
+    ## -----------------------------
+    def _contar_estado(self, ultimo, restantes, usados, dobles):
+        faltan = self._obligatorios & ~usados
+        if restantes == 0:
+            return 1 if not faltan else 0
+        # cotas: no alcanzan las notas para los intervalos obligatorios, o no entran en el rango
+        if bin(faltan).count("1") > restantes:
+            return 0
+        if ultimo is not None and ultimo + self.min_salto * restantes > self.agudo:
+            return 0
+        return sum(self._contar(*estado) for _, estado in self._siguientes(ultimo, restantes, usados, dobles))
+
+    def _inicio(self):
+        return None, self.n_notas, 0, self.max_dobles
+
+    def contar(self):
+        return self._contar(*self._inicio())
+
+    def __len__(self):
+        return self.contar()
+
+    ## -----------------------------
+    ## Function: notas_midi
+    ## Description: Devuelve el n-ésimo voicing (MIDI, de grave a agudo)
+    ##              sin enumerar los anteriores.
+    ## \param n: índice (admite negativos).
+    ## -----------------------------
+    def notas_midi(self, n):
+        total = self.contar()
+        if n < 0:
+            n += total
+        if n < 0 or n >= total:
+            raise IndexError("Índice de voicing fuera de rango")
+
+        estado = self._inicio()
+        resultado = []
+        while estado[1] > 0:
+            for m, siguiente in self._siguientes(*estado):
+                c = self._contar(*siguiente)
+                if n < c:
+                    resultado.append(m)
+                    estado = siguiente
+                    break
+                n -= c
+        return resultado
+
+    ## -----------------------------
+    ## Function: a_voicing
+    ## Description: Convierte notas MIDI al formato de la librería.
+    ## -----------------------------
+    def a_voicing(self, midi):
+        bajo = midi[0]
+        root = bajo - (bajo - self.root) % 12  # la root más cercana por debajo del bajo
+        inversion = max(0, int(POSICION[self.calidad, (bajo - self.root) % 12]))
+        return {"name": nombre_con_inversion(self.calidad, inversion),
+                "root": nota_de_midi(root, self.bemoles),
+                "notes": [nota_de_midi(m, self.bemoles) for m in midi]}
+
+    def voicing(self, n):
+        return self.a_voicing(self.notas_midi(n))
+
+    def __getitem__(self, n):
+        return self.voicing(n)
+
+    def aleatorio(self, rng=None):
+        """Voicing elegido uniformemente entre todos los válidos."""
+        rng = rng or random
+        total = self.contar()
+        if total == 0:
+            raise ValueError("Ningún voicing cumple las restricciones")
+        return self.voicing(rng.randrange(total))
+
+    ## -----------------------------
+    ## Function: iter_midi
+    ## Description: Genera los voicings (listas MIDI) de forma perezosa,
+    ##              empezando por el índice `inicio`. Las ramas sin soluciones
+    ##              (o anteriores a `inicio`) se saltan usando los conteos.
+    ## -----------------------------
+    def iter_midi(self, inicio=0):
+        prefijo = []
+
+        def generar(estado, saltar):
+            if estado[1] == 0:
+                yield list(prefijo)
+                return
+            for m, siguiente in self._siguientes(*estado):
+                c = self._contar(*siguiente)
+                if saltar >= c:
+                    saltar -= c
+                    continue
+                prefijo.append(m)
+                yield from generar(siguiente, saltar)
+                prefijo.pop()
+                saltar = 0
+
+        if self.contar() > inicio:
+            yield from generar(self._inicio(), inicio)
+
+    def iter_voicings(self, inicio=0):
+        for midi in self.iter_midi(inicio):
+            yield self.a_voicing(midi)
+
+    def __iter__(self):
+        return self.iter_voicings()
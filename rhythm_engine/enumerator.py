@@ -0,0 +1,140 @@
+# ======================================================
+# FILE: rhythm_engine/enumerator.py
+# ======================================================
+"""
+Enumerador de todos los compases posibles de 4/4 (16 semicorcheas) a partir
+de DURACIONES, con restricciones.
+
+El número de compases se calcula con programación dinámica memoizada sobre
+el estado (subdivisiones restantes, eventos disponibles, silencios que faltan),
+lo que permite:
+    - contar sin enumerar,
+    - obtener "el n-ésimo compás" directamente (unranking),
+    - generar los compases de forma perezosa, en orden lexicográfico
+      según el orden de las duraciones permitidas.
+"""
+import random
+from functools import lru_cache
+
+from rhythm_engine.patterns import DURACIONES, RitmoPattern
+
+
+class EnumeradorCompases:
+    """Enumera compases que llenan exactamente `capacidad` subdivisiones.
+
+    param duraciones: keys de DURACIONES permitidas (por defecto todas).
+    param max_eventos: máximo de eventos por compás (None = sin límite).
+    param min_silencios: mínimo de silencios que debe tener el compás.
+    param capacidad: subdivisiones por compás (16 = 4/4).
+    """
+
+    def __init__(self, duraciones=None, max_eventos=None, min_silencios=0, capacidad=16):
+        duraciones = list(duraciones) if duraciones is not None else list(DURACIONES)
+        for d in duraciones:
+            if d not in DURACIONES:
+                raise ValueError(f"Tipo '{d}' no válido")
+
+        self.duraciones = duraciones
+        self.capacidad = capacidad
+        # cada evento ocupa al menos 1 subdivisión
+        self.max_eventos = capacidad if max_eventos is None else min(max_eventos, capacidad)
+        self.min_silencios = max(0, min_silencios)
+
+        # (tipo, duración, es_silencio) en el orden de enumeración
+        self._eventos = [(d, DURACIONES[d], d.startswith("silencio")) for d in duraciones]
+        self._contar = lru_cache(maxsize=None)(self._contar_estado)
+
+    ## -----------------------------
+    ## Function: _contar_estado
+    ## Description: Número de formas de completar el compás desde un estado.
+    ## -----------------------------
+    def _contar_estado(self, restante, eventos, faltan):
+        if restante == 0:
+            return 1 if faltan == 0 else 0
+        if eventos == 0 or faltan > eventos:
+            return 0
+        total = 0
+        for _, dur, silencio in self._eventos:
+            if dur <= restante:
+                total += self._contar(restante - dur, eventos - 1, max(0, faltan - silencio))
+        return total
+
+    def contar(self):
+        return self._contar(self.capacidad, self.max_eventos, self.min_silencios)
+
+    def __len__(self):
+        return self.contar()
+
+    ## -----------------------------
+    ## Function: compas
+    ## Description: Devuelve el n-ésimo compás (lista de eventos) sin enumerar los anteriores.
+    ## \param n: índice (admite negativos).
+    ## -----------------------------
+    def compas(self, n):
+        total = self.contar()
+        if n < 0:
+            n += total
+        if n < 0 or n >= total:
+            raise IndexError("Índice de compás fuera de rango")
+
+        restante, eventos, faltan = self.capacidad, self.max_eventos, self.min_silencios
+        resultado = []
+        while restante > 0:
+            for tipo, dur, silencio in self._eventos:
+                if dur > restante:
+                    continue
+                estado = (restante - dur, eventos - 1, max(0, faltan - silencio))
+                c = self._contar(*estado)
+                if n < c:
+                    resultado.append(tipo)
+                    restante, eventos, faltan = estado
+                    break
+                n -= c
+        return resultado
+
+    def patron(self, n, name=None):
+        return RitmoPattern(name or f"bar_{n}", [self.compas(n)])
+
+    def __getitem__(self, n):
+        return self.patron(n)
+
+    def aleatorio(self, rng=None):
+        """Compás elegido uniformemente entre todos los válidos."""
+        rng = rng or random
+        total = self.contar()
+        if total == 0:
+            raise ValueError("Ninguna combinación cumple las restricciones")
+        return self.compas(rng.randrange(total))
+
+    ## -----------------------------
+    ## Function: iter_compases
+    ## Description: Genera los compases (listas de eventos) de forma perezosa,
+    ##              empezando por el índice `inicio`. Las ramas sin soluciones
+    ##              (o anteriores a `inicio`) se saltan usando los conteos.
+    ## -----------------------------
+    def iter_compases(self, inicio=0):
+        prefijo = []
+
+        def generar(restante, eventos, faltan, saltar):
+            if restante == 0:
+                yield list(prefijo)
+                return
+            for tipo, dur, silencio in self._eventos:
+                if dur > restante:
+                    continue
+                estado = (restante - dur, eventos - 1, max(0, faltan - silencio))
+                c = self._contar(*estado)
+                if saltar >= c:
+                    saltar -= c
+                    continue
+                prefijo.append(tipo)
+                yield from generar(*estado, saltar)
+                prefijo.pop()
+                saltar = 0
+
+        if self.contar() > inicio:
+            yield from generar(self.capacidad, self.max_eventos, self.min_silencios, inicio)
+
+    def __iter__(self):
+        for n, compas in enumerate(self.iter_compases()):
+            yield RitmoPattern(f"bar_{n}", [compas])
@@ -0,0 +1,243 @@
+# ======================================================
+# FILE: rhythm_engine/features.py
+# ======================================================
+"""
+Tabla de features rítmicas (almacén por columnas) para ordenar y filtrar la
+librería de patrones.
+
+Columnas (una fila por patrón):
+    densidad        notas (ataques) por compás
+    ratio_silencios fracción de subdivisiones ocupadas por silencios
+    sincopa         síncopa media por compás (notas débiles que se sostienen
+                    sobre posiciones más fuertes)
+    entropia        entropía de la distribución de ataques sobre las 16
+                    posiciones, normalizada a [0, 1]
+    nota_mas_larga  duración de la nota más larga (en subdivisiones)
+
+Todo se calcula en bloque con NumPy. TablaFeatures guarda además el
+content_hash de cada patrón para recalcular solo los patrones editados.
+"""
+import re
+
+import numpy as np
+
+from rhythm_engine.patterns import DURACIONES
+
+COLUMNAS = ["densidad", "ratio_silencios", "sincopa", "entropia", "nota_mas_larga"]
+
+TIPOS = list(DURACIONES)
+_DUR = np.array([DURACIONES[t] for t in TIPOS], dtype=np.int64)
+_SILENCIO = np.array([t.startswith("silencio") for t in TIPOS])
+
+# Peso métrico de cada semicorchea en 4/4 (mayor = más fuerte)
+PESOS_METRICOS = np.array([4, 0, 1, 0, 2, 0, 1, 0, 3, 0, 1, 0, 2, 0, 1, 0], dtype=np.int64)
+
+
+def _tabla_sincopa():
+    """_SINC[pos, dur] = cuánto más fuerte es la posición más fuerte cubierta
+    (sin contar el ataque) por una nota que empieza en pos y dura dur."""
+    tabla = np.zeros((16, 17), dtype=np.int64)
+    for pos in range(16):
+        for dur in range(1, 17):
+            interior = PESOS_METRICOS[pos + 1:min(pos + dur, 16)]
+            if interior.size:
+                tabla[pos, dur] = max(0, interior.max() - PESOS_METRICOS[pos])
+    return tabla
+
+
+_SINC = _tabla_sincopa()
+
+
+## -----------------------------
+## Function: calcular_features
+## Description: Calcula todas las columnas para una lista de patrones.
+## \param patterns: lista de RitmoPattern/RitmoCompuesto.
+## \return: dict columna -> np.ndarray(float32) de largo len(patterns).
+## -----------------------------
+def calcular_features(patterns):
+    n = len(patterns)
+    codigo = {t: i for i, t in enumerate(TIPOS)}
+
+    # aplanar todos los eventos: (patrón, compás global, código)
+    codigos, compas_pid, largos = [], [], []
+    for pid, p in enumerate(patterns):
+        for compas in p.iter_compases():
+            c = [codigo[e] for e in compas if e in codigo]
+            codigos.extend(c)
+            largos.append(len(c))
+            compas_pid.append(pid)
+
+    cols = {c: np.zeros(n, dtype=np.float32) for c in COLUMNAS}
+    if n == 0:
+        return cols
+
+    compas_pid = np.array(compas_pid, dtype=np.int64)
+    n_compases = np.bincount(compas_pid, minlength=n).astype(np.float64)
+    codigos = np.array(codigos, dtype=np.int64)
+    if codigos.size == 0:
+        return cols
+
+    largos = np.array(largos, dtype=np.int64)
+    pid = np.repeat(compas_pid, largos)
+    inicio = np.concatenate(([0], np.cumsum(largos)[:-1]))
+    compas_id = np.repeat(np.arange(largos.size), largos)
+
+    dur = _DUR[codigos]
+    silencio = _SILENCIO[codigos]
+    acum = np.cumsum(dur)
+    pos = acum - dur - (acum - dur)[inicio[compas_id]]
+
+    # eventos que no caben en el compás no cuentan
+    ok = pos < 16
+    pid, dur, silencio, pos = pid[ok], dur[ok], silencio[ok], pos[ok]
+    nota = ~silencio
+    dur = np.minimum(dur, 16 - pos)
+
+    por_compas = np.maximum(n_compases, 1)
+    notas = np.bincount(pid[nota], minlength=n)
+    cols["densidad"][:] = notas / por_compas
+
+    sub_total = np.bincount(pid, weights=dur, minlength=n)
+    sub_sil = np.bincount(pid[silencio], weights=dur[silencio], minlength=n)
+    cols["ratio_silencios"][:] = np.divide(sub_sil, sub_total, out=np.zeros(n), where=sub_total > 0)
+
+    sinc = _SINC[pos[nota], dur[nota]]
+    cols["sincopa"][:] = np.bincount(pid[nota], weights=sinc, minlength=n) / por_compas
+
+    ataques = np.bincount(pid[nota] * 16 + pos[nota], minlength=n * 16).reshape(n, 16).astype(np.float64)
+    total = ataques.sum(axis=1, keepdims=True)
+    prob = np.divide(ataques, total, out=np.zeros_like(ataques), where=total > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h = -np.where(prob > 0, prob * np.log2(prob), 0.0).sum(axis=1)
+    cols["entropia"][:] = h / 4.0  # log2(16)
+
+    larga = np.zeros(n, dtype=np.int64)
+    np.maximum.at(larga, pid[nota], dur[nota])
+    cols["nota_mas_larga"][:] = larga
+
+    return cols
+
+
+## -----------------------------
+## Function: parse_filtro
+## Description: Convierte un texto como "densidad>4 sincopa<=2" en condiciones.
+## \return: lista de (columna, operador, valor). Lanza ValueError si no es válido.
+## -----------------------------
+def parse_filtro(texto):
+    condiciones = []
+    for token in texto.split():
+        m = re.match(r"^([a-z_]+)(>=|<=|==|>|<|=)(-?[\d.]+)$", token)
+        if not m or m.group(1) not in COLUMNAS:
+            raise ValueError(f"Filtro no válido: '{token}'")
+        op = "==" if m.group(2) == "=" else m.group(2)
+        condiciones.append((m.group(1), op, float(m.group(3))))
+    return condiciones
+
+
+_OPERADORES = {
+    ">": np.greater, "<": np.less, ">=": np.greater_equal,
+    "<=": np.less_equal, "==": np.isclose,
+}
+
+
+class TablaFeatures:
+    """Columnas de features + content_hash por fila.
+
+    actualizar(patterns) reordena la tabla según la lista de patrones y solo
+    recalcula las filas cuyo content_hash no estaba en la tabla. El
+    content_hash se recuerda por objeto: la GUI reemplaza el patrón al
+    editarlo, así que un refresco solo hashea los objetos nuevos. Quien
+    modifique los compases de un patrón en el lugar debe llamar a invalidar(p).
+    """
+
+    def __init__(self, hashes=None, columnas=None):
+        self.hashes = np.asarray(hashes if hashes is not None else [], dtype="U16")
+        self.columnas = {
+            c: np.asarray(columnas[c], dtype=np.float32) if columnas else np.zeros(0, dtype=np.float32)
+            for c in COLUMNAS
+        }
+        # id(patrón) -> (patrón, content_hash) de la última llamada a actualizar
+        self._hash_de = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __getitem__(self, columna):
+        return self.columnas[columna]
+
+    def fila(self, i):
+        return {c: float(self.columnas[c][i]) for c in COLUMNAS}
+
+    ## -----------------------------
+    ## Function: actualizar
+    ## Description: Alinea la tabla con `patterns` recalculando solo lo nuevo.
+    ## \return: número de patrones recalculados.
+    ## -----------------------------
+    def actualizar(self, patterns):
+        nuevos_hashes = self._hashes(patterns)
+        if nuevos_hashes == self.hashes.tolist():
+            return 0
+        previo = {h: i for i, h in enumerate(self.hashes.tolist())}
+
+        faltan = [i for i, h in enumerate(nuevos_hashes) if h not in previo]
+        calculado = calcular_features([patterns[i] for i in faltan])
+        pos_calculado = {nuevos_hashes[i]: k for k, i in enumerate(faltan)}
+
+        # índice de origen de cada fila: en la tabla previa o en lo recién calculado
+        desde_previo = np.array([previo.get(h, -1) for h in nuevos_hashes], dtype=np.int64)
+        desde_nuevo = np.array([pos_calculado.get(h, -1) for h in nuevos_hashes], dtype=np.int64)
+        usa_previo = desde_previo >= 0
+
+        for c in COLUMNAS:
+            col = np.zeros(len(patterns), dtype=np.float32)
+            col[usa_previo] = self.columnas[c][desde_previo[usa_previo]]
+            col[~usa_previo] = calculado[c][desde_nuevo[~usa_previo]]
+            self.columnas[c] = col
+        self.hashes = np.asarray(nuevos_hashes, dtype="U16")
+        return len(faltan)
+
+    ## -----------------------------
+    ## Function: invalidar
+    ## Description: Olvida el content_hash recordado de un patrón editado en el lugar.
+    ## -----------------------------
+    def invalidar(self, pattern):
+        self._hash_de.pop(id(pattern), None)
+
+    def _hashes(self, patterns):
+        memo = {}
+        hashes = []
+        for p in patterns:
+            entrada = self._hash_de.get(id(p))
+            if entrada is None or entrada[0] is not p:
+                entrada = (p, p.content_hash())
+            memo[id(p)] = entrada
+            hashes.append(entrada[1])
+        # solo los patrones actuales: los quitados de la lista no quedan vivos aquí
+        self._hash_de = memo
+        return hashes
+
+    ## -----------------------------
+    ## Function: ordenar
+    ## Description: Índices de fila ordenados por una columna.
+    ## -----------------------------
+    def ordenar(self, columna, descendente=False, indices=None):
+        valores = self.columnas[columna]
+        if indices is not None:
+            indices = np.asarray(indices, dtype=np.int64)
+            orden = indices[np.argsort(valores[indices], kind="stable")]
+        else:
+            orden = np.argsort(valores, kind="stable")
+        return orden[::-1] if descendente else orden
+
+    ## -----------------------------
+    ## Function: filtrar
+    ## Description: Índices de fila que cumplen todas las condiciones.
+    ## \param condiciones: lista de (columna, operador, valor) o texto (ver parse_filtro).
+    ## -----------------------------
+    def filtrar(self, condiciones):
+        if isinstance(condiciones, str):
+            condiciones = parse_filtro(condiciones)
+        mascara = np.ones(len(self), dtype=bool)
+        for columna, op, valor in condiciones:
+            mascara &= _OPERADORES[op](self.columnas[columna], valor)
+        return np.nonzero(mascara)[0]
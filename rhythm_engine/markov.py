@@ -0,0 +1,180 @@
+# ======================================================
+# FILE: rhythm_engine/markov.py
+# ======================================================
+"""
+Modelo n-grama (cadena de Markov) sobre los eventos de RitmoPattern, entrenado
+con la librería de patrones (load_patterns()) para generar compases nuevos en
+el mismo estilo.
+
+El estado de la cadena es (posición en el compás, n-1 eventos anteriores).
+Los conteos de transición se guardan en un array NumPy uint32 de forma
+(capacidad, contextos, eventos). Al muestrear solo se permiten eventos que
+caben en el compás (misma regla que RitmoPattern.can_add), así que todos los
+compases generados llenan exactamente el 4/4.
+"""
+import numpy as np
+
+from rhythm_engine.patterns import DURACIONES, RitmoPattern
+
+TIPOS = list(DURACIONES)
+DUR = np.array([DURACIONES[t] for t in TIPOS], dtype=np.int16)
+
+
+class ModeloRitmo:
+    """n-grama de eventos rítmicos.
+
+    param orden: n del n-grama (2 = bigrama; el contexto son n-1 eventos).
+    param alpha: suavizado aditivo; garantiza que siempre haya un evento que quepa.
+    param capacidad: subdivisiones por compás (16 = 4/4).
+    """
+
+    def __init__(self, orden=3, alpha=0.05, capacidad=16):
+        if orden < 1:
+            raise ValueError("El orden debe ser >= 1")
+        self.orden = orden
+        self.alpha = alpha
+        self.capacidad = capacidad
+
+        self.V = len(TIPOS)
+        self.BOS = self.V  # marca de inicio de compás en el contexto
+        self.n_contextos = (self.V + 1) ** (orden - 1)
+        self.conteos = np.zeros((capacidad, self.n_contextos, self.V), dtype=np.uint32)
+        self._cum = None
+
+    ## -----------------------------
+    ## Function: desde_libreria
+    ## Description: Crea y entrena un modelo con los patrones guardados.
+    ## \param filepath: archivo de ritmos (por defecto rhythms.json).
+    ## -----------------------------
+    @classmethod
+    def desde_libreria(cls, filepath=None, **kwargs):
+        from storage_engine.rhythm_storage import load_patterns
+        modelo = cls(**kwargs)
+        modelo.entrenar(load_patterns(filepath))
+        return modelo
+
+    ## -----------------------------
+    ## Function: _codificar
+    ## Description: Convierte compases a arrays (códigos, índice de compás).
+    ##              Se ignoran eventos desconocidos.
+    ## -----------------------------
+    def _codificar(self, compases):
+        codigo = {t: i for i, t in enumerate(TIPOS)}
+        codigos = []
+        largos = []
+        for compas in compases:
+            c = [codigo[e] for e in compas if e in codigo]
+            codigos.extend(c)
+            largos.append(len(c))
+        codigos = np.array(codigos, dtype=np.int64)
+        compas_id = np.repeat(np.arange(len(largos)), largos)
+        return codigos, compas_id, np.array(largos, dtype=np.int64)
+
+    ## -----------------------------
+    ## Function: entrenar
+    ## Description: Suma los conteos de transición de una lista de patrones
+    ##              (RitmoPattern o RitmoCompuesto). Se puede llamar varias veces.
+    ## -----------------------------
+    def entrenar(self, patterns):
+        compases = [c for p in patterns for c in p.iter_compases()]
+        codigos, compas_id, largos = self._codificar(compases)
+        if codigos.size == 0:
+            return self
+
+        # índice del primer evento de cada compás
+        inicio = np.concatenate(([0], np.cumsum(largos)[:-1]))
+        k = np.arange(codigos.size) - inicio[compas_id]  # posición del evento en su compás
+
+        # posición en subdivisiones = duración acumulada antes del evento
+        dur = DUR[codigos].astype(np.int64)
+        acum = np.cumsum(dur)
+        pos = acum - dur - (acum - dur)[inicio[compas_id]]
+
+        # contexto = n-1 eventos anteriores del mismo compás (BOS si no hay)
+        ctx = np.zeros(codigos.size, dtype=np.int64)
+        base = 1
+        for j in range(1, self.orden):
+            prev = np.full(codigos.size, self.BOS, dtype=np.int64)
+            hay = k >= j
+            prev[hay] = codigos[np.nonzero(hay)[0] - j]
+            ctx += prev * base
+            base *= self.V + 1
+
+        # descartar eventos que no caben (compases pasados de 16)
+        validos = pos + dur <= self.capacidad
+        plano = (pos[validos] * self.n_contextos + ctx[validos]) * self.V + codigos[validos]
+        suma = np.bincount(plano, minlength=self.conteos.size)
+        self.conteos += suma.reshape(self.conteos.shape).astype(np.uint32)
+        self._cum = None
+        return self
+
+    ## -----------------------------
+    ## Function: _tabla_acumulada
+    ## Description: Probabilidades acumuladas por estado, con los eventos que
+    ##              no caben en el resto del compás ya enmascarados.
+    ## -----------------------------
+    def _tabla_acumulada(self):
+        if self._cum is None:
+            p = self.conteos.astype(np.float64) + self.alpha
+            restante = self.capacidad - np.arange(self.capacidad)
+            cabe = DUR[None, :] <= restante[:, None]          # (capacidad, V)
+            p *= cabe[:, None, :]
+            cum = np.cumsum(p, axis=2)
+            total = cum[:, :, -1:]
+            total[total == 0] = 1.0
+            self._cum = cum / total
+        return self._cum
+
+    ## -----------------------------
+    ## Function: muestrear_codigos
+    ## Description: Genera n compases en lote (vectorizado).
+    ## \return: (codigos, largos): array (n, capacidad) con -1 de relleno y
+    ##          número de eventos de cada compás.
+    ## -----------------------------
+    def muestrear_codigos(self, n, rng=None):
+        rng = np.random.default_rng(rng)
+        cum = self._tabla_acumulada()
+
+        codigos = np.full((n, self.capacidad), -1, dtype=np.int8)
+        largos = np.zeros(n, dtype=np.int64)
+        pos = np.zeros(n, dtype=np.int64)
+        hist = np.full((n, max(self.orden - 1, 1)), self.BOS, dtype=np.int64)
+        pesos = (self.V + 1) ** np.arange(self.orden - 1)
+
+        activos = np.arange(n)
+        while activos.size:
+            ctx = hist[activos, :self.orden - 1] @ pesos if self.orden > 1 else np.zeros(activos.size, dtype=np.int64)
+            filas = cum[pos[activos], ctx]
+            u = rng.random(activos.size)
+            evento = (filas < u[:, None]).sum(axis=1)
+            evento = np.minimum(evento, self.V - 1)
+
+            codigos[activos, largos[activos]] = evento
+            largos[activos] += 1
+            pos[activos] += DUR[evento]
+            if self.orden > 1:
+                hist[activos, 1:] = hist[activos, :-1]
+                hist[activos, 0] = evento
+
+            activos = activos[pos[activos] < self.capacidad]
+
+        return codigos, largos
+
+    ## -----------------------------
+    ## Function: muestrear
+    ## Description: Genera n compases como listas de eventos.
+    ## -----------------------------
+    def muestrear(self, n, rng=None):
+        codigos, largos = self.muestrear_codigos(n, rng)
+        return [[TIPOS[c] for c in fila[:l]] for fila, l in zip(codigos.tolist(), largos.tolist())]
+
+    ## -----------------------------
+    ## Function: muestrear_patrones
+    ## Description: Genera n patrones de `compases` compases cada uno.
+    ## -----------------------------
+    def muestrear_patrones(self, n, compases=1, prefijo="gen", tempo=120, rng=None):
+        barras = self.muestrear(n * compases, rng)
+        return [
+            RitmoPattern(f"{prefijo}_{i + 1:03d}", barras[i * compases:(i + 1) * compases], tempo=tempo)
+            for i in range(n)
+        ]
@@ -4,6 +4,9 @@
 
 import sys
 import os
+import hashlib
+from bisect import bisect_right
+from functools import lru_cache
 # agregamos la carpeta raíz (Music_Modular) al sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -24,6 +27,34 @@ DURACIONES = {
     "silencio_semicorchea": 1,
 }
 
+
+## -----------------------------
+## Function: compas_canonico
+## Description: Forma canónica (inmutable) de un compás: tupla de eventos sin espacios.
+## \param compas: lista de eventos (keys de DURACIONES).
+## \return: tupla de eventos.
+## -----------------------------
+def compas_canonico(compas):
+    return tuple(str(e).strip() for e in compas)
+
+
+@lru_cache(maxsize=262144)
+def _hash_eventos(eventos):
+    data = "|".join(compas_canonico(eventos)).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+## -----------------------------
+## Function: hash_compas
+## Description: Hash de contenido de un compás. Dos compases con los mismos
+##              eventos en el mismo orden tienen el mismo hash.
+## \param compas: lista de eventos.
+## \return: hash hexadecimal (16 caracteres).
+## -----------------------------
+def hash_compas(compas):
+    return _hash_eventos(tuple(compas))
+
+
 class RitmoPattern:
     """Representa un patrón de ritmos compuesto por compases.
     Cada compás es una lista de eventos; un evento es una cadena que
@@ -79,10 +110,39 @@ class RitmoPattern:
         total = sum(DURACIONES[e] for e in self.compases[compas_index])
         return (total + DURACIONES[tipo]) <= 16
 
+    def num_compases(self):
+        return len(self.compases)
+
+    def compas(self, idx):
+        return self.compases[idx]
+
+    def iter_compases(self):
+        return iter(self.compases)
+
     def merge(self, other, merged_name):
-        nuevo = RitmoPattern(merged_name)
-        nuevo.compases = [list(c) for c in self.compases] + [list(c) for c in other.compases]
-        return nuevo
+        """Concatena dos patrones sin copiar compases (ver RitmoCompuesto)."""
+        return RitmoCompuesto(merged_name, [(self, 1), (other, 1)], tempo=self.tempo)
+
+    def repeat(self, veces, name=None):
+        return RitmoCompuesto(name or f"{self.name} x{veces}", [(self, veces)], tempo=self.tempo)
+
+    def flatten(self, name=None):
+        """Copia independiente (editable) del patrón."""
+        return RitmoPattern(
+            name=name or self.name,
+            compases=[list(c) for c in self.compases],
+            tempo=self.tempo
+        )
+
+    def compas_hashes(self):
+        return [hash_compas(c) for c in self.compases]
+
+    def content_hash(self):
+        """Hash de contenido del patrón (compases + tempo, sin el nombre).
+        Patrones estructuralmente idénticos con distinto nombre comparten hash.
+        """
+        data = f"{self.tempo}:" + ",".join(self.compas_hashes())
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
 
     def to_dict(self):
         return {"name": self.name, "compases": self.compases, "tempo": self.tempo}
@@ -105,4 +165,112 @@ class RitmoPattern:
         # 1 negra = 1 beat, 1 beat = 4 semicorcheas
         beat = 60 / self.tempo  # duración de una negra en segundos
         return (semicorcheas / 4) * beat
-    
\ No newline at end of file
+
+
+class RitmoCompuesto:
+    """Patrón compuesto perezoso (tipo "rope"): referencia patrones hijos con
+    un número de repeticiones, sin copiar sus compases.
+    Ej. forma de canción: intro + A x8 + B x4.
+
+    Se recorre/reproduce con iter_compases() y compas(idx); solo se
+    materializa en un RitmoPattern al llamar flatten() (guardar/exportar/editar).
+    La memoria es proporcional al número de partes, no al de compases.
+    """
+
+    def __init__(self, name="new_pattern", partes=None, tempo=120):
+        self.name = name
+        self.tempo = tempo
+        self.partes = []  # lista de (patron, veces)
+        self._offsets = None
+        for pattern, veces in partes or []:
+            self.append(pattern, veces)
+
+    def append(self, pattern, veces=1):
+        if veces < 1:
+            raise ValueError("Las repeticiones deben ser >= 1")
+
+        # un compuesto dentro de otro aporta sus partes (sin anidar) cuando
+        # no hay que repetirlo; si se repite, se referencia como una sola parte
+        if isinstance(pattern, RitmoCompuesto):
+            if len(pattern.partes) == 1:
+                hijo, n = pattern.partes[0]
+                self.append(hijo, n * veces)
+                return
+            if veces == 1:
+                for hijo, n in pattern.partes:
+                    self.append(hijo, n)
+                return
+
+        if self.partes and self.partes[-1][0] is pattern:
+            ultimo, n = self.partes[-1]
+            self.partes[-1] = (ultimo, n + veces)
+        else:
+            self.partes.append((pattern, veces))
+        self._offsets = None
+
+    def _get_offsets(self):
+        # offsets[i] = índice del primer compás de la parte i
+        if self._offsets is None:
+            offsets = [0]
+            for pattern, veces in self.partes:
+                offsets.append(offsets[-1] + pattern.num_compases() * veces)
+            self._offsets = offsets
+        return self._offsets
+
+    def num_compases(self):
+        return self._get_offsets()[-1]
+
+    def compas(self, idx):
+        total = self.num_compases()
+        if idx < 0:
+            idx += total
+        if idx < 0 or idx >= total:
+            raise IndexError("Compás inexistente")
+        offsets = self._get_offsets()
+        parte = bisect_right(offsets, idx) - 1
+        pattern, _ = self.partes[parte]
+        return pattern.compas((idx - offsets[parte]) % pattern.num_compases())
+
+    def iter_compases(self):
+        for pattern, veces in self.partes:
+            for _ in range(veces):
+                yield from pattern.iter_compases()
+
+    @property
+    def compases(self):
+        # compatibilidad: lista materializada (solo lectura)
+        return [list(c) for c in self.iter_compases()]
+
+    def compas_estado(self, compas_index):
+        total = sum(DURACIONES[e] for e in self.compas(compas_index))
+        return total, 16
+
+    def is_complete(self, compas_index):
+        total, full = self.compas_estado(compas_index)
+        return total == full
+
+    def merge(self, other, merged_name):
+        return RitmoCompuesto(merged_name, [(self, 1), (other, 1)], tempo=self.tempo)
+
+    def repeat(self, veces, name=None):
+        return RitmoCompuesto(name or f"{self.name} x{veces}", [(self, veces)], tempo=self.tempo)
+
+    def flatten(self, name=None):
+        return RitmoPattern(
+            name=name or self.name,
+            compases=[list(c) for c in self.iter_compases()],
+            tempo=self.tempo
+        )
+
+    def compas_hashes(self):
+        return [hash_compas(c) for c in self.iter_compases()]
+
+    def content_hash(self):
+        data = f"{self.tempo}:" + ",".join(self.compas_hashes())
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
+
+    def to_dict(self):
+        return self.flatten().to_dict()
+
+    def duracion_segundos(self, tipo):
+        return RitmoPattern.duracion_segundos(self, tipo)
@@ -0,0 +1,307 @@
+# ======================================================
+# FILE: storage_engine/binary_storage.py
+# ======================================================
+"""
+Formato binario compacto (.vbin) para librerías de voicings, pensado para
+abrirse con mmap sin parsear nada.
+
+Estructura (little endian, cada sección alineada a 8 bytes):
+
+    cabecera (128 bytes): magic "VBIN", versión, n_voicings, n_notes,
+                          n_strings y el offset de cada sección
+    names        uint32[n]        índice en la tabla de strings
+    roots        int32[n]         -1 = sin root
+    hotkeys      int32[n]         -1 = sin hotkey
+    extras       int32[n]         claves extra del voicing como JSON (-1 = ninguna)
+    pc_mask      uint16[n]        clases de altura (bit 0 = C)
+    note_offsets uint32[n + 1]    notas del voicing i: [off[i], off[i+1])
+    midi         uint8[n_notes]   255 = nota desconocida
+    spelling     uint32[n_notes]  nombre de la nota ("Db3" / "C#3") en la tabla
+    str_offsets  uint32[n_strings + 1]
+    str_data     bytes utf-8
+
+Todas las columnas son vistas NumPy sobre el mmap (zero-copy); los strings
+se decodifican solo cuando se piden. Los converters json_to_binary /
+binary_to_json hacen el ida y vuelta con los JSON actuales sin pérdida.
+
+Uso por línea de comandos:
+    python -m storage_engine.binary_storage to-binary voicings.json voicings.vbin
+    python -m storage_engine.binary_storage to-json voicings.vbin voicings.json
+"""
+import os
+import sys
+import mmap
+import json
+import struct
+
+import numpy as np
+
+from midi_engine.notes_db import BD_Notas_Midi
+from storage_engine.saver import atomic_write_bytes, atomic_write_json
+
+MAGIC = b"VBIN"
+VERSION = 1
+HEADER_SIZE = 128
+MIDI_DESCONOCIDA = 255
+
+SECCIONES = (
+    ("names", np.uint32),
+    ("roots", np.int32),
+    ("hotkeys", np.int32),
+    ("extras", np.int32),
+    ("pc_mask", np.uint16),
+    ("note_offsets", np.uint32),
+    ("midi", np.uint8),
+    ("spelling", np.uint32),
+    ("str_offsets", np.uint32),
+    ("str_data", np.uint8),
+)
+
+_HEADER = struct.Struct("<4sHHIII" + "Q" * len(SECCIONES))
+
+_VOICING_KEYS = ("name", "root", "notes", "hotkey")
+
+
+## -----------------------------
+## function: _extra_keys
+## description: Claves del voicing que van a "extras". Un root/hotkey que
+##              está pero no es un string ({"root": null}) también va ahí:
+##              -1 en su columna significa "no está".
+## -----------------------------
+def _extra_keys(v):
+    extra = {k: val for k, val in v.items() if k not in _VOICING_KEYS}
+    for k in ("root", "hotkey"):
+        if k in v and not isinstance(v[k], str):
+            extra[k] = v[k]
+    return extra
+
+
+def is_binary_library(path):
+    return os.fspath(path).lower().endswith(".vbin")
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+## -----------------------------
+## function: pc_masks_from_midi
+## description: Máscara de clases de altura de cada voicing, vectorizada.
+## \param midi: uint8[n_notes] (255 = desconocida)
+## \param offsets: uint32[n + 1]
+## \return: uint16[n]
+## -----------------------------
+def pc_masks_from_midi(midi, offsets):
+    midi = np.asarray(midi)
+    bits = np.where(midi == MIDI_DESCONOCIDA, 0, np.left_shift(1, midi.astype(np.uint16) % 12)).astype(np.uint16)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    masks = np.zeros(len(offsets) - 1, dtype=np.uint16)
+    con_notas = offsets[1:] > offsets[:-1]
+    if con_notas.any():
+        # entre dos inicios con notas solo hay voicings vacíos: reduceat es correcto
+        masks[con_notas] = np.bitwise_or.reduceat(bits, offsets[:-1][con_notas])
+    return masks
+
+
+## -----------------------------
+## function: write_binary
+## description: Escribe una lista de voicings (dicts) en formato .vbin
+##              (escritura atómica).
+## -----------------------------
+def write_binary(voicings, path):
+    strings = []
+    indices = {}
+
+    def intern(s):
+        i = indices.get(s)
+        if i is None:
+            i = indices[s] = len(strings)
+            strings.append(s)
+        return i
+
+    n = len(voicings)
+    names = np.empty(n, dtype=np.uint32)
+    roots = np.full(n, -1, dtype=np.int32)
+    hotkeys = np.full(n, -1, dtype=np.int32)
+    extras = np.full(n, -1, dtype=np.int32)
+    offsets = np.zeros(n + 1, dtype=np.uint32)
+    spelling = []
+    midi = []
+
+    for i, v in enumerate(voicings):
+        names[i] = intern(v.get("name", "(unnamed)"))
+        if isinstance(v.get("root"), str):
+            roots[i] = intern(v["root"])
+        if isinstance(v.get("hotkey"), str):
+            hotkeys[i] = intern(v["hotkey"])
+        extra = _extra_keys(v)
+        if extra:
+            extras[i] = intern(json.dumps(extra, ensure_ascii=False))
+        for nota in v.get("notes", []):
+            spelling.append(intern(nota))
+            m = BD_Notas_Midi.get(nota)
+            midi.append(m if m is not None and 0 <= m < MIDI_DESCONOCIDA else MIDI_DESCONOCIDA)
+        offsets[i + 1] = len(midi)
+
+    midi = np.array(midi, dtype=np.uint8)
+    encoded = [s.encode("utf-8") for s in strings]
+    str_offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(b) for b in encoded], out=str_offsets[1:])
+
+    columnas = {
+        "names": names,
+        "roots": roots,
+        "hotkeys": hotkeys,
+        "extras": extras,
+        "pc_mask": pc_masks_from_midi(midi, offsets),
+        "note_offsets": offsets,
+        "midi": midi,
+        "spelling": np.array(spelling, dtype=np.uint32),
+        "str_offsets": str_offsets,
+        "str_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+    # offsets de cada sección
+    pos = HEADER_SIZE
+    posiciones = []
+    for nombre, _ in SECCIONES:
+        posiciones.append(pos)
+        pos += columnas[nombre].nbytes
+        pos += _pad(pos)
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, n, len(midi), len(strings), *posiciones)
+
+    def escribir(f):
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for nombre, dtype in SECCIONES:
+            datos = np.ascontiguousarray(columnas[nombre], dtype=dtype)
+            f.write(datos.tobytes())
+            f.write(b"\0" * _pad(f.tell()))
+
+    atomic_write_bytes(path, escribir)
+
+
+class BinaryVoicingLibrary:
+    """Librería .vbin abierta con mmap (solo lectura)."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._abrir()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _abrir(self):
+        if len(self._mm) < HEADER_SIZE:
+            raise ValueError("Archivo .vbin incompleto")
+        magic, version, _, n, n_notes, n_strings, *posiciones = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("No es una librería .vbin compatible")
+
+        cantidades = {
+            "names": n, "roots": n, "hotkeys": n, "extras": n, "pc_mask": n,
+            "note_offsets": n + 1, "midi": n_notes, "spelling": n_notes,
+            "str_offsets": n_strings + 1,
+        }
+        for (nombre, dtype), pos in zip(SECCIONES, posiciones):
+            if nombre == "str_data":
+                cantidad = int(self.str_offsets[-1])
+            else:
+                cantidad = cantidades[nombre]
+            setattr(self, nombre, np.frombuffer(self._mm, dtype=dtype, count=cantidad, offset=pos))
+
+        self.n = n
+        self._strings = {}
+
+    def close(self):
+        for nombre, _ in SECCIONES:
+            self.__dict__.pop(nombre, None)
+        try:
+            self._mm.close()
+        except BufferError:
+            # alguien conserva una vista de las columnas; se libera con el GC
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.n
+
+    def string(self, idx):
+        s = self._strings.get(idx)
+        if s is None:
+            a, b = self.str_offsets[idx], self.str_offsets[idx + 1]
+            s = self._strings[idx] = self.str_data[a:b].tobytes().decode("utf-8")
+        return s
+
+    def name(self, i):
+        return self.string(self.names[i])
+
+    ## -----------------------------
+    ## function: midi_notes
+    ## description: Notas MIDI del voicing i (vista sobre el mmap, sin copia).
+    ## -----------------------------
+    def midi_notes(self, i):
+        return self.midi[self.note_offsets[i]:self.note_offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        a, b = self.note_offsets[i], self.note_offsets[i + 1]
+        extra = json.loads(self.string(self.extras[i])) if self.extras[i] >= 0 else {}
+        v = {"name": self.string(self.names[i])}
+        if self.roots[i] >= 0:
+            v["root"] = self.string(self.roots[i])
+        elif "root" in extra:
+            v["root"] = extra.pop("root")
+        v["notes"] = [self.string(s) for s in self.spelling[a:b]]
+        if self.hotkeys[i] >= 0:
+            v["hotkey"] = self.string(self.hotkeys[i])
+        elif "hotkey" in extra:
+            v["hotkey"] = extra.pop("hotkey")
+        v.update(extra)
+        return v
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def to_list(self):
+        return list(self)
+
+
+def json_to_binary(json_path, bin_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        voicings = json.load(f).get("voicings", [])
+    write_binary(voicings, bin_path)
+    return len(voicings)
+
+
+def binary_to_json(bin_path, json_path):
+    with BinaryVoicingLibrary(bin_path) as lib:
+        voicings = lib.to_list()
+    atomic_write_json(json_path, {"voicings": voicings})
+    return len(voicings)
+
+
+def _main(argv):
+    if len(argv) != 3 or argv[0] not in ("to-binary", "to-json"):
+        print("uso: python -m storage_engine.binary_storage to-binary|to-json ORIGEN DESTINO")
+        return 2
+    cmd, src, dst = argv
+    n = json_to_binary(src, dst) if cmd == "to-binary" else binary_to_json(src, dst)
+    print(f"{n} voicings escritos en {dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
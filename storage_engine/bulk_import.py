@@ -0,0 +1,179 @@
+# ======================================================
+# FILE: storage_engine/bulk_import.py
+# ======================================================
+"""
+Importación masiva: une muchos archivos de voicings en una sola librería.
+
+Los archivos se parsean y normalizan en paralelo (ProcessPoolExecutor, un
+archivo por tarea) y después se unen en el proceso principal, siempre en
+orden alfabético de ruta, así el resultado es el mismo con 1 o con N cores:
+
+- duplicados: dos voicings con las mismas notas MIDI (ordenadas) son el
+  mismo; se conserva el primero.
+- nombres: un voicing distinto con un nombre ya usado pasa a "nombre (2)",
+  "nombre (3)", ...
+- hotkeys: la primera aparición de cada hotkey la conserva; en las
+  siguientes se quita.
+- voicings sin notas o con notas desconocidas se descartan.
+
+Uso por línea de comandos:
+    python -m storage_engine.bulk_import master.json carpeta/ otro.json --workers 8
+"""
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from storage_engine.voicing_storage import parse_voicings_file, save_voicings_as_other_file
+
+EXTENSIONES = (".json", ".vman", ".vbin", ".sqlite", ".sqlite3", ".db")
+
+
+## -----------------------------
+## function: expand_paths
+## description: Archivos de voicings en `paths` (las carpetas se recorren
+##              recursivamente), sin repetir y en orden alfabético.
+## -----------------------------
+def expand_paths(paths):
+    archivos = set()
+    for p in paths:
+        if os.path.isdir(p):
+            for base, _, nombres in os.walk(p):
+                for n in nombres:
+                    if n.lower().endswith(EXTENSIONES) and not n.startswith("."):
+                        archivos.add(os.path.abspath(os.path.join(base, n)))
+        else:
+            archivos.add(os.path.abspath(p))
+    return sorted(archivos)
+
+
+## -----------------------------
+## function: _parse_file
+## description: (proceso del pool) Lee y normaliza un archivo. Sin load_cache:
+##              el cache es por proceso y se pierde al terminar el pool.
+## \return: (ruta, [(voicing, midi_sorted, valido)], error)
+## -----------------------------
+def _parse_file(path):
+    try:
+        voicings = parse_voicings_file(path)
+    except Exception as exc:
+        return path, [], f"{type(exc).__name__}: {exc}"
+    # dicts planos: se serializan más rápido de vuelta al proceso principal
+    return path, [(dict(v), v.midi_sorted, v.valid) for v in voicings], None
+
+
+def _nombre_libre(nombre, usados):
+    if nombre not in usados:
+        return nombre
+    k = 2
+    while f"{nombre} ({k})" in usados:
+        k += 1
+    return f"{nombre} ({k})"
+
+
+## -----------------------------
+## function: merge_parsed
+## description: Une los resultados de _parse_file (en el orden recibido).
+## \return: (voicings unidos, reporte)
+## -----------------------------
+def merge_parsed(resultados, keep_duplicates=False):
+    merged = []
+    vistos = set()
+    nombres = set()
+    hotkeys = set()
+    reporte = {"files": 0, "read": 0, "duplicates": 0, "invalid": 0,
+               "renamed": [], "hotkeys_dropped": [], "errors": {}}
+
+    for path, items, error in resultados:
+        reporte["files"] += 1
+        if error:
+            reporte["errors"][path] = error
+            continue
+        for v, midi_sorted, valido in items:
+            reporte["read"] += 1
+            if not valido:
+                reporte["invalid"] += 1
+                continue
+            if midi_sorted in vistos and not keep_duplicates:
+                reporte["duplicates"] += 1
+                continue
+            vistos.add(midi_sorted)
+
+            nombre = v.get("name", "(unnamed)")
+            nuevo = _nombre_libre(nombre, nombres)
+            if nuevo != nombre:
+                reporte["renamed"].append([path, nombre, nuevo])
+                v["name"] = nuevo
+            nombres.add(nuevo)
+
+            hk = v.get("hotkey")
+            if hk:
+                if hk in hotkeys:
+                    reporte["hotkeys_dropped"].append([path, nuevo, hk])
+                    del v["hotkey"]
+                else:
+                    hotkeys.add(hk)
+            merged.append(v)
+
+    reporte["written"] = len(merged)
+    return merged, reporte
+
+
+## -----------------------------
+## function: bulk_import
+## description: Lee todos los archivos en paralelo y los une.
+## \param paths: archivos y/o carpetas.
+## \param output: si se indica, ruta donde guardar la librería unida
+##                (JSON, .vman, .vbin o SQLite según la extensión).
+## \param workers: procesos del pool (None = cantidad de cores).
+## \return: (voicings unidos, reporte)
+## -----------------------------
+def bulk_import(paths, output=None, workers=None, keep_duplicates=False):
+    archivos = expand_paths(paths)
+    if output:
+        salida = os.path.abspath(output)
+        archivos = [a for a in archivos if a != salida]
+
+    if workers == 1 or len(archivos) < 2:
+        resultados = [_parse_file(a) for a in archivos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # chunksize > 1: miles de archivos chicos no pagan un viaje IPC cada uno
+            chunksize = max(1, len(archivos) // ((workers or os.cpu_count() or 1) * 8))
+            resultados = list(pool.map(_parse_file, archivos, chunksize=chunksize))
+
+    merged, reporte = merge_parsed(resultados, keep_duplicates)
+    if output:
+        save_voicings_as_other_file(merged, output)
+    return merged, reporte
+
+
+def _main(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m storage_engine.bulk_import",
+        description="Une muchos archivos de voicings en una sola librería.")
+    parser.add_argument("output", help="librería resultante (.json, .vman, .vbin, .sqlite)")
+    parser.add_argument("sources", nargs="+", help="archivos o carpetas a importar")
+    parser.add_argument("--workers", type=int, default=None, help="procesos en paralelo")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="no descartar voicings con las mismas notas")
+    parser.add_argument("--report", help="guardar el reporte completo en este JSON")
+    args = parser.parse_args(argv)
+
+    _, reporte = bulk_import(args.sources, args.output, args.workers, args.keep_duplicates)
+
+    print(f"{reporte['files']} archivos, {reporte['read']} voicings leídos, "
+          f"{reporte['written']} escritos en {args.output}")
+    print(f"duplicados: {reporte['duplicates']}  inválidos: {reporte['invalid']}  "
+          f"renombrados: {len(reporte['renamed'])}  hotkeys quitados: {len(reporte['hotkeys_dropped'])}")
+    for path, error in reporte["errors"].items():
+        print(f"error en {path}: {error}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=4, ensure_ascii=False)
+    return 1 if reporte["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,294 @@
+# ======================================================
+# FILE: storage_engine/content_store.py
+# ======================================================
+"""
+Almacén direccionado por contenido para librerías de voicings.
+
+Cada combinación única de notas se guarda una sola vez en
+<carpeta>/voicing_store/objects.jsonl (append-only, una línea por objeto):
+
+    {"id": "3f9a...", "notes": ["C3", "E3", "G3", "B3"]}
+
+y los archivos de voicings pasan a ser manifiestos livianos que solo guardan
+nombre, root, hotkey y el id de las notas:
+
+    {"manifest": 1, "store": "voicing_store", "gen": "...",
+     "voicings": [{"name": "maj7", "root": "C3", "id": "3f9a...", "hotkey": "1"}]}
+
+El id es el hash de la tupla de notas tal como están escritas ("D#3" y "Eb3"
+dan el mismo MIDI pero se conservan por separado para no perder la
+ortografía al volver a JSON).
+
+Las claves propias del voicing que chocan con las del manifiesto ("id",
+"extra") se guardan dentro de "extra" de su entrada, así no pisan el id de
+las notas y vuelven tal cual al leer.
+
+load_voicings / read_voicings_file detectan los manifiestos y los resuelven
+solos; el store se lee una vez y queda en load_cache, así que abrir diez
+variantes de la misma librería cuesta lo mismo que leer sus voicings únicos.
+
+Uso por línea de comandos:
+    python -m storage_engine.content_store pack voicingsClose.json voicingsDrop2.json ...
+    python -m storage_engine.content_store unpack voicingsClose.json ...
+"""
+import os
+import sys
+import json
+import hashlib
+import threading
+
+from storage_engine.saver import atomic_write_json
+from storage_engine.load_cache import load_cache
+
+MANIFEST_VERSION = 1
+STORE_DIRNAME = "voicing_store"
+OBJECTS_FILE = "objects.jsonl"
+
+# claves de las entradas del manifiesto (además de name y root)
+_CLAVES_MANIFIESTO = ("id", "extra")
+
+_lock = threading.Lock()
+
+
+class StoreError(ValueError):
+    """Manifiesto cuyo store no se puede leer o no tiene alguno de sus objetos."""
+
+
+## -----------------------------
+## function: voicing_key
+## description: Id de contenido de una lista de notas.
+## -----------------------------
+def voicing_key(notes):
+    h = hashlib.blake2b(digest_size=10)
+    h.update("\x00".join(notes).encode("utf-8"))
+    return h.hexdigest()
+
+
+def is_manifest_path(path):
+    """Extensión usada por Save As para guardar directamente como manifiesto."""
+    return os.fspath(path).lower().endswith(".vman")
+
+
+def is_manifest(data):
+    return isinstance(data, dict) and "manifest" in data
+
+
+## -----------------------------
+## function: is_manifest_file
+## description: Mira solo el comienzo del archivo (write_manifest escribe
+##              la clave "manifest" primero).
+## -----------------------------
+def is_manifest_file(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            inicio = f.read(64)
+    except (OSError, UnicodeDecodeError):
+        return False
+    return inicio.lstrip().lstrip("{").lstrip().startswith('"manifest"')
+
+
+class VoicingStore:
+    """objects.jsonl de una carpeta: id -> tupla de notas."""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self.path = os.path.join(self.directory, OBJECTS_FILE)
+
+    @staticmethod
+    def _leer(path):
+        objetos = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    o = json.loads(line)
+                    objetos[o["id"]] = tuple(o["notes"])
+                except (ValueError, KeyError, TypeError):
+                    # línea incompleta (crash a mitad de append): se saltea; si
+                    # un manifiesto usa ese objeto, voicings_from_manifest falla
+                    continue
+        return objetos
+
+    ## -----------------------------
+    ## function: objects
+    ## description: Todos los objetos del store (cacheado por mtime/tamaño).
+    ##              El dict devuelto es compartido: no modificarlo.
+    ##              StoreError si el archivo no se puede leer.
+    ## -----------------------------
+    def objects(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            return load_cache.get("voicing_store", self.path, self._leer)
+        except (OSError, UnicodeDecodeError) as e:
+            raise StoreError(f"No se pudo leer el store {self.path}: {e}") from e
+
+    ## -----------------------------
+    ## function: _cut_torn_tail
+    ## description: Si el archivo no termina en salto de línea (crash a mitad
+    ##              de append) lo corta después del último; si no, el próximo
+    ##              append quedaría pegado a esa línea incompleta.
+    ## -----------------------------
+    def _cut_torn_tail(self):
+        try:
+            f = open(self.path, "rb+")
+        except FileNotFoundError:
+            return
+        with f:
+            fin = f.seek(0, os.SEEK_END)
+            if fin == 0:
+                return
+            f.seek(fin - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = fin
+            while pos > 0:
+                inicio = max(0, pos - 4096)
+                f.seek(inicio)
+                k = f.read(pos - inicio).rfind(b"\n")
+                if k >= 0:
+                    pos = inicio + k + 1
+                    break
+                pos = inicio
+            f.truncate(pos)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self):
+        return len(self.objects())
+
+    def __contains__(self, key):
+        return key in self.objects()
+
+    def get(self, key):
+        return self.objects().get(key)
+
+    ## -----------------------------
+    ## function: put_many
+    ## description: Agrega las listas de notas que todavía no estén.
+    ## \return: lista de ids (uno por cada lista de notas)
+    ## -----------------------------
+    def put_many(self, notes_lists):
+        with _lock:
+            existentes = self.objects()
+            keys = []
+            nuevos = {}
+            for notes in notes_lists:
+                k = voicing_key(notes)
+                keys.append(k)
+                if k not in existentes and k not in nuevos:
+                    nuevos[k] = list(notes)
+            if nuevos:
+                os.makedirs(self.directory, exist_ok=True)
+                self._cut_torn_tail()
+                lines = "".join(json.dumps({"id": k, "notes": n}, ensure_ascii=False) + "\n"
+                                for k, n in nuevos.items())
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+        return keys
+
+
+def _store_for(manifest_path, data=None):
+    nombre = (data or {}).get("store", STORE_DIRNAME)
+    return VoicingStore(os.path.join(os.path.dirname(os.path.abspath(manifest_path)), nombre))
+
+
+## -----------------------------
+## function: voicings_from_manifest
+## description: Resuelve un manifiesto ya parseado a la lista de voicings.
+##              StoreError si falta el store o alguno de sus objetos.
+## \param data: contenido del manifiesto.
+## \param manifest_path: ruta del manifiesto (el store es relativo a ella).
+## -----------------------------
+def voicings_from_manifest(data, manifest_path):
+    objetos = _store_for(manifest_path, data).objects()
+    voicings = []
+    for e in data.get("voicings", []):
+        notes = objetos.get(e.get("id"))
+        if notes is None:
+            raise StoreError(f"Objeto '{e.get('id')}' no encontrado en el store de {manifest_path}")
+        v = {"name": e.get("name", "(unnamed)")}
+        if "root" in e:
+            v["root"] = e["root"]
+        v["notes"] = list(notes)
+        for k, val in e.items():
+            if k not in ("name", "root") and k not in _CLAVES_MANIFIESTO:
+                v[k] = val
+        if isinstance(e.get("extra"), dict):
+            v.update(e["extra"])
+        voicings.append(v)
+    return voicings
+
+
+## -----------------------------
+## function: write_manifest
+## description: Guarda `voicings` como manifiesto en `path` (las notas nuevas
+##              se agregan al store de esa carpeta). Escritura atómica.
+## -----------------------------
+def write_manifest(voicings, path, gen=None, store_dirname=STORE_DIRNAME):
+    store = _store_for(path, {"store": store_dirname})
+    keys = store.put_many([tuple(v.get("notes", [])) for v in voicings])
+
+    entradas = []
+    for v, k in zip(voicings, keys):
+        e = {"name": v.get("name", "(unnamed)")}
+        if "root" in v:
+            e["root"] = v["root"]
+        e["id"] = k
+        for key, val in v.items():
+            if key in _CLAVES_MANIFIESTO:
+                e.setdefault("extra", {})[key] = val
+            elif key not in ("name", "root", "notes"):
+                e[key] = val
+        entradas.append(e)
+
+    data = {"manifest": MANIFEST_VERSION, "store": store_dirname}
+    if gen is not None:
+        data["gen"] = gen
+    data["voicings"] = entradas
+    atomic_write_json(path, data)
+
+
+def pack_file(path):
+    """Convierte un voicings.json normal en manifiesto (in-place)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if is_manifest(data):
+        return len(data.get("voicings", []))
+    write_manifest(data.get("voicings", []), path, gen=data.get("gen"))
+    return len(data.get("voicings", []))
+
+
+def unpack_file(path):
+    """Convierte un manifiesto de vuelta a voicings.json normal (in-place)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not is_manifest(data):
+        return len(data.get("voicings", []))
+    voicings = voicings_from_manifest(data, path)
+    salida = {"voicings": voicings}
+    if data.get("gen") is not None:
+        salida["gen"] = data["gen"]
+    atomic_write_json(path, salida)
+    return len(voicings)
+
+
+def _main(argv):
+    if len(argv) < 2 or argv[0] not in ("pack", "unpack"):
+        print("uso: python -m storage_engine.content_store pack|unpack ARCHIVO.json ...")
+        return 2
+    convertir = pack_file if argv[0] == "pack" else unpack_file
+    total = 0
+    for path in argv[1:]:
+        total += convertir(path)
+    if argv[0] == "pack":
+        store = _store_for(argv[1])
+        print(f"{total} voicings en {len(argv) - 1} archivos -> {len(store)} objetos únicos en {store.path}")
+    else:
+        print(f"{total} voicings restaurados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,175 @@
+# ======================================================
+# FILE: storage_engine/journal.py
+# ======================================================
+"""
+Journal de cambios (append-only, JSON lines) junto a un snapshot.
+
+En vez de reescribir toda la librería por cada cambio pequeño, se agrega una
+línea por cambio a "<snapshot>.journal":
+
+    {"gen": "<generación>"}                          <- cabecera
+    {"op": "add", "index": 3, "value": {...}}
+    {"op": "update", "index": 0, "value": {...}}
+    {"op": "delete", "index": 5}
+    {"op": "move", "index": 2, "to": 1}
+
+Al cargar se lee el snapshot y se reaplican los cambios. La cabecera lleva la
+generación del snapshot al que pertenece el journal: cuando el snapshot se
+reescribe (compactación o guardado completo) recibe una generación nueva y el
+journal anterior deja de aplicarse aunque el proceso muera entre ambos pasos.
+
+La cabecera guarda también un hash del snapshot ("snapshot"): si alguien
+edita el archivo a mano y deja el mismo "gen", el hash ya no coincide y el
+journal se descarta en vez de reaplicarse sobre otro contenido.
+"""
+import os
+import json
+import uuid
+import hashlib
+
+from storage_engine.saver import atomic_write_text, json_default
+
+# Tamaño a partir del cual se compacta el journal en un snapshot nuevo
+JOURNAL_MAX_BYTES = 256 * 1024
+
+OPERACIONES = ("add", "update", "delete", "move")
+
+# ruta -> ((mtime_ns, tamaño), hash): no se rehashea un snapshot que no cambió
+_digests = {}
+
+
+def new_generation():
+    return uuid.uuid4().hex
+
+
+## -----------------------------
+## function: snapshot_digest
+## description: Hash del contenido de un snapshot (None si no existe).
+## -----------------------------
+def snapshot_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            estado = (st.st_mtime_ns, st.st_size)
+            previo = _digests.get(path)
+            if previo is not None and previo[0] == estado:
+                return previo[1]
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+    except OSError:
+        return None
+    _digests[path] = (estado, h.hexdigest())
+    return h.hexdigest()
+
+
+## -----------------------------
+## function: apply_records
+## description: Reaplica registros del journal sobre una lista (in-place).
+## \param items: lista a modificar.
+## \param records: registros del journal.
+## \param from_value: convierte el "value" guardado al tipo de la lista.
+## \return: la misma lista.
+## -----------------------------
+def apply_records(items, records, from_value=None):
+    for r in records:
+        op = r.get("op")
+        i = r.get("index", 0)
+        if op == "add":
+            value = from_value(r["value"]) if from_value else r["value"]
+            items.insert(min(i, len(items)), value)
+        elif op == "update" and 0 <= i < len(items):
+            items[i] = from_value(r["value"]) if from_value else r["value"]
+        elif op == "delete" and 0 <= i < len(items):
+            del items[i]
+        elif op == "move" and 0 <= i < len(items):
+            item = items.pop(i)
+            items.insert(min(r.get("to", i), len(items)), item)
+    return items
+
+
+class ChangeJournal:
+    """Journal asociado a un archivo snapshot."""
+
+    def __init__(self, snapshot_path, max_bytes=JOURNAL_MAX_BYTES):
+        self.snapshot_path = os.path.abspath(snapshot_path)
+        self.path = self.snapshot_path + ".journal"
+        self.max_bytes = max_bytes
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _header(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+
+    def _matches(self, header, gen):
+        if not isinstance(header, dict) or header.get("gen") != gen:
+            return False
+        # journals de antes del hash: solo por generación
+        return "snapshot" not in header or header["snapshot"] == snapshot_digest(self.snapshot_path)
+
+    ## -----------------------------
+    ## function: read
+    ## description: Registros válidos para la generación `gen` del snapshot.
+    ##              Si el journal es de otra generación (o el snapshot cambió
+    ##              desde que se empezó el journal) se ignora; una última
+    ##              línea incompleta (crash a mitad de append) se descarta.
+    ## -----------------------------
+    def read(self, gen):
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                try:
+                    header = json.loads(f.readline())
+                except ValueError:
+                    return []
+                if not self._matches(header, gen):
+                    return []
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except ValueError:
+                        break
+                    if isinstance(r, dict) and r.get("op") in OPERACIONES:
+                        records.append(r)
+        except OSError:
+            return []
+        return records
+
+    def has_records(self, gen):
+        return bool(self.read(gen))
+
+    ## -----------------------------
+    ## function: append
+    ## description: Agrega registros al journal de la generación `gen`.
+    ##              Si el journal no existe o es de otra generación, se reinicia
+    ##              (con el hash del snapshot que hay en disco).
+    ## \return: True si hay que compactar: el journal superó el tamaño máximo
+    ##          o el snapshot ya no es el del journal.
+    ## -----------------------------
+    def append(self, records, gen):
+        header = self._header()
+        if not isinstance(header, dict) or header.get("gen") != gen:
+            self.reset(gen)
+        elif not self._matches(header, gen):
+            # el snapshot cambió por fuera: estos registros ya no se
+            # reaplicarían, hay que guardar la lista completa
+            return True
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=json_default) + "\n" for r in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+        return self.size() > self.max_bytes
+
+    def reset(self, gen):
+        """Journal vacío (solo cabecera) para la generación `gen` del snapshot
+        que está en disco (llamar después de escribirlo)."""
+        header = {"gen": gen, "snapshot": snapshot_digest(self.snapshot_path)}
+        atomic_write_text(self.path, json.dumps(header) + "\n")
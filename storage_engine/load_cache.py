@@ -0,0 +1,108 @@
+# ======================================================
+# FILE: storage_engine/load_cache.py
+# ======================================================
+"""
+Cache de librerías ya parseadas, compartido por todo el proceso.
+
+La clave es (tipo, ruta absoluta) y cada entrada guarda el (mtime_ns, size)
+del archivo al momento de leerlo: si el archivo cambió en disco la entrada se
+descarta y se vuelve a leer. Así alternar entre voicingsClose / Drop2 /
+Drop24 desde Recent solo parsea cada archivo la primera vez.
+
+El valor cacheado nunca se entrega directamente: cada get() devuelve una
+copia hecha con la función `copy` de esa entrada, porque la GUI modifica las
+listas y los dicts que recibe.
+
+La memoria se acota de forma aproximada (tamaño del archivo * EXPANSION, lo
+que ocupa el JSON ya convertido a objetos de Python) con expulsión LRU.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+# bytes en memoria por byte de JSON en disco (estimado)
+EXPANSION = 8
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class LoadCache:
+    """Cache LRU de archivos parseados, acotado por memoria estimada."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # (tipo, ruta) -> (stat, valor, costo)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    ## -----------------------------
+    ## function: get
+    ## description: Devuelve (una copia de) el contenido de `path`, leyéndolo
+    ##              con `loader(path)` solo si no está en cache o cambió.
+    ## \param kind: espacio de nombres ("voicings", "patterns", ...).
+    ## \param loader: función path -> valor parseado y validado.
+    ## \param copy: función valor -> copia entregada al que llama.
+    ## -----------------------------
+    def get(self, kind, path, loader, copy=None):
+        path = os.path.abspath(path)
+        key = (kind, path)
+        stat = _stat_key(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[1]
+                return copy(value) if copy else value
+
+        # la lectura se hace fuera del lock (puede tardar)
+        value = loader(path)
+        costo = stat[1] * EXPANSION
+
+        with self._lock:
+            self.misses += 1
+            # si el archivo cambió mientras se leía, no se guarda en cache
+            try:
+                vigente = _stat_key(path) == stat
+            except OSError:
+                vigente = False
+            if vigente and costo <= self.max_bytes:
+                self._remove(key)
+                self._entries[key] = (stat, value, costo)
+                self.total_bytes += costo
+                self._evict()
+
+        return copy(value) if copy else value
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            _, (_, _, costo) = self._entries.popitem(last=False)
+            self.total_bytes -= costo
+
+    def invalidate(self, path=None):
+        """Descarta las entradas de `path` (o todas)."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.total_bytes = 0
+                return
+            path = os.path.abspath(path)
+            for key in [k for k in self._entries if k[1] == path]:
+                self._remove(key)
+
+
+## Instancia compartida por voicing_storage y rhythm_storage
+load_cache = LoadCache()
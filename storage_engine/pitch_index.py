@@ -0,0 +1,129 @@
+# ======================================================
+# FILE: storage_engine/pitch_index.py
+# ======================================================
+"""
+Índice de voicings por conjunto de clases de altura (máscara de 12 bits).
+
+Los voicings se agrupan en 4096 buckets (uno por máscara posible) en formato
+CSR: `orden` tiene los índices de voicing agrupados por máscara y
+`inicio[m]:inicio[m + 1]` es el tramo del bucket m. Hay un segundo agrupamiento
+igual por FORMA_T (tipo de acorde sin importar la transposición).
+
+Consultas (devuelven arrays de índices en el orden de la librería):
+
+    exact(mask)           mismas clases de altura
+    transpositions(mask)  cualquier transposición del mismo conjunto
+    superset(mask)        contiene todas las clases de mask
+    subset(mask)          todas sus clases están dentro de mask
+    with_interval(ic)     contiene al menos un intervalo de la clase ic (1..6)
+
+Cada consulta recorre a lo sumo los 4096 buckets (constante) más los k
+resultados, así que no depende del tamaño de la librería.
+
+Búsqueda en texto (parse_query / search):
+    "C Eb G A"     igual que "~C Eb G A": cualquier transposición (tipo de acorde)
+    "=C Eb G A"    exactamente esas clases de altura
+    ">C E"         contiene C y E
+    "<C D E G A"   solo usa notas de ese conjunto
+    "ic6"          contiene un tritono (clase de intervalo 6)
+"""
+import numpy as np
+
+from midi_engine.pitch_sets import FORMA_T, VECTOR_INTERVALOS, mascara_de_nombres, mascara_de_midi
+
+N_MASCARAS = 4096
+
+
+def _csr(claves):
+    orden = np.argsort(claves, kind="stable").astype(np.int64)
+    conteos = np.bincount(claves, minlength=N_MASCARAS)
+    inicio = np.zeros(N_MASCARAS + 1, dtype=np.int64)
+    np.cumsum(conteos, out=inicio[1:])
+    return orden, inicio, conteos
+
+
+class PitchClassIndex:
+    """Buckets CSR de voicings por máscara y por forma transpuesta."""
+
+    def __init__(self, masks):
+        self.masks = np.asarray(masks, dtype=np.int64) & 0xFFF
+        self.formas = FORMA_T[self.masks].astype(np.int64)
+        self.orden, self.inicio, self.conteos = _csr(self.masks)
+        self.orden_t, self.inicio_t, _ = _csr(self.formas)
+        # máscaras que tienen al menos un voicing (para subset/superset)
+        self.presentes = np.nonzero(self.conteos)[0]
+
+    ## -----------------------------
+    ## function: from_voicings
+    ## description: Índice de una lista de voicings (usa el pc_mask ya
+    ##              calculado de VoicingRecord; si no, lo calcula).
+    ## -----------------------------
+    @classmethod
+    def from_voicings(cls, voicings):
+        from storage_engine.voicing_record import VoicingRecord, notes_to_midi
+        masks = np.fromiter(
+            (v.pc_mask if isinstance(v, VoicingRecord) else mascara_de_midi(notes_to_midi(v.get("notes", []))[0])
+             for v in voicings),
+            dtype=np.int64, count=len(voicings))
+        return cls(masks)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def _buckets(self, orden, inicio, claves):
+        partes = [orden[inicio[c]:inicio[c + 1]] for c in claves]
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(partes))
+
+    def exact(self, mask):
+        mask &= 0xFFF
+        return np.sort(self.orden[self.inicio[mask]:self.inicio[mask + 1]])
+
+    def transpositions(self, mask):
+        forma = int(FORMA_T[mask & 0xFFF])
+        return np.sort(self.orden_t[self.inicio_t[forma]:self.inicio_t[forma + 1]])
+
+    def superset(self, mask):
+        mask &= 0xFFF
+        claves = self.presentes[(self.presentes & mask) == mask]
+        return self._buckets(self.orden, self.inicio, claves)
+
+    def subset(self, mask):
+        mask &= 0xFFF
+        claves = self.presentes[(self.presentes & ~mask & 0xFFF) == 0]
+        return self._buckets(self.orden, self.inicio, claves)
+
+    def with_interval(self, ic):
+        if not 1 <= ic <= 6:
+            raise ValueError("La clase de intervalo debe estar entre 1 y 6")
+        claves = self.presentes[VECTOR_INTERVALOS[self.presentes, ic - 1] > 0]
+        return self._buckets(self.orden, self.inicio, claves)
+
+    def search(self, query):
+        modo, valor = parse_query(query)
+        return getattr(self, modo)(valor)
+
+
+_MODOS = {"=": "exact", "~": "transpositions", ">": "superset", "<": "subset"}
+
+
+## -----------------------------
+## function: parse_query
+## description: Convierte una búsqueda en texto (ver docstring del módulo)
+##              en (nombre del método, máscara o clase de intervalo).
+## -----------------------------
+def parse_query(texto):
+    texto = texto.strip()
+    if not texto:
+        raise ValueError("Búsqueda vacía")
+    if texto.lower().startswith("ic") and texto[2:].strip().isdigit():
+        return "with_interval", int(texto[2:])
+    modo = "transpositions"
+    if texto[0] in _MODOS:
+        modo = _MODOS[texto[0]]
+        texto = texto[1:]
+    nombres = texto.replace(",", " ").split()
+    if not nombres:
+        raise ValueError("La búsqueda no tiene notas")
+    return modo, mascara_de_nombres(nombres)
@@ -3,30 +3,261 @@
 # ======================================================
 """
 Funciones para guardar/cargar patrones (JSON) en storage_engine/data
+
+Formato en disco (version 2): los compases se guardan una sola vez en una
+tabla interna y cada patrón referencia sus compases por índice:
+
+    {"version": 2,
+     "compases": [["negra", "negra", "negra", "negra"], ...],
+     "patterns": [{"name": "...", "tempo": 120, "compases": [0, 0, 1]}]}
+
+El formato antiguo (lista plana de patrones) se sigue leyendo sin cambios.
 """
 import os
 import json
 from pathlib import Path
 
+from storage_engine.saver import atomic_write_json, saver
+from storage_engine.journal import ChangeJournal, apply_records, new_generation
+from storage_engine.load_cache import load_cache
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "storage_engine" / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 DEFAULT_FILE = DATA_DIR / "rhythms.json"
 
+FORMAT_VERSION = 2
+
+# path -> (hash de la librería, mtime_ns, size) de la última escritura
+_last_saved = {}
+
+# path -> generación (ver journal.py) del snapshot cargado/escrito
+_generations = {}
+
+
+def build_bar_table(patterns):
+    """Tabla de compases únicos (por hash de contenido) y, por cada patrón,
+    la lista de índices a esa tabla."""
+    from rhythm_engine.patterns import compas_canonico, hash_compas
+
+    tabla = []
+    indices = {}
+    refs = []
+    for p in patterns:
+        fila = []
+        for c in p.iter_compases():
+            h = hash_compas(c)
+            idx = indices.get(h)
+            if idx is None:
+                idx = len(tabla)
+                indices[h] = idx
+                tabla.append(list(compas_canonico(c)))
+            fila.append(idx)
+        refs.append(fila)
+    return tabla, refs
+
+
+def dedupe_report(patterns):
+    """Reporte de patrones estructuralmente idénticos (mismo content_hash).
+
+    Devuelve dict con totales de patrones/compases y la lista de grupos
+    duplicados: [{"hash": ..., "names": [...], "indices": [...]}].
+    """
+    grupos = {}
+    for i, p in enumerate(patterns):
+        grupos.setdefault(p.content_hash(), []).append(i)
+
+    tabla, refs = build_bar_table(patterns)
+    duplicados = [
+        {"hash": h, "names": [patterns[i].name for i in idxs], "indices": idxs}
+        for h, idxs in grupos.items() if len(idxs) > 1
+    ]
+    return {
+        "patterns_total": len(patterns),
+        "patterns_unique": len(grupos),
+        "bars_total": sum(len(r) for r in refs),
+        "bars_unique": len(tabla),
+        "duplicates": duplicados,
+    }
+
+
+def dedupe_patterns(patterns):
+    """Elimina patrones duplicados conservando la primera aparición.
+    Devuelve (lista_sin_duplicados, reporte)."""
+    reporte = dedupe_report(patterns)
+    sobran = set()
+    for grupo in reporte["duplicates"]:
+        sobran.update(grupo["indices"][1:])
+    unicos = [p for i, p in enumerate(patterns) if i not in sobran]
+    return unicos, reporte
+
+
+def library_hash(patterns):
+    """Hash de toda la librería (orden, nombres y contenido)."""
+    import hashlib
+    h = hashlib.blake2b(digest_size=16)
+    for p in patterns:
+        h.update(f"{p.name}\x00{p.content_hash()}\x01".encode("utf-8"))
+    return h.hexdigest()
+
+
+def patterns_to_data(patterns, gen=None):
+    tabla, refs = build_bar_table(patterns)
+    return {
+        "version": FORMAT_VERSION,
+        "gen": gen,
+        "compases": tabla,
+        "patterns": [
+            {"name": p.name, "tempo": p.tempo, "compases": r}
+            for p, r in zip(patterns, refs)
+        ],
+    }
+
+
+def patterns_from_data(raw):
+    from rhythm_engine.patterns import RitmoPattern
+
+    # formato antiguo: lista plana de patrones
+    if isinstance(raw, list):
+        return [RitmoPattern.from_dict(x) for x in raw]
+
+    tabla = raw.get("compases", [])
+    patterns = []
+    for x in raw.get("patterns", []):
+        compases = [list(tabla[i]) for i in x.get("compases", [])]
+        patterns.append(RitmoPattern(
+            name=x.get("name", "new_pattern"),
+            compases=compases or [[]],
+            tempo=x.get("tempo", 120)
+        ))
+    return patterns
+
+
+def _file_state(filepath):
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 def save_patterns(patterns, filepath=None):
     filepath = Path(filepath) if filepath else DEFAULT_FILE
-    data = [p.to_dict() for p in patterns]
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+
+    key = os.path.abspath(filepath)
+    journal = ChangeJournal(filepath)
+
+    # si el contenido no cambió desde la última escritura (y nadie tocó
+    # el archivo ni hay cambios en el journal desde entonces), no reescribir
+    lib_hash = library_hash(patterns)
+    prev = _last_saved.get(key)
+    if (prev and prev[0] == lib_hash and prev[1:] == _file_state(filepath)
+            and not journal.has_records(_generations.get(key))):
+        return
+
+    gen = new_generation()
+    data = patterns_to_data(patterns, gen)
+    atomic_write_json(filepath, data, ensure_ascii=False)
+    # el journal (si existe) queda vacío para la generación nueva
+    if os.path.exists(journal.path) or key in _generations:
+        journal.reset(gen)
+
+    _generations[key] = gen
+    _last_saved[key] = (lib_hash,) + _file_state(filepath)
+
+
+def export_patterns(patterns, filepath):
+    """Exporta los patrones en el formato antiguo (lista plana de patrones,
+    sin tabla de compases ni generación) para usarlos fuera de la app.
+    El formato version 2 queda solo para la librería interna (rhythms.json)."""
+    atomic_write_json(filepath, [p.to_dict() for p in patterns], ensure_ascii=False)
+
+
+def record_pattern_changes(patterns, records, filepath=None):
+    """Registra cambios pequeños en el journal del archivo de ritmos en vez de
+    reescribirlo completo. records: [{"op": ..., "index": i, "value": dict}].
+    Si el journal crece demasiado se compacta en segundo plano."""
+    filepath = Path(filepath) if filepath else DEFAULT_FILE
+    key = os.path.abspath(filepath)
+
+    if saver.has_pending(key) or key not in _generations:
+        schedule_save_patterns(patterns, filepath)
+        return
+
+    try:
+        compactar = ChangeJournal(filepath).append(records, _generations[key])
+    except OSError as exc:
+        print(f"Error al escribir el journal: {exc}")
+        compactar = True
+
+    if compactar:
+        schedule_save_patterns(patterns, filepath)
+
+
+def schedule_save_patterns(patterns, filepath=None):
+    """Guardado diferido en segundo plano (ver saver.DebouncedSaver).
+    Se copia la lista; los patrones guardados no se modifican in-place
+    (la GUI edita siempre una copia en edit_buffer)."""
+    filepath = Path(filepath) if filepath else DEFAULT_FILE
+    snapshot = list(patterns)
+    saver.schedule(os.path.abspath(filepath), lambda: save_patterns(snapshot, filepath))
 
 
 def load_patterns(filepath=None):
     filepath = Path(filepath) if filepath else DEFAULT_FILE
+    saver.flush(os.path.abspath(filepath))
     if not filepath.exists():
         return []
+
+    from rhythm_engine.patterns import RitmoPattern
+    gen, patterns = load_cache.get("patterns", filepath, _read_patterns_json, _copy_entry)
+    _generations[os.path.abspath(filepath)] = gen
+    records = ChangeJournal(filepath).read(gen)
+    return apply_records(patterns, records, RitmoPattern.from_dict)
+
+
+def _read_patterns_json(filepath):
+    """Lectura para load_cache: (generación, tupla de patrones ya convertidos)."""
     with open(filepath, "r", encoding="utf-8") as f:
         raw = json.load(f)
+    gen = raw.get("gen") if isinstance(raw, dict) else None
+    return gen, tuple(patterns_from_data(raw))
+
+
+def _copy_entry(entry):
     from rhythm_engine.patterns import RitmoPattern
-    return [RitmoPattern.from_dict(x) for x in raw]
\ No newline at end of file
+    gen, patterns = entry
+    return gen, [RitmoPattern(p.name, [list(c) for c in p.compases], p.tempo) for p in patterns]
+
+
+def features_path(filepath=None):
+    """Ruta del cache de features junto al archivo de ritmos
+    (rhythms.json -> rhythms.features.npz)."""
+    filepath = Path(filepath) if filepath else DEFAULT_FILE
+    return filepath.with_suffix(".features.npz")
+
+
+def load_feature_table(filepath=None):
+    from rhythm_engine.features import TablaFeatures, COLUMNAS
+    import numpy as np
+
+    path = features_path(filepath)
+    if not path.exists():
+        return TablaFeatures()
+    try:
+        with np.load(path) as data:
+            return TablaFeatures(data["hashes"], {c: data[c] for c in COLUMNAS})
+    except Exception:
+        # cache corrupto o de otra versión: se recalcula
+        return TablaFeatures()
+
+
+def save_feature_table(tabla, filepath=None):
+    import numpy as np
+
+    path = features_path(filepath)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, hashes=tabla.hashes, **tabla.columnas)
+    os.replace(tmp, path)
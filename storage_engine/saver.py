@@ -0,0 +1,202 @@
+# ======================================================
+# FILE: storage_engine/saver.py
+# ======================================================
+"""
+Escritura atómica de JSON y guardado diferido (write-behind) en segundo plano.
+
+- atomic_write_json: escribe en un archivo temporal del mismo directorio y lo
+  reemplaza con os.replace, así un crash a mitad de escritura nunca deja el
+  archivo de la librería corrupto.
+- DebouncedSaver: agrupa ráfagas de cambios sobre el mismo archivo en una sola
+  escritura, que ocurre en un hilo de fondo tras `delay` segundos sin cambios.
+  El hilo de Tk solo toma una copia de los datos y vuelve inmediatamente.
+
+Al salir del proceso se hace flush de lo pendiente (atexit); main.py también
+llama a flush_pending_saves() al cerrar la ventana principal.
+"""
+import os
+import json
+import stat
+import time
+import atexit
+import tempfile
+import threading
+
+# umask del proceso (se lee una vez al importar: os.umask solo se puede leer
+# cambiándolo). mkstemp crea los temporales con 0600; ver _file_mode.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+## -----------------------------
+## function: json_default
+## description: `default` para json.dump/dumps: convierte los objetos que se
+##              usan como dict sin serlo (VoicingRecord) con su to_dict().
+## -----------------------------
+def json_default(o):
+    to_dict = getattr(o, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+    return to_dict()
+
+
+## -----------------------------
+## function: atomic_write_json
+## description: Escribe `data` como JSON de forma atómica (temp + os.replace).
+## \param path: ruta destino.
+## \param data: objeto serializable.
+## -----------------------------
+def atomic_write_json(path, data, indent=4, ensure_ascii=True):
+    _atomic_write(path, lambda f: json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii,
+                                            default=json_default))
+
+
+## -----------------------------
+## function: atomic_write_text
+## description: Igual que atomic_write_json pero con texto ya armado.
+## -----------------------------
+def atomic_write_text(path, text):
+    _atomic_write(path, lambda f: f.write(text))
+
+
+## -----------------------------
+## function: atomic_write_chunks
+## description: Igual que atomic_write_text pero con el texto en partes
+##              (un iterable de strings); no se arma entero en memoria.
+## -----------------------------
+def atomic_write_chunks(path, chunks):
+    _atomic_write(path, lambda f: f.writelines(chunks))
+
+
+## -----------------------------
+## function: atomic_write_bytes
+## description: Igual que atomic_write_json para contenido binario;
+##              `write` recibe el archivo abierto en modo "wb".
+## -----------------------------
+def atomic_write_bytes(path, write):
+    _atomic_write(path, write, binary=True)
+
+
+## -----------------------------
+## function: _file_mode
+## description: Permisos que tiene que quedar teniendo `path` después de
+##              reemplazarlo: los del archivo actual, o los de un archivo
+##              nuevo creado con open() (0666 menos el umask).
+## -----------------------------
+def _file_mode(path):
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _atomic_write(path, write, binary=False):
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, _file_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class DebouncedSaver:
+    """Guardado diferido por clave (normalmente la ruta del archivo).
+
+    schedule(key, writer) reemplaza cualquier escritura pendiente de esa
+    clave y reinicia su espera; writer es un callable sin argumentos que hace
+    la escritura real (y ya tiene su propia copia de los datos).
+    """
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._pending = {}  # key -> (writer, deadline)
+        self._inflight = set()  # claves que se están escribiendo ahora mismo
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # serializa escrituras (hilo de fondo / flush)
+        self._thread = None
+
+    def schedule(self, key, writer):
+        with self._cond:
+            self._pending[key] = (writer, time.monotonic() + self.delay)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="DebouncedSaver", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def has_pending(self, key=None):
+        """True si hay una escritura pendiente o en curso (de `key` o de cualquiera)."""
+        with self._cond:
+            if key is None:
+                return bool(self._pending or self._inflight)
+            return key in self._pending or key in self._inflight
+
+    def _take(self, key):
+        with self._cond:
+            item = self._pending.pop(key, None)
+            if item:
+                self._inflight.add(key)
+        return item[0] if item else None
+
+    def _write(self, key, writer):
+        try:
+            writer()
+        except Exception as exc:
+            print(f"Error al guardar '{key}': {exc}")
+        finally:
+            with self._cond:
+                self._inflight.discard(key)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    # sin trabajo: el hilo termina y se recrea en el próximo schedule
+                    self._thread = None
+                    return
+                ahora = time.monotonic()
+                vencidos = [k for k, (_, t) in self._pending.items() if t <= ahora]
+                if not vencidos:
+                    proximo = min(t for _, t in self._pending.values())
+                    self._cond.wait(proximo - ahora)
+                    continue
+
+            for key in vencidos:
+                with self._write_lock:
+                    writer = self._take(key)
+                    if writer:
+                        self._write(key, writer)
+
+    ## -----------------------------
+    ## function: flush
+    ## description: Escribe ya (en el hilo que llama) lo pendiente de `key`,
+    ##              o todo si key es None.
+    ## -----------------------------
+    def flush(self, key=None):
+        with self._cond:
+            keys = list(self._pending) if key is None else [key]
+        for k in keys:
+            with self._write_lock:
+                writer = self._take(k)
+                if writer:
+                    self._write(k, writer)
+
+
+## Instancia compartida por voicing_storage y rhythm_storage
+saver = DebouncedSaver()
+
+
+def flush_pending_saves(key=None):
+    saver.flush(key)
+
+
+atexit.register(flush_pending_saves)
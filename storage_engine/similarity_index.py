@@ -0,0 +1,139 @@
+# ======================================================
+# FILE: storage_engine/similarity_index.py
+# ======================================================
+"""
+Búsqueda de los k voicings más parecidos a uno dado.
+
+Distancia entre dos voicings a y b (notas MIDI ordenadas de grave a aguda,
+completadas repitiendo la aguda hasta el mismo ancho W):
+
+    VOICE_LEADING * sum|a_i - b_i| / W      movimiento promedio por voz
+  + PITCH_CLASSES * |clases(a) xor clases(b)|   clases de altura distintas
+  + REGISTER      * |media(a) - media(b)|   registro
+
+Como sum|a_i - b_i| / W >= |media(a) - media(b)|, la distancia nunca es menor
+que (VOICE_LEADING + REGISTER) * |media(a) - media(b)|. El índice guarda los
+voicings ordenados por altura media y busca hacia los dos lados desde la
+media del voicing consultado, por bloques (cada bloque con NumPy); en cuanto
+esa cota del próximo bloque supera al k-ésimo mejor, el resto no se mira.
+"""
+import numpy as np
+
+from midi_engine.pitch_sets import CARDINAL, mascara_de_midi
+
+VOICE_LEADING = 1.0
+PITCH_CLASSES = 1.0
+REGISTER = 0.5
+BLOCK = 4096
+
+
+def _pad(midi, width):
+    """Completa las filas (ya ordenadas) repitiendo la última columna."""
+    if midi.shape[1] >= width:
+        return midi
+    extra = np.repeat(midi[:, -1:], width - midi.shape[1], axis=1)
+    return np.concatenate([midi, extra], axis=1)
+
+
+class SimilarityIndex:
+    """Voicings ordenados por altura media para k-NN con poda."""
+
+    def __init__(self, midi_lists, weights=(VOICE_LEADING, PITCH_CLASSES, REGISTER)):
+        self.weights = weights
+        validos = [i for i, m in enumerate(midi_lists) if m]
+        self.width = max((len(midi_lists[i]) for i in validos), default=1)
+
+        midi = np.zeros((len(validos), self.width), dtype=np.int16)
+        for fila, i in enumerate(validos):
+            notas = sorted(midi_lists[i])
+            midi[fila, :len(notas)] = notas
+            midi[fila, len(notas):] = notas[-1]
+        masks = np.bitwise_or.reduce(np.left_shift(1, midi % 12).astype(np.int64), axis=1) \
+            if len(validos) else np.zeros(0, dtype=np.int64)
+        means = midi.mean(axis=1) if len(validos) else np.zeros(0)
+
+        orden = np.argsort(means, kind="stable")
+        self.ids = np.array(validos, dtype=np.int64)[orden]
+        self.midi = midi[orden]
+        self.masks = masks[orden]
+        self.means = means[orden]
+
+    ## -----------------------------
+    ## function: from_voicings
+    ## description: Índice de una lista de voicings (VoicingRecord usa sus
+    ##              datos MIDI ya calculados). Los ids de los resultados son
+    ##              posiciones en esa lista.
+    ## -----------------------------
+    @classmethod
+    def from_voicings(cls, voicings, **kwargs):
+        from storage_engine.voicing_record import normalize_voicing
+        midi = []
+        for v in voicings:
+            if not hasattr(v, "midi_sorted"):
+                v = normalize_voicing(v)
+            midi.append(v.midi_sorted if v.valid else ())
+        return cls(midi, **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _distances(self, q, q_mask, q_mean, lo, hi):
+        vl, pc, reg = self.weights
+        bloque = _pad(self.midi[lo:hi], len(q))
+        # con una consulta más ancha que el índice las medias guardadas no
+        # sirven: se calculan sobre las filas completadas hasta su ancho
+        medias = self.means[lo:hi] if len(q) == self.width else bloque.mean(axis=1)
+        d = vl * np.abs(bloque - q).sum(axis=1) / len(q)
+        d += pc * CARDINAL[self.masks[lo:hi] ^ q_mask]
+        d += reg * np.abs(medias - q_mean)
+        return d
+
+    ## -----------------------------
+    ## function: nearest
+    ## description: Los k voicings más cercanos a `midi`.
+    ## \param midi: notas MIDI del voicing consultado.
+    ## \param exclude: id a dejar afuera (el propio voicing).
+    ## \return: lista de (id, distancia) de menor a mayor distancia
+    ## -----------------------------
+    def nearest(self, midi, k=20, exclude=None):
+        if not midi or not len(self.ids):
+            return []
+        q = np.sort(np.fromiter(midi, dtype=np.int16))
+        q = _pad(q[None, :], self.width)[0]
+        q_mean = float(q.mean())
+        q_mask = mascara_de_midi(midi)
+        # con un voicing más ancho que el índice las medias no son comparables: sin poda
+        cota = self.weights[0] + self.weights[2] if len(midi) <= self.width else 0.0
+
+        # ventana [izq, der) ya revisada, que crece desde la posición de q_mean
+        izq = der = int(np.searchsorted(self.means, q_mean))
+        n = len(self.ids)
+        mejores_ids = np.zeros(0, dtype=np.int64)
+        mejores_d = np.zeros(0)
+
+        while izq > 0 or der < n:
+            lb_izq = cota * (q_mean - self.means[izq - 1]) if izq > 0 else np.inf
+            lb_der = cota * (self.means[der] - q_mean) if der < n else np.inf
+            if len(mejores_d) >= k and min(lb_izq, lb_der) > mejores_d[-1]:
+                break
+            if lb_izq <= lb_der:
+                lo, hi = max(0, izq - BLOCK), izq
+                izq = lo
+            else:
+                lo, hi = der, min(n, der + BLOCK)
+                der = hi
+
+            d = self._distances(q, q_mask, q_mean, lo, hi)
+            ids = self.ids[lo:hi]
+            if exclude is not None:
+                d = np.where(ids == exclude, np.inf, d)
+            todos_d = np.concatenate([mejores_d, d])
+            todos_ids = np.concatenate([mejores_ids, ids])
+            if len(todos_d) > k:
+                sel = np.argpartition(todos_d, k - 1)[:k]
+                todos_d, todos_ids = todos_d[sel], todos_ids[sel]
+            orden = np.lexsort((todos_ids, todos_d))
+            mejores_d, mejores_ids = todos_d[orden], todos_ids[orden]
+
+        resultado = [(int(i), float(d)) for i, d in zip(mejores_ids, mejores_d) if np.isfinite(d)]
+        return resultado[:k]
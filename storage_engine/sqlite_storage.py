@@ -0,0 +1,340 @@
+# ======================================================
+# FILE: storage_engine/sqlite_storage.py
+# ======================================================
+"""
+Backend opcional en SQLite (stdlib sqlite3, modo WAL) para librerías grandes
+de voicings y ritmos.
+
+Tablas:
+    voicings(id, position, name, root, hotkey, pc_mask, n_notes, extra)
+    notes(voicing_id, ord, name, midi)
+    patterns(id, position, name, tempo, compases, content_hash)
+
+Índices sobre name / root / hotkey / pc_mask (y notes.midi), así las búsquedas
+no recorren toda la lista y la GUI puede pedir páginas (LIMIT/OFFSET) en vez
+de parsear el archivo completo.
+
+import_*/export_* convierten desde/hacia los JSON actuales sin pérdida
+(incluidas claves extra de cada voicing y la ausencia de "hotkey").
+
+Uso por línea de comandos:
+    python -m storage_engine.sqlite_storage import voicings.json lib.sqlite
+    python -m storage_engine.sqlite_storage export lib.sqlite voicings.json
+"""
+import os
+import sys
+import json
+import sqlite3
+
+from midi_engine.notes_db import BD_Notas_Midi
+from midi_engine.pitch_sets import mascara_de_midi
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS voicings (
+    id        INTEGER PRIMARY KEY,
+    position  INTEGER NOT NULL,
+    name      TEXT NOT NULL,
+    root      TEXT,
+    hotkey    TEXT,
+    pc_mask   INTEGER NOT NULL DEFAULT 0,
+    n_notes   INTEGER NOT NULL DEFAULT 0,
+    extra     TEXT
+);
+CREATE TABLE IF NOT EXISTS notes (
+    voicing_id INTEGER NOT NULL REFERENCES voicings(id) ON DELETE CASCADE,
+    ord        INTEGER NOT NULL,
+    name       TEXT NOT NULL,
+    midi       INTEGER,
+    PRIMARY KEY (voicing_id, ord)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS patterns (
+    id           INTEGER PRIMARY KEY,
+    position     INTEGER NOT NULL,
+    name         TEXT NOT NULL,
+    tempo        INTEGER NOT NULL DEFAULT 120,
+    compases     TEXT NOT NULL,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_voicings_position ON voicings(position);
+CREATE INDEX IF NOT EXISTS idx_voicings_name     ON voicings(name);
+CREATE INDEX IF NOT EXISTS idx_voicings_root     ON voicings(root);
+CREATE INDEX IF NOT EXISTS idx_voicings_hotkey   ON voicings(hotkey);
+CREATE INDEX IF NOT EXISTS idx_voicings_pc_mask  ON voicings(pc_mask);
+CREATE INDEX IF NOT EXISTS idx_notes_midi        ON notes(midi);
+CREATE INDEX IF NOT EXISTS idx_patterns_position ON patterns(position);
+CREATE INDEX IF NOT EXISTS idx_patterns_name     ON patterns(name);
+CREATE INDEX IF NOT EXISTS idx_patterns_hash     ON patterns(content_hash);
+"""
+
+# claves que tienen columna propia; el resto va a "extra" (JSON)
+_VOICING_KEYS = ("name", "root", "notes", "hotkey")
+
+
+def _text(value):
+    return value if isinstance(value, str) else None
+
+
+## -----------------------------
+## function: _extra_keys
+## description: Claves del voicing que van a "extra". Un root/hotkey que
+##              está pero no es un string ({"root": null}) también va ahí:
+##              la columna NULL significa "no está".
+## -----------------------------
+def _extra_keys(v):
+    extra = {k: val for k, val in v.items() if k not in _VOICING_KEYS}
+    for k in ("root", "hotkey"):
+        if k in v and not isinstance(v[k], str):
+            extra[k] = v[k]
+    return extra
+
+
+## -----------------------------
+## function: _like_prefix
+## description: Patrón LIKE "empieza con `prefix`" (con ESCAPE '\'): % y _
+##              del texto se buscan literalmente.
+## -----------------------------
+def _like_prefix(prefix):
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+## -----------------------------
+## function: pitch_class_mask
+## description: Máscara de 12 bits con las clases de altura de las notas
+##              (bit 0 = C, bit 1 = C#/Db, ...). Ignora notas desconocidas.
+## -----------------------------
+def pitch_class_mask(notes):
+    return mascara_de_midi(m for m in map(BD_Notas_Midi.get, notes) if m is not None)
+
+
+class SQLiteLibrary:
+    """Librería de voicings/ritmos en un archivo SQLite."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    ## ------------------------------------------------------------------
+    ##                        VOICINGS
+    ## ------------------------------------------------------------------
+
+    ## -----------------------------
+    ## function: _where
+    ## description: Arma la cláusula WHERE de las consultas de voicings.
+    ## \param name: prefijo del nombre (LIKE 'name%').
+    ## \param root / hotkey: igualdad exacta.
+    ## \param pc_mask: máscara exacta de clases de altura.
+    ## \param contains_mask: el voicing contiene todas estas clases de altura.
+    ## \param midi: el voicing contiene esta nota MIDI.
+    ## -----------------------------
+    @staticmethod
+    def _where(name=None, root=None, hotkey=None, pc_mask=None, contains_mask=None, midi=None):
+        cond, args = [], []
+        if name:
+            cond.append("v.name LIKE ? ESCAPE '\\'")
+            args.append(_like_prefix(name))
+        if root is not None:
+            cond.append("v.root = ?")
+            args.append(root)
+        if hotkey is not None:
+            cond.append("v.hotkey = ?")
+            args.append(hotkey)
+        if pc_mask is not None:
+            cond.append("v.pc_mask = ?")
+            args.append(pc_mask)
+        if contains_mask is not None:
+            cond.append("(v.pc_mask & ?) = ?")
+            args.extend([contains_mask, contains_mask])
+        if midi is not None:
+            cond.append("v.id IN (SELECT voicing_id FROM notes WHERE midi = ?)")
+            args.append(midi)
+        return (" WHERE " + " AND ".join(cond)) if cond else "", args
+
+    def count_voicings(self, **filters):
+        where, args = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM voicings v{where}", args).fetchone()[0]
+
+    def _rows_to_voicings(self, rows):
+        if not rows:
+            return []
+        ids = [r["id"] for r in rows]
+        notas = {i: [] for i in ids}
+        # en bloques para no pasar el límite de parámetros de SQLite
+        for k in range(0, len(ids), 900):
+            bloque = ids[k:k + 900]
+            marcas = ",".join("?" * len(bloque))
+            for n in self.conn.execute(
+                    f"SELECT voicing_id, name FROM notes WHERE voicing_id IN ({marcas}) "
+                    f"ORDER BY voicing_id, ord", bloque):
+                notas[n[0]].append(n[1])
+
+        resultado = []
+        for r in rows:
+            extra = json.loads(r["extra"]) if r["extra"] else {}
+            v = {"name": r["name"]}
+            if r["root"] is not None:
+                v["root"] = r["root"]
+            elif "root" in extra:
+                v["root"] = extra.pop("root")
+            v["notes"] = notas[r["id"]]
+            if r["hotkey"] is not None:
+                v["hotkey"] = r["hotkey"]
+            elif "hotkey" in extra:
+                v["hotkey"] = extra.pop("hotkey")
+            v.update(extra)
+            resultado.append(v)
+        return resultado
+
+    ## -----------------------------
+    ## function: page_voicings
+    ## description: Página de voicings (en el orden de la librería) que
+    ##              cumplen los filtros (ver _where).
+    ## \return: lista de dicts con el mismo esquema que voicings.json
+    ## -----------------------------
+    def page_voicings(self, offset=0, limit=200, **filters):
+        where, args = self._where(**filters)
+        rows = self.conn.execute(
+            f"SELECT * FROM voicings v{where} ORDER BY v.position LIMIT ? OFFSET ?",
+            args + [limit, offset]).fetchall()
+        return self._rows_to_voicings(rows)
+
+    def find_by_hotkey(self, hotkey):
+        return self.page_voicings(0, 1, hotkey=hotkey)
+
+    def find_by_name(self, name):
+        rows = self.conn.execute(
+            "SELECT * FROM voicings v WHERE v.name = ? ORDER BY v.position", (name,)).fetchall()
+        return self._rows_to_voicings(rows)
+
+    def load_voicings(self):
+        """Todos los voicings como lista (compatible con load_voicings())."""
+        rows = self.conn.execute("SELECT * FROM voicings v ORDER BY v.position").fetchall()
+        return self._rows_to_voicings(rows)
+
+    def _insert_voicings(self, voicings, start_position):
+        cur = self.conn.cursor()
+        notas = []
+        for pos, v in enumerate(voicings, start_position):
+            extra = _extra_keys(v)
+            names = list(v.get("notes", []))
+            cur.execute(
+                "INSERT INTO voicings(position, name, root, hotkey, pc_mask, n_notes, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (pos, v.get("name", "(unnamed)"), _text(v.get("root")), _text(v.get("hotkey")),
+                 pitch_class_mask(names), len(names), json.dumps(extra) if extra else None))
+            vid = cur.lastrowid
+            notas.extend((vid, k, n, BD_Notas_Midi.get(n)) for k, n in enumerate(names))
+        cur.executemany("INSERT INTO notes(voicing_id, ord, name, midi) VALUES (?, ?, ?, ?)", notas)
+
+    def replace_voicings(self, voicings):
+        with self.conn:
+            self.conn.execute("DELETE FROM notes")
+            self.conn.execute("DELETE FROM voicings")
+            self._insert_voicings(voicings, 0)
+
+    def append_voicings(self, voicings):
+        with self.conn:
+            pos = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM voicings").fetchone()[0]
+            self._insert_voicings(voicings, pos)
+
+    def import_voicings_json(self, json_path, replace=True):
+        with open(json_path, "r", encoding="utf-8") as f:
+            voicings = json.load(f).get("voicings", [])
+        if replace:
+            self.replace_voicings(voicings)
+        else:
+            self.append_voicings(voicings)
+        return len(voicings)
+
+    def export_voicings_json(self, json_path):
+        from storage_engine.saver import atomic_write_json
+        atomic_write_json(json_path, {"voicings": self.load_voicings()})
+
+    ## ------------------------------------------------------------------
+    ##                        PATTERNS
+    ## ------------------------------------------------------------------
+
+    def count_patterns(self, name=None):
+        if name:
+            return self.conn.execute("SELECT COUNT(*) FROM patterns WHERE name LIKE ? ESCAPE '\\'",
+                                     (_like_prefix(name),)).fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM patterns").fetchone()[0]
+
+    def page_patterns(self, offset=0, limit=200, name=None):
+        from rhythm_engine.patterns import RitmoPattern
+        where, args = ("WHERE name LIKE ? ESCAPE '\\'", [_like_prefix(name)]) if name else ("", [])
+        rows = self.conn.execute(
+            f"SELECT name, tempo, compases FROM patterns {where} ORDER BY position LIMIT ? OFFSET ?",
+            args + [limit, offset]).fetchall()
+        return [RitmoPattern(r["name"], json.loads(r["compases"]), r["tempo"]) for r in rows]
+
+    def load_patterns(self):
+        return self.page_patterns(0, -1)
+
+    def replace_patterns(self, patterns):
+        with self.conn:
+            self.conn.execute("DELETE FROM patterns")
+            self.conn.executemany(
+                "INSERT INTO patterns(position, name, tempo, compases, content_hash) VALUES (?, ?, ?, ?, ?)",
+                [(i, p.name, p.tempo, json.dumps([list(c) for c in p.iter_compases()]), p.content_hash())
+                 for i, p in enumerate(patterns)])
+
+    def import_patterns_json(self, json_path):
+        from storage_engine.rhythm_storage import load_patterns
+        patterns = load_patterns(json_path)
+        self.replace_patterns(patterns)
+        return len(patterns)
+
+    def export_patterns_json(self, json_path):
+        from storage_engine.rhythm_storage import export_patterns
+        export_patterns(self.load_patterns(), json_path)
+
+
+## -----------------------------
+## function: is_sqlite_library
+## description: True si la ruta parece una librería SQLite (.sqlite / .db).
+## -----------------------------
+def is_sqlite_library(path):
+    return os.fspath(path).lower().endswith((".sqlite", ".sqlite3", ".db"))
+
+
+def _main(argv):
+    if len(argv) != 3 or argv[0] not in ("import", "export", "import-rhythms", "export-rhythms"):
+        print("uso: python -m storage_engine.sqlite_storage "
+              "import|export|import-rhythms|export-rhythms ORIGEN DESTINO")
+        return 2
+    cmd, src, dst = argv
+    if cmd == "import":
+        with SQLiteLibrary(dst) as lib:
+            print(f"{lib.import_voicings_json(src)} voicings importados en {dst}")
+    elif cmd == "import-rhythms":
+        with SQLiteLibrary(dst) as lib:
+            print(f"{lib.import_patterns_json(src)} patrones importados en {dst}")
+    elif cmd == "export":
+        with SQLiteLibrary(src) as lib:
+            lib.export_voicings_json(dst)
+    else:
+        with SQLiteLibrary(src) as lib:
+            lib.export_patterns_json(dst)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,437 @@
+# ======================================================
+# FILE: storage_engine/validator.py
+# ======================================================
+"""
+Validación (lint) de librerías de voicings.
+
+Los loaders aceptan cualquier cosa y los errores recién aparecen al tocar
+(reproducir_acorde se saltea en silencio las notas desconocidas). Esto
+revisa la librería entera y devuelve un reporte (dict, listo para JSON):
+
+    código               gravedad  problema                                  arreglo (--fix)
+    not_an_object        error     la entrada no es un objeto {...}          se quita
+    no_notes             error     sin notas, o "notes" no es una lista      se quita
+    unknown_note         error     nota que no está en BD_Notas_Midi          se quita la nota (*)
+    repeated_note        warning   la misma nota dos veces                   se quita la repetida
+    unsorted_notes       warning   notas no ordenadas de grave a aguda       se ordenan
+    missing_name         error     sin nombre                                nombre sugerido
+    unknown_root         error     root ausente o que no está en BD_Notas_Midi   root reconocida
+    root_not_in_voicing  warning   la root no es ninguna de las notas        root reconocida
+    duplicate_name       warning   nombre ya usado por un voicing anterior   "nombre (2)", ...
+    duplicate_hotkey     error     hotkey ya usado por un voicing anterior   se quita el hotkey
+
+    (*) si no queda ninguna nota, se quita el voicing.
+
+"root reconocida": la de chord_names.reconocer, en la octava más cercana
+por debajo del bajo (o el bajo, si no se reconoce el acorde).
+
+unsorted_notes y root_not_in_voicing no se arreglan salvo que se pidan:
+los drops incluidos guardan las notas en el orden del voicing cerrado, y
+un voicing sin root (rootless) es válido.
+
+Los controles de cada voicing se reparten en un pool de procesos por
+rangos de índices: la lista ya parseada llega a cada proceso una sola vez
+(con fork ni siquiera se copia) y lo único que vuelve son los problemas y
+los voicings arreglados. Nombres y hotkeys duplicados se revisan después en
+el proceso principal, en orden, así el resultado es el mismo con 1 o con N
+procesos.
+
+En JSON y manifiestos se valida lo que carga la GUI: el snapshot con los
+cambios de su journal aplicados. Un --fix sobre el mismo archivo se guarda
+como snapshot nuevo (generación nueva, journal vacío), como save_voicings.
+
+Uso por línea de comandos:
+    python -m storage_engine.validator voicings.json --report reporte.json
+    python -m storage_engine.validator voicings.json --fix --output limpio.json
+    python -m storage_engine.validator voicings.json --fix unsorted_notes,duplicate_hotkey
+"""
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from midi_engine.notes_db import BD_Notas_Midi
+
+## --------------------------------------------------------------------------------------------------------------------
+##                        CONFIG
+## --------------------------------------------------------------------------------------------------------------------
+
+## -----------------------------
+## Variable: CODES
+## description: código -> (gravedad, descripción)
+## -----------------------------
+CODES = {
+    "not_an_object": ("error", "la entrada no es un objeto"),
+    "no_notes": ("error", "sin notas"),
+    "unknown_note": ("error", "nota desconocida"),
+    "repeated_note": ("warning", "nota repetida"),
+    "unsorted_notes": ("warning", "notas no ordenadas de grave a aguda"),
+    "missing_name": ("error", "sin nombre"),
+    "unknown_root": ("error", "root desconocida"),
+    "root_not_in_voicing": ("warning", "la root no está entre las notas"),
+    "duplicate_name": ("warning", "nombre repetido"),
+    "duplicate_hotkey": ("error", "hotkey repetido"),
+}
+
+# los que arregla --fix sin lista de códigos
+DEFAULT_FIXES = frozenset(CODES) - {"unsorted_notes", "root_not_in_voicing"}
+
+# por debajo de esta cantidad de voicings no vale la pena levantar procesos
+PARALLEL_MIN = 20000
+
+# voicings del archivo que se está validando (en cada proceso del pool)
+_entries = None
+
+
+## --------------------------------------------------------------------------------------------------------------------
+##                       FUNCTIONS
+## --------------------------------------------------------------------------------------------------------------------
+
+def _init_worker(entries):
+    global _entries
+    _entries = entries
+
+
+def _root_reconocida(midi):
+    from midi_engine.chord_names import reconocer
+    from midi_engine.pitch_sets import mascara_de_midi, nota_de_midi
+    bajo = min(midi)
+    resultado = reconocer(mascara_de_midi(midi), bajo=bajo % 12)
+    if resultado is None:
+        return nota_de_midi(bajo)
+    return nota_de_midi(bajo - (bajo - resultado[0]) % 12)
+
+
+## -----------------------------
+## function: check_voicing
+## description: Controles de un solo voicing (todo menos duplicados).
+## \param fix: códigos a arreglar.
+## \return: (lista de (código, detalle), voicing arreglado o None si hay que
+##          quitarlo; el mismo objeto si no cambió). not_an_object y no_notes
+##          solo quitan el voicing si su código está en fix.
+## -----------------------------
+def check_voicing(v, fix=frozenset()):
+    if not isinstance(v, dict):
+        return [("not_an_object", type(v).__name__)], None if "not_an_object" in fix else v
+
+    notas = v.get("notes")
+    if not isinstance(notas, list) or not notas:
+        return [("no_notes", None)], None if "no_notes" in fix else v
+    nombre = v.get("name")
+    root = v.get("root")
+
+    # caso común (voicing correcto): notas conocidas y estrictamente ascendentes
+    try:
+        midi = [BD_Notas_Midi[n] for n in notas]
+    except (KeyError, TypeError):
+        midi = None
+    if (midi is not None and midi == sorted(set(midi))
+            and isinstance(nombre, str) and nombre.strip()
+            and isinstance(root, str) and root in BD_Notas_Midi
+            and BD_Notas_Midi[root] % 12 in {m % 12 for m in midi}):
+        return [], v
+
+    issues = []
+    nuevo = v
+    midi = []  # de las notas conocidas
+    quedan = []  # notas después de arreglar
+    vistas = set()  # MIDI (C#3 y Db3 son la misma nota)
+    for n in notas:
+        m = BD_Notas_Midi.get(n) if isinstance(n, str) else None
+        if m is None:
+            issues.append(("unknown_note", n))
+            if "unknown_note" not in fix:
+                quedan.append(n)
+            continue
+        if m in vistas:
+            issues.append(("repeated_note", n))
+            if "repeated_note" in fix:
+                continue
+        vistas.add(m)
+        midi.append(m)
+        quedan.append(n)
+
+    def cambiar(clave, valor):
+        nonlocal nuevo
+        if nuevo is v:
+            nuevo = dict(v)
+        nuevo[clave] = valor
+
+    if len(quedan) != len(notas):
+        if not quedan:
+            return issues, None
+        cambiar("notes", quedan)
+    if not midi:
+        return issues, nuevo
+
+    if any(a > b for a, b in zip(midi, midi[1:])):
+        issues.append(("unsorted_notes", None))
+        if "unsorted_notes" in fix:
+            cambiar("notes", sorted(nuevo["notes"], key=lambda n: BD_Notas_Midi.get(n, 128)))
+
+    if not isinstance(nombre, str) or not nombre.strip():
+        issues.append(("missing_name", None))
+        if "missing_name" in fix:
+            from midi_engine.chord_names import sugerir_nombre
+            cambiar("name", sugerir_nombre([n for n in quedan if n in BD_Notas_Midi], root) or "(unnamed)")
+
+    if not isinstance(root, str) or root not in BD_Notas_Midi:
+        issues.append(("unknown_root", root))
+        if "unknown_root" in fix:
+            cambiar("root", _root_reconocida(midi))
+    elif BD_Notas_Midi[root] % 12 not in {m % 12 for m in midi}:
+        issues.append(("root_not_in_voicing", root))
+        if "root_not_in_voicing" in fix:
+            cambiar("root", _root_reconocida(midi))
+
+    return issues, nuevo
+
+
+## -----------------------------
+## function: _check_range
+## description: (proceso del pool) check_voicing de _entries[start:end].
+## \return: (problemas [(índice, código, detalle)], {índice: voicing
+##          arreglado o None}) solo de los voicings con cambios
+## -----------------------------
+def _check_range(start, end, fix):
+    problemas = []
+    cambios = {}
+    for i in range(start, end):
+        v = _entries[i]
+        issues, nuevo = check_voicing(v, fix)
+        if issues:
+            problemas.extend((i, code, detail) for code, detail in issues)
+        if nuevo is not v:
+            cambios[i] = nuevo
+    return problemas, cambios
+
+
+def _nombre_libre(nombre, usados):
+    if nombre not in usados:
+        return nombre
+    k = 2
+    while f"{nombre} ({k})" in usados:
+        k += 1
+    return f"{nombre} ({k})"
+
+
+## -----------------------------
+## function: validate_voicings
+## description: Valida (y arregla) una lista de voicings (dicts tal como
+##              vienen del JSON, sin normalizar).
+## \param fix: None/False = solo revisar, True = DEFAULT_FIXES, o los
+##             códigos a arreglar.
+## \param workers: procesos del pool (None = cantidad de cores).
+## \return: (voicings arreglados, o None si no se pidió arreglar; reporte)
+## -----------------------------
+def validate_voicings(voicings, fix=None, workers=None):
+    if fix is True:
+        fix = DEFAULT_FIXES
+    fix = frozenset(fix or ())
+    for code in fix:
+        if code not in CODES:
+            raise ValueError(f"Código desconocido: '{code}'")
+
+    n = len(voicings)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n < PARALLEL_MIN:
+        _init_worker(voicings)
+        try:
+            resultados = [_check_range(0, n, fix)]
+        finally:
+            _init_worker(None)
+    else:
+        paso = max(1000, n // (workers * 8))
+        rangos = [(i, min(n, i + paso)) for i in range(0, n, paso)]
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context("fork" if "fork" in metodos else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                                 initializer=_init_worker, initargs=(voicings,)) as pool:
+            resultados = list(pool.map(_check_range, *zip(*rangos), [fix] * len(rangos)))
+
+    problemas = []
+    cambios = {}
+    for p, c in resultados:
+        problemas.extend(p)
+        cambios.update(c)
+
+    # duplicados: en orden, sobre los voicings ya arreglados
+    nombres = set()
+    hotkeys = set()
+    for i in range(n):
+        v = cambios.get(i, voicings[i])
+        if not isinstance(v, dict):
+            continue
+        nombre = v.get("name")
+        if isinstance(nombre, str) and nombre.strip():
+            nuevo = _nombre_libre(nombre, nombres)
+            if nuevo != nombre:
+                problemas.append((i, "duplicate_name", nombre))
+                if "duplicate_name" in fix:
+                    v = cambios[i] = dict(v, name=nuevo)
+            nombres.add(nuevo)
+        hk = v.get("hotkey")
+        if hk:
+            if hk in hotkeys:
+                problemas.append((i, "duplicate_hotkey", hk))
+                if "duplicate_hotkey" in fix:
+                    v = cambios[i] = {k: x for k, x in v.items() if k != "hotkey"}
+            else:
+                hotkeys.add(hk)
+
+    problemas.sort(key=lambda p: p[0])
+    reporte = _report(voicings, problemas, cambios, fix)
+    if not fix:
+        return None, reporte
+    arreglados = [cambios.get(i, v) for i, v in enumerate(voicings)]
+    return [v for v in arreglados if v is not None], reporte
+
+
+def _report(voicings, problemas, cambios, fix):
+    counts = {}
+    issues = []
+    for i, code, detail in problemas:
+        counts[code] = counts.get(code, 0) + 1
+        v = voicings[i]
+        issues.append({
+            "index": i,
+            "name": v.get("name") if isinstance(v, dict) else None,
+            "code": code,
+            "severity": CODES[code][0],
+            "message": CODES[code][1],
+            "detail": detail,
+            "fixed": code in fix,
+        })
+    return {
+        "voicings": len(voicings),
+        "errors": sum(c for code, c in counts.items() if CODES[code][0] == "error"),
+        "warnings": sum(c for code, c in counts.items() if CODES[code][0] == "warning"),
+        "counts": counts,
+        "changed": sum(1 for v in cambios.values() if v is not None) if fix else 0,
+        "removed": sum(1 for v in cambios.values() if v is None) if fix else 0,
+        "issues": issues,
+    }
+
+
+## -----------------------------
+## function: _read_entries
+## description: Voicings de un archivo tal como están guardados (JSON sin
+##              normalizar, para ver también las entradas mal formadas), con
+##              los cambios del journal (ver journal.py) ya aplicados: se
+##              valida la librería que carga la GUI, no solo el snapshot.
+## \return: (voicings, data del JSON o None si no es JSON, es_manifiesto)
+## -----------------------------
+def _read_entries(path):
+    from storage_engine.sqlite_storage import is_sqlite_library
+    from storage_engine.binary_storage import is_binary_library
+    from storage_engine.content_store import is_manifest, voicings_from_manifest
+    from storage_engine.journal import ChangeJournal, apply_records
+    from storage_engine.saver import saver
+    if is_sqlite_library(path) or is_binary_library(path):
+        from storage_engine.voicing_storage import read_voicings_file
+        return [v.to_dict() for v in read_voicings_file(path)], None, False
+
+    # si hay un guardado diferido pendiente (mismo proceso), escribirlo antes de leer
+    saver.flush(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("formato de voicings no válido")
+    manifest = is_manifest(data)
+    voicings = voicings_from_manifest(data, path) if manifest else data.get("voicings", [])
+    if not isinstance(voicings, list):
+        raise ValueError("\"voicings\" no es una lista")
+    records = ChangeJournal(path).read(data.get("gen"))
+    if records:
+        voicings = apply_records(list(voicings), records)
+    return voicings, data, manifest
+
+
+## -----------------------------
+## function: _write_in_place
+## description: Guarda lo arreglado sobre el mismo JSON (o manifiesto) como
+##              un snapshot nuevo: generación nueva y journal vacío, igual que
+##              save_voicings. Los índices del journal viejo ya no valen
+##              (se quitaron voicings) y sus cambios ya están en la lista.
+## -----------------------------
+def _write_in_place(path, data, manifest, voicings):
+    from storage_engine.journal import ChangeJournal, new_generation
+    gen = new_generation()
+    if manifest:
+        from storage_engine.content_store import STORE_DIRNAME, write_manifest
+        write_manifest(voicings, path, gen=gen, store_dirname=data.get("store", STORE_DIRNAME))
+    else:
+        from storage_engine.saver import atomic_write_json
+        # se conservan las otras claves del archivo
+        atomic_write_json(path, dict(data, voicings=voicings, gen=gen))
+    ChangeJournal(path).reset(gen)
+    from storage_engine.load_cache import load_cache
+    load_cache.invalidate(path)
+
+
+## -----------------------------
+## function: validate_file
+## description: Valida un archivo de voicings (JSON, .vman, .vbin o SQLite)
+##              y, si se pide, guarda la versión arreglada.
+## \param output: dónde guardar lo arreglado (None = el mismo archivo).
+## \return: reporte
+## -----------------------------
+def validate_file(path, fix=None, output=None, workers=None):
+    voicings, data, manifest = _read_entries(path)
+    arreglados, reporte = validate_voicings(voicings, fix, workers)
+    reporte = {"file": os.path.abspath(path), **reporte}
+    if arreglados is not None:
+        destino = output or path
+        if data is not None and os.path.abspath(destino) == os.path.abspath(path):
+            _write_in_place(destino, data, manifest, arreglados)
+        else:
+            from storage_engine.voicing_storage import save_voicings_as_other_file
+            save_voicings_as_other_file(arreglados, destino)
+        reporte["output"] = os.path.abspath(destino)
+    return reporte
+
+
+def _main(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m storage_engine.validator",
+        description="Revisa (y arregla) una librería de voicings.")
+    parser.add_argument("path", help="librería (.json, .vman, .vbin, .sqlite)")
+    parser.add_argument("--fix", nargs="?", const="default", default=None,
+                        help="arreglar los problemas (sin valor: "
+                             f"{', '.join(sorted(DEFAULT_FIXES))}; o códigos separados por coma)")
+    parser.add_argument("--output", help="guardar lo arreglado acá en vez de en el mismo archivo")
+    parser.add_argument("--report", help="guardar el reporte completo en este JSON ('-' = stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="procesos en paralelo")
+    args = parser.parse_args(argv)
+
+    fix = None
+    if args.fix == "default":
+        fix = True
+    elif args.fix:
+        fix = [c for c in args.fix.split(",") if c]
+        for c in fix:
+            if c not in CODES:
+                parser.error(f"código desconocido: {c}")
+
+    reporte = validate_file(args.path, fix, args.output, args.workers)
+
+    if args.report == "-":
+        json.dump(reporte, sys.stdout, indent=4, ensure_ascii=False)
+        print()
+    else:
+        print(f"{reporte['voicings']} voicings: {reporte['errors']} errores, {reporte['warnings']} advertencias")
+        for code, c in sorted(reporte["counts"].items()):
+            print(f"  {code:20} {c}")
+        if "output" in reporte:
+            print(f"{reporte['changed']} arreglados, {reporte['removed']} quitados -> {reporte['output']}")
+        if args.report:
+            from storage_engine.saver import atomic_write_json
+            atomic_write_json(args.report, reporte)
+    pendientes = [p for p in reporte["issues"] if p["severity"] == "error" and not p["fixed"]]
+    return 1 if pendientes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
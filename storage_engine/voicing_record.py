@@ -0,0 +1,287 @@
+# ======================================================
+# FILE: storage_engine/voicing_record.py
+# ======================================================
+"""
+Voicing normalizado al cargar la librería.
+
+VoicingRecord se usa como un dict (mismas claves que voicings.json: name,
+root, notes, hotkey, ...: v["name"], v.get("notes"), v.items(), ...) pero
+ocupa mucho menos memoria:
+
+- __slots__ en vez de un dict por voicing;
+- name, root y hotkey internados (un solo string por nombre distinto);
+- las notas son un `bytes` con un id por nota de una tabla de nombres
+  compartida (NOMBRES_DE_NOTA, las de BD_Notas_Midi), así que "C3" existe
+  una sola vez en memoria aunque aparezca en un millón de voicings;
+- si alguna nota no está en la tabla (desconocida o que no es un string),
+  las notas se guardan tal cual en una tupla del record: la tabla nunca
+  crece y cargar una librería con notas raras no puede fallar;
+- otras claves, si las hay, en un dict aparte (None si no hay ninguna).
+
+Datos MIDI (midi_sorted y pc_mask se calculan al asignar las notas y se
+guardan en el record: el índice y las búsquedas los leen en cada consulta):
+
+    midi         bytes con los números MIDI en el orden de las notas
+    midi_sorted  los mismos ordenados de grave a agudo
+    pc_mask      clases de altura (12 bits, bit 0 = C)
+    valid        True si tiene notas y todas existen en BD_Notas_Midi
+    unknown      notas que no están en BD_Notas_Midi
+
+v["notes"] devuelve una lista nueva en cada acceso: para cambiar las notas
+hay que asignar v["notes"] = [...]. Como no es un dict, json.dump necesita
+default=saver.json_default (lo usan atomic_write_json, el journal, etc.).
+
+Benchmark de memoria (tracemalloc):
+    python -m storage_engine.voicing_record [cantidad]
+"""
+import sys
+from collections.abc import Mapping, MutableMapping
+
+from midi_engine.notes_db import BD_Notas_Midi
+from midi_engine.pitch_sets import mascara_de_midi
+
+_FALTA = object()  # clave ausente (distinto de None, que es un valor válido)
+_CLAVES = ("name", "root", "notes", "hotkey")
+
+## -----------------------------
+## Variable: NOMBRES_DE_NOTA
+## Description: Tabla compartida id -> nombre de nota (fija: las notas de
+##              BD_Notas_Midi).
+## -----------------------------
+NOMBRES_DE_NOTA = tuple(sys.intern(n) for n in BD_Notas_Midi)
+_ID_DE_NOTA = {n: i for i, n in enumerate(NOMBRES_DE_NOTA)}
+# tabla para bytes.translate: id -> MIDI
+_MIDI_DE_ID = bytes(BD_Notas_Midi[n] for n in NOMBRES_DE_NOTA) + bytes(256 - len(NOMBRES_DE_NOTA))
+
+
+def _midi_de_nota(nota):
+    return BD_Notas_Midi.get(nota) if isinstance(nota, str) else None
+
+
+## -----------------------------
+## function: notes_to_midi
+## description: Convierte nombres de nota a MIDI.
+## \return: (tupla MIDI de las notas conocidas, tupla de notas desconocidas)
+## -----------------------------
+def notes_to_midi(notes):
+    midi = []
+    unknown = []
+    for n in notes:
+        m = _midi_de_nota(n)
+        if m is None:
+            unknown.append(n)
+        else:
+            midi.append(m)
+    return tuple(midi), tuple(unknown)
+
+
+midi_to_pc_mask = mascara_de_midi
+
+
+def _intern(s):
+    return sys.intern(s) if type(s) is str else s
+
+
+class VoicingRecord(MutableMapping):
+    __slots__ = ("_name", "_root", "_hotkey", "_notes", "_raw_notes", "_extra",
+                 "_midi_sorted", "_pc_mask")
+
+    def __init__(self, *args, **kwargs):
+        self._name = self._root = self._hotkey = _FALTA
+        self._notes = None  # ids; None = sin clave "notes" (o notas en _raw_notes); b"" = lista vacía
+        self._raw_notes = None  # tupla con las notas tal cual si alguna no está en la tabla
+        self._extra = None
+        self._midi_sorted = b""
+        self._pc_mask = 0
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    # ---- acceso tipo dict ----
+
+    def __getitem__(self, key):
+        if key == "notes":
+            if self._raw_notes is not None:
+                return list(self._raw_notes)
+            if self._notes is None:
+                raise KeyError(key)
+            return [NOMBRES_DE_NOTA[i] for i in self._notes]
+        if key == "name":
+            value = self._name
+        elif key == "root":
+            value = self._root
+        elif key == "hotkey":
+            value = self._hotkey
+        else:
+            if self._extra is None:
+                raise KeyError(key)
+            return self._extra[key]
+        if value is _FALTA:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key == "notes":
+            value = tuple(value)
+            try:
+                self._notes = bytes(_ID_DE_NOTA[n] for n in value)
+                self._raw_notes = None
+            except (KeyError, TypeError):
+                self._notes = None
+                self._raw_notes = value
+            self._update_midi()
+        elif key == "name":
+            self._name = _intern(value)
+        elif key == "root":
+            self._root = _intern(value)
+        elif key == "hotkey":
+            self._hotkey = _intern(value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key == "notes":
+            self._notes = self._raw_notes = None
+            self._update_midi()
+        elif key == "name":
+            self._name = _FALTA
+        elif key == "root":
+            self._root = _FALTA
+        elif key == "hotkey":
+            self._hotkey = _FALTA
+        else:
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+
+    def __contains__(self, key):
+        if key == "notes":
+            return self._notes is not None or self._raw_notes is not None
+        if key == "name":
+            return self._name is not _FALTA
+        if key == "root":
+            return self._root is not _FALTA
+        if key == "hotkey":
+            return self._hotkey is not _FALTA
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key in _CLAVES:
+            if key in self:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __repr__(self):
+        return f"VoicingRecord({self.to_dict()!r})"
+
+    def to_dict(self):
+        return {k: self[k] for k in self}
+
+    def copy(self):
+        """Copia (los ids de notas son inmutables, se comparten)."""
+        nuevo = VoicingRecord.__new__(VoicingRecord)
+        nuevo._name, nuevo._root, nuevo._hotkey = self._name, self._root, self._hotkey
+        nuevo._notes = self._notes
+        nuevo._raw_notes = self._raw_notes
+        nuevo._extra = dict(self._extra) if self._extra else None
+        nuevo._midi_sorted, nuevo._pc_mask = self._midi_sorted, self._pc_mask
+        return nuevo
+
+    def __reduce__(self):
+        return VoicingRecord, (self.to_dict(),)
+
+    # ---- datos MIDI ----
+
+    def _update_midi(self):
+        midi = self.midi
+        self._midi_sorted = bytes(sorted(midi))
+        self._pc_mask = midi_to_pc_mask(midi)
+
+    @property
+    def midi(self):
+        if self._raw_notes is not None:
+            return bytes(m for m in map(_midi_de_nota, self._raw_notes) if m is not None)
+        return (self._notes or b"").translate(_MIDI_DE_ID)
+
+    @property
+    def midi_sorted(self):
+        return self._midi_sorted
+
+    @property
+    def pc_mask(self):
+        return self._pc_mask
+
+    @property
+    def valid(self):
+        return bool(self._notes)
+
+    @property
+    def unknown(self):
+        if self._raw_notes is None:
+            return ()
+        return tuple(n for n in self._raw_notes if _midi_de_nota(n) is None)
+
+
+## -----------------------------
+## function: normalize_voicing
+## description: VoicingRecord a partir de un dict (o copia si ya lo es).
+## -----------------------------
+def normalize_voicing(v):
+    if isinstance(v, VoicingRecord):
+        return v.copy()
+    return VoicingRecord(v)
+
+
+def normalize_voicings(voicings):
+    return [normalize_voicing(v) for v in voicings if isinstance(v, Mapping)]
+
+
+## -----------------------------
+## function: _benchmark
+## description: Memoria por voicing (tracemalloc) de una librería sintética
+##              de `n` voicings: dicts como los deja json.load contra
+##              VoicingRecord.
+## -----------------------------
+def _benchmark(n):
+    import json
+    import random
+    import tracemalloc
+
+    rng = random.Random(0)
+    notas = list(BD_Notas_Midi)
+    nombres = [f"{q} {k}Inv" if k else q for q in ("m6", "dim7", "maj7", "m7", "7", "m7b5") for k in range(4)]
+    fuente = [{"name": rng.choice(nombres), "root": rng.choice(notas),
+               "notes": sorted(rng.sample(notas, 4), key=BD_Notas_Midi.get),
+               **({"hotkey": str(i % 10)} if i % 50 == 0 else {})} for i in range(n)]
+    # como vienen de json.load: strings propios en cada voicing
+    texto = json.dumps({"voicings": fuente})
+    del fuente
+
+    def medir(construir):
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+        datos = construir()
+        despues = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return datos, (despues - antes) / n
+
+    dicts, por_dict = medir(lambda: json.loads(texto)["voicings"])
+    _, por_record = medir(lambda: [VoicingRecord(v) for v in dicts])
+    print(f"{n} voicings")
+    print(f"  dict (json.load):  {por_dict:7.1f} bytes por voicing")
+    print(f"  VoicingRecord:     {por_record:7.1f} bytes por voicing")
+    print(f"  ahorro:            {100 * (1 - por_record / por_dict):6.1f} %")
+
+
+if __name__ == "__main__":
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
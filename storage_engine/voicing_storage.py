@@ -1,6 +1,14 @@
 import json
 import os
 
+from storage_engine.saver import atomic_write_chunks, atomic_write_json, json_default, saver
+from storage_engine.journal import ChangeJournal, apply_records, new_generation
+from storage_engine.load_cache import load_cache
+from storage_engine.voicing_record import VoicingRecord, normalize_voicing, normalize_voicings
+from storage_engine.content_store import (
+    StoreError, is_manifest, is_manifest_file, is_manifest_path, voicings_from_manifest, write_manifest
+)
+
 ## --------------------------------------------------------------------------------------------------------------------
 ##                        CONFIG
 ## --------------------------------------------------------------------------------------------------------------------
@@ -11,6 +19,12 @@ VOICINGS_DIR = os.path.join(os.path.dirname(__file__), "data")
 # Archivo final dentro de la carpeta
 ARCHIVO_VOICINGS = os.path.join(VOICINGS_DIR, "voicings.json")
 
+# generación (ver journal.py) del snapshot cargado/escrito, por ruta
+_generations = {}
+
+# rutas cuyo archivo es un manifiesto del content store (se guardan igual)
+_manifests = set()
+
 
 ## --------------------------------------------------------------------------------------------------------------------
 ##                       FUNCTIONS
@@ -27,24 +41,81 @@ def ensure_directory():
         os.makedirs(VOICINGS_DIR)
 
 
+## -----------------------------
+## function: _journal
+## description: Journal de cambios del archivo de voicings por defecto.
+## -----------------------------
+def _journal():
+    return ChangeJournal(ARCHIVO_VOICINGS)
+
+
 ## -----------------------------
 ## function: load_voicings
-## description: Carga la lista de voicings desde un archivo JSON.
-## \return: Lista de voicings (cada uno es lista de notas)
+## description: Carga la lista de voicings desde un archivo JSON y reaplica
+##              los cambios pendientes del journal. Un JSON ilegible da
+##              lista vacía; un manifiesto ilegible o con objetos que faltan
+##              en el store lanza StoreError.
+## \return: Lista de VoicingRecord (ver voicing_record.py)
 ## -----------------------------
 def load_voicings():
     ensure_directory()
 
+    # si hay un guardado diferido pendiente, escribirlo antes de leer
+    saver.flush(os.path.abspath(ARCHIVO_VOICINGS))
+
     if not os.path.exists(ARCHIVO_VOICINGS):
         save_voicings([])  # crea archivo inicial
 
     try:
-        with open(ARCHIVO_VOICINGS, "r") as f:
-            data = json.load(f)
-            return data.get("voicings", [])
-    except:
+        gen, voicings, manifest = load_cache.get("voicings", ARCHIVO_VOICINGS, _read_voicings_json, _copy_entry)
+    except StoreError:
+        raise
+    except Exception as e:
+        # un manifiesto ilegible no se trata como librería vacía: el próximo
+        # guardado lo pisaría junto con todas sus referencias
+        if is_manifest_file(ARCHIVO_VOICINGS):
+            raise StoreError(f"Manifiesto no válido {ARCHIVO_VOICINGS}: {e}") from e
         return []
 
+    path = os.path.abspath(ARCHIVO_VOICINGS)
+    _generations[path] = gen
+    if manifest:
+        _manifests.add(path)
+    else:
+        _manifests.discard(path)
+    return apply_records(voicings, _journal().read(gen), VoicingRecord)
+
+
+## -----------------------------
+## function: _read_voicings_json
+## description: Lee y valida un archivo {"voicings": [...]} o un manifiesto
+##              del content store (para load_cache).
+## \return: (generación, tupla de voicings, es_manifiesto)
+## -----------------------------
+def _read_voicings_json(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("formato de voicings no válido")
+    manifest = is_manifest(data)
+    voicings = voicings_from_manifest(data, file_path) if manifest else data.get("voicings", [])
+    # normalizados una sola vez (ver voicing_record); el cache guarda los records
+    return data.get("gen"), tuple(normalize_voicings(voicings)), manifest
+
+
+def _read_voicings_binary(file_path):
+    from storage_engine.binary_storage import BinaryVoicingLibrary
+    with BinaryVoicingLibrary(file_path) as lib:
+        return None, tuple(normalize_voicings(lib)), False
+
+
+def _copy_voicings(voicings):
+    return [normalize_voicing(v) for v in voicings]
+
+
+def _copy_entry(entry):
+    return entry[0], _copy_voicings(entry[1]), entry[2]
+
 
 ## -----------------------------
 ## function: save_voicings
@@ -54,10 +125,64 @@ def load_voicings():
 ## -----------------------------
 def save_voicings(voicings_list):
     ensure_directory()
-    data = {"voicings": voicings_list}
 
-    with open(ARCHIVO_VOICINGS, "w") as f:
-        json.dump(data, f, indent=4)
+    # snapshot nuevo => generación nueva y journal vacío
+    gen = new_generation()
+    if os.path.abspath(ARCHIVO_VOICINGS) in _manifests:
+        write_manifest(voicings_list, ARCHIVO_VOICINGS, gen=gen)
+    else:
+        data = {"voicings": voicings_list, "gen": gen}
+        atomic_write_json(ARCHIVO_VOICINGS, data)
+    _journal().reset(gen)
+    _generations[os.path.abspath(ARCHIVO_VOICINGS)] = gen
+
+
+## -----------------------------
+## function: schedule_save_voicings
+## description: Programa el guardado en segundo plano (ver saver.DebouncedSaver).
+##              Varias llamadas seguidas resultan en una sola escritura.
+## \param voicings_list: Lista de voicings (se copia en el momento de la llamada)
+## \param file_path: Ruta destino (por defecto voicings.json)
+## \return: None
+## -----------------------------
+def schedule_save_voicings(voicings_list, file_path=None):
+    path = os.path.abspath(file_path or ARCHIVO_VOICINGS)
+    if path == os.path.abspath(ARCHIVO_VOICINGS):
+        ensure_directory()
+    # copia de cada voicing: la GUI puede seguir modificando los dicts
+    copia = _copy_voicings(voicings_list)
+    if path == os.path.abspath(ARCHIVO_VOICINGS):
+        saver.schedule(path, lambda: save_voicings(copia))
+    else:
+        saver.schedule(path, lambda: atomic_write_json(path, {"voicings": copia}))
+
+
+## -----------------------------
+## function: record_voicing_changes
+## description: Registra cambios pequeños en el journal (en vez de reescribir
+##              todo voicings.json). Si el journal supera el tamaño máximo se
+##              compacta en un snapshot nuevo en segundo plano.
+## \param voicings_list: Lista completa actual (ya con los cambios aplicados)
+## \param records: [{"op": "add"|"update"|"delete"|"move", "index": i, ...}]
+## \return: None
+## -----------------------------
+def record_voicing_changes(voicings_list, records):
+    path = os.path.abspath(ARCHIVO_VOICINGS)
+
+    # con un guardado completo pendiente (o sin snapshot conocido) el journal
+    # no sirve: ese guardado ya va a incluir estos cambios
+    if saver.has_pending(path) or path not in _generations:
+        schedule_save_voicings(voicings_list)
+        return
+
+    try:
+        compactar = _journal().append(records, _generations[path])
+    except OSError as exc:
+        print(f"Error al escribir el journal: {exc}")
+        compactar = True
+
+    if compactar:
+        schedule_save_voicings(voicings_list)
 
 
 ## -----------------------------
@@ -68,7 +193,90 @@ def save_voicings(voicings_list):
 ## \return: None
 ## -----------------------------
 def save_voicings_as_other_file(voicings_list, file_path):
+    from storage_engine.sqlite_storage import SQLiteLibrary, is_sqlite_library
+    from storage_engine.binary_storage import write_binary, is_binary_library
+    if is_sqlite_library(file_path):
+        with SQLiteLibrary(file_path) as lib:
+            lib.replace_voicings(voicings_list)
+        return
+    if is_binary_library(file_path):
+        write_binary(voicings_list, file_path)
+        return
+    if is_manifest_path(file_path):
+        write_manifest(voicings_list, file_path)
+        return
     data = {"voicings": voicings_list}
+    atomic_write_json(file_path, data)
+
+
+## -----------------------------
+## function: save_voicings_stream
+## description: Guarda voicings que llegan por lotes (p. ej. de un
+##              generador) sin juntarlos todos antes cuando el formato lo
+##              permite: SQLite agrega lote por lote y JSON se escribe por
+##              partes (atómico). .vbin y .vman necesitan la lista entera.
+## \param batches: iterable de listas de voicings.
+## \return: cantidad de voicings guardados
+## -----------------------------
+def save_voicings_stream(batches, file_path):
+    from storage_engine.sqlite_storage import SQLiteLibrary, is_sqlite_library
+    from storage_engine.binary_storage import is_binary_library
+    total = 0
+    if is_sqlite_library(file_path):
+        with SQLiteLibrary(file_path) as lib:
+            lib.replace_voicings([])
+            for lote in batches:
+                lib.append_voicings(lote)
+                total += len(lote)
+        return total
+    if is_binary_library(file_path) or is_manifest_path(file_path):
+        todos = [v for lote in batches for v in lote]
+        save_voicings_as_other_file(todos, file_path)
+        return len(todos)
+
+    def partes():
+        nonlocal total
+        yield '{"voicings": ['
+        for lote in batches:
+            for v in lote:
+                yield (",\n    " if total else "\n    ") + json.dumps(v, default=json_default)
+                total += 1
+        yield "\n]}\n"
+
+    atomic_write_chunks(file_path, partes())
+    return total
+
+
+## -----------------------------
+## function: read_voicings_file
+## description: Lee los voicings de otro archivo (JSON, manifiesto, .vbin o
+##              librería SQLite).
+## \param file_path: Ruta del archivo
+## \return: Lista de VoicingRecord
+## -----------------------------
+def read_voicings_file(file_path):
+    return _read_any(file_path, cached=True)
+
+
+## -----------------------------
+## function: parse_voicings_file
+## description: Como read_voicings_file pero sin pasar por load_cache; para
+##              lecturas de una sola vez (p.ej. los procesos de bulk_import).
+## \param file_path: Ruta del archivo
+## \return: Lista de VoicingRecord
+## -----------------------------
+def parse_voicings_file(file_path):
+    return _read_any(file_path, cached=False)
+
 
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=4)
+def _read_any(file_path, cached):
+    from storage_engine.sqlite_storage import SQLiteLibrary, is_sqlite_library
+    from storage_engine.binary_storage import is_binary_library
+    if is_sqlite_library(file_path):
+        with SQLiteLibrary(file_path) as lib:
+            return normalize_voicings(lib.load_voicings())
+    leer = _read_voicings_binary if is_binary_library(file_path) else _read_voicings_json
+    if not cached:
+        return list(leer(file_path)[1])
+    # cacheado por (ruta, mtime, tamaño): volver a un archivo reciente no lo re-parsea
+    return load_cache.get("voicings", file_path, leer, _copy_entry)[1]
@@ -0,0 +1,136 @@
+# ======================================================
+# FILE: storage_engine/voicing_stream.py
+# ======================================================
+"""
+Lectura incremental de archivos {"voicings": [...]} muy grandes.
+
+En vez de json.load sobre todo el archivo, se lee en bloques y se decodifica
+un voicing por vez con JSONDecoder.raw_decode. El buffer solo contiene lo que
+falta decodificar (a lo sumo un voicing incompleto + un bloque), así la
+memoria no depende del tamaño del archivo y los primeros voicings están
+disponibles antes de terminar de leer.
+"""
+import re
+import json
+
+CHUNK_SIZE = 1 << 16
+
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+class _Lector:
+    """Buffer sobre un archivo de texto que se rellena a demanda."""
+
+    def __init__(self, f, chunk_size, progreso=None):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.progreso = progreso
+        self.leidos = 0
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _rellenar(self):
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        # descartar lo ya consumido antes de agregar el bloque nuevo
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        self.leidos += len(data)
+        if self.progreso:
+            self.progreso(self.leidos)
+        return True
+
+    def saltar_espacios(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._rellenar():
+                return
+
+    def caracter(self):
+        """Próximo carácter significativo (sin consumirlo), '' al final."""
+        self.saltar_espacios()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def esperar(self, c):
+        if self.caracter() != c:
+            raise ValueError(f"Se esperaba '{c}' en la posición {self.pos} del bloque")
+        self.pos += 1
+
+    def valor(self, decoder):
+        """Decodifica el próximo valor JSON completo."""
+        self.saltar_espacios()
+        while True:
+            try:
+                value, fin = decoder.raw_decode(self.buf, self.pos)
+                # un número al final del buffer puede estar cortado
+                if fin < len(self.buf) or self.eof:
+                    self.pos = fin
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            if not self._rellenar():
+                self.eof = True
+
+
+## -----------------------------
+## function: iter_voicings
+## description: Genera los voicings de un archivo {"voicings": [...]} uno por
+##              uno, leyendo en bloques de `chunk_size` caracteres.
+## \param file_path: Ruta del archivo JSON
+## \param progreso: callable(caracteres_leidos) llamado tras cada bloque
+## \return: generador de dicts
+## -----------------------------
+def iter_voicings(file_path, chunk_size=CHUNK_SIZE, progreso=None):
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        lector = _Lector(f, chunk_size, progreso)
+        lector.esperar("{")
+        if lector.caracter() == "}":
+            return
+        while True:
+            clave = lector.valor(decoder)
+            lector.esperar(":")
+            if clave != "voicings":
+                lector.valor(decoder)  # otra clave ("gen", ...): se ignora
+            else:
+                lector.esperar("[")
+                if lector.caracter() == "]":
+                    lector.pos += 1
+                else:
+                    while True:
+                        v = lector.valor(decoder)
+                        if isinstance(v, dict):
+                            yield v
+                        c = lector.caracter()
+                        lector.pos += 1
+                        if c == "]":
+                            break
+                        if c != ",":
+                            raise ValueError("Lista de voicings mal formada")
+            c = lector.caracter()
+            lector.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise ValueError("Objeto JSON mal formado")
+
+
+## -----------------------------
+## function: iter_voicing_batches
+## description: Igual que iter_voicings pero agrupado en listas de `size`.
+## -----------------------------
+def iter_voicing_batches(file_path, size=500, chunk_size=CHUNK_SIZE, progreso=None):
+    lote = []
+    for v in iter_voicings(file_path, chunk_size, progreso):
+        lote.append(v)
+        if len(lote) >= size:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
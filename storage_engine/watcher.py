@@ -0,0 +1,143 @@
+# ======================================================
+# FILE: storage_engine/watcher.py
+# ======================================================
+"""
+Detección de cambios hechos por otros programas sobre los archivos de la
+librería (otro editor, un cliente de sincronización, ...).
+
+FileWatcher solo compara (mtime_ns, size) de cada archivo en cada poll(); no
+usa servicios del sistema ni hilos. Las GUIs lo llaman con root.after.
+Mientras haya un guardado propio pendiente o en curso para un archivo, ese
+archivo no se reporta (lo que cambió es nuestro).
+
+diff_lists / apply_diff calculan y aplican el cambio mínimo entre la lista en
+memoria y la recién leída, así la GUI solo toca las filas que cambiaron.
+"""
+import os
+import json
+from difflib import SequenceMatcher
+
+from storage_engine.saver import saver, json_default
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class FileWatcher:
+    """Polling por stat de un conjunto de archivos."""
+
+    def __init__(self):
+        self._watched = {}  # ruta -> [stat, callback]
+
+    def watch(self, path, callback):
+        path = os.path.abspath(path)
+        self._watched[path] = [_stat(path), callback]
+
+    def unwatch(self, path):
+        self._watched.pop(os.path.abspath(path), None)
+
+    def acknowledge(self, path):
+        """Toma el estado actual como visto (no reportarlo como cambio)."""
+        path = os.path.abspath(path)
+        if path in self._watched:
+            self._watched[path][0] = _stat(path)
+
+    def invalidate(self, path):
+        """Fuerza a reportar `path` en el próximo poll()."""
+        path = os.path.abspath(path)
+        if path in self._watched:
+            self._watched[path][0] = ()
+
+    ## -----------------------------
+    ## function: poll
+    ## description: Llama al callback de cada archivo que cambió desde el
+    ##              último poll().
+    ## \return: lista de rutas que cambiaron
+    ## -----------------------------
+    def poll(self):
+        cambiados = []
+        for path, entry in list(self._watched.items()):
+            if saver.has_pending(path):
+                continue
+            st = _stat(path)
+            if st != entry[0]:
+                entry[0] = st
+                cambiados.append(path)
+                entry[1](path)
+        return cambiados
+
+
+## -----------------------------
+## function: voicing_diff_key
+## description: Clave comparable de un voicing (todas sus claves).
+## -----------------------------
+def voicing_diff_key(v):
+    return json.dumps(v, sort_keys=True, ensure_ascii=False, default=json_default)
+
+
+def pattern_diff_key(p):
+    return p.name, p.tempo, p.content_hash()
+
+
+## -----------------------------
+## function: diff_lists
+## description: Operaciones mínimas para pasar de `old` a `new`.
+## \param key: función item -> valor hashable que identifica el contenido.
+## \return: [(tag, i1, i2, j1, j2)] con tag "replace" | "delete" | "insert"
+##          (mismo formato que difflib, sin los tramos "equal")
+## -----------------------------
+def diff_lists(old, new, key):
+    a = [key(x) for x in old]
+    b = [key(x) for x in new]
+    if a == b:
+        return []
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return [op for op in matcher.get_opcodes() if op[0] != "equal"]
+
+
+## -----------------------------
+## function: apply_diff
+## description: Aplica las operaciones de diff_lists sobre `items` (in-place).
+##              Se recorren de atrás para adelante para que los índices de
+##              las operaciones anteriores sigan siendo válidos.
+## \param on_delete: callback(i1, i2) antes de borrar items[i1:i2].
+## \param on_insert: callback(i, nuevos) después de insertar en la posición i.
+## -----------------------------
+def apply_diff(items, ops, new, on_delete=None, on_insert=None):
+    for tag, i1, i2, j1, j2 in reversed(ops):
+        if i2 > i1:
+            if on_delete:
+                on_delete(i1, i2)
+            del items[i1:i2]
+        if j2 > j1:
+            items[i1:i1] = new[j1:j2]
+            if on_insert:
+                on_insert(i1, new[j1:j2])
+    return items
+
+
+## -----------------------------
+## function: remap_index
+## description: Posición nueva del elemento que estaba en `i` (None si
+##              ese elemento fue borrado).
+## \param follow_replace: si el elemento fue reemplazado, devolver la
+##                        posición de su reemplazo (si no, None).
+## -----------------------------
+def remap_index(ops, i, follow_replace=False):
+    if i is None:
+        return None
+    desplazamiento = 0
+    for tag, i1, i2, j1, j2 in ops:
+        if i < i1:
+            break
+        if i < i2:
+            if follow_replace and tag == "replace":
+                return j1 + min(i - i1, j2 - j1 - 1)
+            return None
+        desplazamiento += (j2 - j1) - (i2 - i1)
+    return i + desplazamiento
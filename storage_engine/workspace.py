@@ -0,0 +1,306 @@
+# ======================================================
+# FILE: storage_engine/workspace.py
+# ======================================================
+"""
+Workspace: varias librerías de voicings abiertas a la vez, cada una en su
+namespace (por defecto el nombre del archivo sin extensión, p. ej.
+"voicingsDrop2_Harry_Barris").
+
+- carga perezosa: add() solo registra el archivo; se lee (read_voicings_file,
+  que pasa por load_cache) la primera vez que se usa, o antes llamando a
+  load() desde un hilo de fondo.
+- expulsión: a lo sumo `max_loaded` archivos en memoria; al cargar uno más
+  se descarta el usado hace más tiempo (evict() lo hace a mano). Un archivo
+  expulsado se vuelve a leer al usarlo. Cuenta como uso cargarlo y cada
+  hotkey que se encuentra en él.
+- residentes: pin() marca un archivo para que quede en memoria (nunca se
+  expulsa solo y no cuenta para `max_loaded`); así los hotkeys de más de
+  `max_loaded` archivos funcionan y cambiar de archivo no descarta un set
+  que se está tocando.
+- attach(): una lista que ya está en memoria (la librería en edición de la
+  GUI) como un namespace más; nunca se expulsa.
+- índice unificado: hotkey(), find_name() y search() recorren los namespaces
+  cargados en el orden del workspace (el primero que tiene el hotkey gana).
+  Cada namespace tiene su propio índice (hotkeys, nombres, PitchClassIndex)
+  que se arma al usarlo y se descarta cuando ese namespace cambia: editar una
+  librería no rehace los índices de las otras. Los archivos no cargados no
+  participan (una búsqueda no dispara lecturas); unloaded() dice cuáles son
+  para poder mostrarlo.
+- nombres calificados: "namespace:nombre".
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from storage_engine.pitch_index import PitchClassIndex, parse_query
+
+MAX_LOADED = 4
+SEPARATOR = ":"
+
+
+class _NamespaceIndex:
+    """Hotkeys, nombres y clases de altura de una sola librería."""
+
+    def __init__(self, voicings):
+        self.voicings = voicings
+        self.hotkeys = {}
+        self.names = {}
+        for i, v in enumerate(voicings):
+            hk = v.get("hotkey")
+            if hk and hk not in self.hotkeys:
+                self.hotkeys[hk] = i
+            self.names.setdefault(v.get("name"), []).append(i)
+        self._pitch_index = None
+
+    @property
+    def pitch_index(self):
+        if self._pitch_index is None:
+            self._pitch_index = PitchClassIndex.from_voicings(self.voicings)
+        return self._pitch_index
+
+
+class VoicingWorkspace:
+    """Librerías abiertas por namespace, con carga perezosa y expulsión LRU."""
+
+    def __init__(self, max_loaded=MAX_LOADED, loader=None):
+        self.max_loaded = max_loaded
+        self._loader = loader  # ruta -> lista de voicings (None = read_voicings_file)
+        self._paths = OrderedDict()  # namespace -> ruta absoluta (None = adjuntado con attach)
+        self._voicings = {}  # namespace -> lista cargada
+        self._uso = OrderedDict()  # archivos cargados, del usado hace más tiempo al más reciente
+        self._indexes = {}  # namespace -> _NamespaceIndex
+        self._gen = {}  # namespace -> generación; una lectura vieja no pisa un remove/add posterior
+        self._pinned = set()  # archivos residentes (ver pin)
+        self._lock = threading.RLock()
+
+    def namespaces(self):
+        with self._lock:
+            return list(self._paths)
+
+    def __contains__(self, namespace):
+        return namespace in self._paths
+
+    def __len__(self):
+        return len(self._paths)
+
+    def path(self, namespace):
+        return self._paths[namespace]
+
+    def is_loaded(self, namespace):
+        return namespace in self._voicings
+
+    def is_pinned(self, namespace):
+        return namespace in self._pinned
+
+    ## -----------------------------
+    ## function: unloaded
+    ## description: Archivos del workspace que no están en memoria (no
+    ##              participan en hotkey/find_name/search).
+    ## -----------------------------
+    def unloaded(self):
+        with self._lock:
+            return [ns for ns, p in self._paths.items() if p is not None and ns not in self._voicings]
+
+    ## -----------------------------
+    ## function: pin
+    ## description: Marca (o desmarca con pinned=False) un archivo como
+    ##              residente: una vez cargado no se expulsa por LRU. No lo
+    ##              lee; eso lo hace load().
+    ## -----------------------------
+    def pin(self, namespace, pinned=True):
+        with self._lock:
+            if self._paths[namespace] is None:
+                return  # los adjuntados ya son residentes
+            if pinned:
+                self._pinned.add(namespace)
+            else:
+                self._pinned.discard(namespace)
+                self._evict_lru()
+
+    def _free_namespace(self, base):
+        base = base.replace(SEPARATOR, "_") or "voicings"
+        namespace, k = base, 2
+        while namespace in self._paths:
+            namespace = f"{base}-{k}"
+            k += 1
+        return namespace
+
+    ## -----------------------------
+    ## function: add
+    ## description: Registra un archivo (sin leerlo).
+    ## \param namespace: nombre a usar (None = nombre del archivo, sin repetir).
+    ## \return: namespace del archivo (el que ya tenía si estaba agregado)
+    ## -----------------------------
+    def add(self, path, namespace=None):
+        path = os.path.abspath(path)
+        with self._lock:
+            for ns, p in self._paths.items():
+                if p == path:
+                    return ns
+            if namespace is None:
+                namespace = self._free_namespace(os.path.splitext(os.path.basename(path))[0])
+            elif SEPARATOR in namespace or not namespace:
+                raise ValueError(f"Namespace no válido: '{namespace}'")
+            elif namespace in self._paths:
+                raise ValueError(f"El namespace '{namespace}' ya existe")
+            self._paths[namespace] = path
+            self._gen[namespace] = self._gen.get(namespace, 0) + 1
+            return namespace
+
+    ## -----------------------------
+    ## function: attach
+    ## description: Usa una lista en memoria como namespace (o la reemplaza si
+    ##              ya estaba adjuntada). Hay que volver a llamarla cada vez
+    ##              que la lista cambia, para descartar su índice.
+    ## -----------------------------
+    def attach(self, namespace, voicings):
+        with self._lock:
+            if self._paths.get(namespace) is not None:
+                raise ValueError(f"'{namespace}' es un archivo del workspace")
+            self._paths[namespace] = None
+            self._voicings[namespace] = voicings
+            self._indexes.pop(namespace, None)
+
+    def remove(self, namespace):
+        with self._lock:
+            del self._paths[namespace]
+            self._pinned.discard(namespace)
+            self._drop(namespace)
+            self._gen[namespace] = self._gen.get(namespace, 0) + 1
+
+    def _drop(self, namespace):
+        self._voicings.pop(namespace, None)
+        self._uso.pop(namespace, None)
+        self._indexes.pop(namespace, None)
+
+    def _read(self, path):
+        if self._loader is not None:
+            return self._loader(path)
+        from storage_engine.voicing_storage import read_voicings_file
+        return read_voicings_file(path)
+
+    ## -----------------------------
+    ## function: load
+    ## description: Voicings de un namespace, leyéndolo si no está cargado
+    ##              (se puede llamar desde un hilo de fondo para precargar).
+    ##              No hay que modificar la lista devuelta: es la que usa el
+    ##              índice (la GUI trabaja sobre una copia).
+    ## -----------------------------
+    def load(self, namespace):
+        with self._lock:
+            path = self._paths[namespace]
+            voicings = self._voicings.get(namespace)
+            if voicings is not None:
+                if path is not None:
+                    self._uso.move_to_end(namespace)
+                    self._evict_lru()
+                return voicings
+            gen = self._gen[namespace]
+
+        # la lectura se hace fuera del lock (puede tardar)
+        voicings = self._read(path)
+
+        with self._lock:
+            if self._gen.get(namespace) != gen or namespace not in self._paths:
+                return voicings  # se quitó mientras se leía: no se guarda
+            actual = self._voicings.get(namespace)
+            if actual is not None:
+                return actual  # otro hilo lo cargó primero
+            self._voicings[namespace] = voicings
+            self._uso[namespace] = True
+            self._evict_lru()
+            return voicings
+
+    def _evict_lru(self):
+        # el último (el recién usado) y los residentes nunca se expulsan
+        expulsables = [ns for ns in self._uso if ns not in self._pinned]
+        for ns in expulsables[:len(expulsables) - max(1, self.max_loaded)]:
+            self._drop(ns)
+
+    def _touch(self, namespace):
+        with self._lock:
+            if namespace in self._uso:
+                self._uso.move_to_end(namespace)
+
+    ## -----------------------------
+    ## function: evict
+    ## description: Descarta de memoria un archivo (los adjuntados no).
+    ## \return: True si estaba cargado
+    ## -----------------------------
+    def evict(self, namespace):
+        with self._lock:
+            if self._paths.get(namespace) is None:
+                return False
+            cargado = namespace in self._voicings
+            self._drop(namespace)
+            return cargado
+
+    def _index(self, namespace):
+        with self._lock:
+            voicings = self._voicings.get(namespace)
+            idx = self._indexes.get(namespace)
+        if voicings is None:
+            return None
+        if idx is None or idx.voicings is not voicings:
+            idx = _NamespaceIndex(voicings)
+            with self._lock:
+                if self._voicings.get(namespace) is voicings:
+                    self._indexes[namespace] = idx
+        return idx
+
+    def _loaded_indexes(self):
+        for namespace in self.namespaces():
+            idx = self._index(namespace)
+            if idx is not None:
+                yield namespace, idx
+
+    ## -----------------------------
+    ## function: hotkey
+    ## description: Primer voicing (en el orden del workspace) con ese hotkey,
+    ##              entre los namespaces cargados. Encontrarlo cuenta como uso
+    ##              del archivo para el LRU.
+    ## \return: (namespace, índice, voicing) o None
+    ## -----------------------------
+    def hotkey(self, hk):
+        for namespace, idx in self._loaded_indexes():
+            i = idx.hotkeys.get(hk)
+            if i is not None:
+                self._touch(namespace)
+                return namespace, i, idx.voicings[i]
+        return None
+
+    ## -----------------------------
+    ## function: find_name
+    ## description: Voicings con ese nombre en los namespaces cargados, o en
+    ##              uno solo con "namespace:nombre" (ese se carga si hace falta).
+    ## \return: lista de (namespace, índice, voicing)
+    ## -----------------------------
+    def find_name(self, name):
+        namespace, sep, resto = name.partition(SEPARATOR)
+        if sep and namespace in self._paths:
+            self.load(namespace)
+            idx = self._index(namespace)
+            fuentes = [(namespace, idx)] if idx is not None else []
+            name = resto
+        else:
+            fuentes = self._loaded_indexes()
+        return [(ns, i, idx.voicings[i]) for ns, idx in fuentes for i in idx.names.get(name, ())]
+
+    ## -----------------------------
+    ## function: search
+    ## description: Búsqueda por clases de altura (ver pitch_index.parse_query)
+    ##              en todos los namespaces cargados. ValueError si la
+    ##              consulta no es válida.
+    ## \return: lista de (namespace, índice, voicing)
+    ## -----------------------------
+    def search(self, query):
+        modo, valor = parse_query(query)
+        resultado = []
+        for namespace, idx in self._loaded_indexes():
+            indices = getattr(idx.pitch_index, modo)(valor)
+            resultado.extend((namespace, int(i), idx.voicings[i]) for i in indices)
+        return resultado
+
+
+def qualified_name(namespace, voicing):
+    return f"{namespace}{SEPARATOR}{voicing.get('name', '(unnamed)')}"
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# los tests importan los paquetes del proyecto (midi_engine, storage_engine, ...)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
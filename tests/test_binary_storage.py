@@ -0,0 +1,52 @@
+import json
+
+from midi_engine.pitch_sets import mascara_de_midi
+from storage_engine.binary_storage import (BinaryVoicingLibrary, binary_to_json, is_binary_library,
+                                           json_to_binary, write_binary)
+
+
+def _voicings():
+    return [
+        {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"], "hotkey": "1"},
+        {"name": "sin root", "notes": ["Db3", "C#4"]},
+        {"name": "root nula", "root": None, "notes": ["D3", "F3"], "hotkey": 5},
+        {"name": "raro", "root": "C3", "notes": ["C3", "H9"], "tags": ["x", {"y": 1}], "n": 1.5},
+        {"name": "vacío", "root": "C3", "notes": []},
+    ]
+
+
+def test_ida_y_vuelta(tmp_path):
+    path = tmp_path / "lib.vbin"
+    write_binary(_voicings(), path)
+    assert is_binary_library(path)
+    with BinaryVoicingLibrary(path) as lib:
+        assert len(lib) == 5
+        assert lib.to_list() == _voicings()
+        assert lib[-1] == _voicings()[-1]
+        assert "root" not in lib[1]
+
+
+def test_columnas_midi(tmp_path):
+    path = tmp_path / "lib.vbin"
+    write_binary(_voicings(), path)
+    with BinaryVoicingLibrary(path) as lib:
+        assert list(lib.midi_notes(0)) == [48, 52, 55, 59]
+        assert list(lib.midi_notes(3)) == [48, 255]  # 255 = nota desconocida
+        assert int(lib.pc_mask[0]) == mascara_de_midi([48, 52, 55, 59])
+        assert int(lib.pc_mask[1]) == mascara_de_midi([49])
+        assert lib.name(2) == "root nula"
+
+
+def test_conversion_desde_y_hacia_json(tmp_path):
+    origen, binario, destino = tmp_path / "a.json", tmp_path / "a.vbin", tmp_path / "b.json"
+    origen.write_text(json.dumps({"voicings": _voicings()}), encoding="utf-8")
+    assert json_to_binary(origen, binario) == 5
+    assert binary_to_json(binario, destino) == 5
+    assert json.loads(destino.read_text(encoding="utf-8")) == {"voicings": _voicings()}
+
+
+def test_libreria_vacia(tmp_path):
+    path = tmp_path / "vacia.vbin"
+    write_binary([], path)
+    with BinaryVoicingLibrary(path) as lib:
+        assert lib.to_list() == []
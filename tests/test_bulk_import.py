@@ -0,0 +1,64 @@
+import json
+
+import storage_engine.bulk_import as bulk_import_mod
+from storage_engine.bulk_import import bulk_import, expand_paths
+from storage_engine.load_cache import load_cache
+
+
+def _escribir(path, voicings):
+    path.write_text(json.dumps({"voicings": voicings}), encoding="utf-8")
+
+
+def _archivos(tmp_path):
+    carpeta = tmp_path / "fuentes"
+    (carpeta / "sub").mkdir(parents=True)
+    _escribir(carpeta / "a.json", [
+        {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"], "hotkey": "1"},
+        {"name": "vacío", "notes": []},
+    ])
+    _escribir(carpeta / "sub" / "b.json", [
+        # mismas notas en otro orden: duplicado
+        {"name": "otro", "notes": ["E3", "C3", "B3", "G3"]},
+        {"name": "Cmaj7", "root": "D3", "notes": ["D3", "F#3", "A3", "C#4"], "hotkey": "1"},
+        {"name": "raro", "notes": ["C3", "H9"]},
+    ])
+    (carpeta / "c.json").write_text("{no es json", encoding="utf-8")
+    (carpeta / "notas.txt").write_text("ignorado", encoding="utf-8")
+    return carpeta
+
+
+def test_expand_paths_ordenado_y_sin_repetir(tmp_path):
+    carpeta = _archivos(tmp_path)
+    rutas = expand_paths([str(carpeta), str(carpeta / "a.json")])
+    assert [r[len(str(carpeta)) + 1:] for r in rutas] == ["a.json", "c.json", "sub/b.json"]
+
+
+def test_union_de_archivos(tmp_path):
+    carpeta = _archivos(tmp_path)
+    salida = tmp_path / "master.json"
+    merged, reporte = bulk_import([str(carpeta)], output=str(salida), workers=1)
+    assert [v["name"] for v in merged] == ["Cmaj7", "Cmaj7 (2)"]
+    assert "hotkey" not in merged[1]
+    assert reporte["read"] == 5 and reporte["written"] == 2
+    assert reporte["duplicates"] == 1 and reporte["invalid"] == 2
+    assert list(reporte["errors"]) == [str(carpeta / "c.json")]
+    assert [v["name"] for v in json.loads(salida.read_text(encoding="utf-8"))["voicings"]] == ["Cmaj7", "Cmaj7 (2)"]
+
+
+def test_conservar_duplicados(tmp_path):
+    merged, reporte = bulk_import([str(_archivos(tmp_path))], workers=1, keep_duplicates=True)
+    assert [v["name"] for v in merged] == ["Cmaj7", "otro", "Cmaj7 (2)"]
+    assert reporte["duplicates"] == 0
+
+
+def test_el_worker_no_llena_load_cache(tmp_path, monkeypatch):
+    carpeta = _archivos(tmp_path)
+    llamadas = []
+    monkeypatch.setattr(load_cache, "get", lambda *a, **k: llamadas.append(a))
+    bulk_import_mod._parse_file(str(carpeta / "a.json"))
+    assert llamadas == []
+
+
+def test_mismo_resultado_con_varios_procesos(tmp_path):
+    carpeta = _archivos(tmp_path)
+    assert bulk_import([str(carpeta)], workers=2) == bulk_import([str(carpeta)], workers=1)
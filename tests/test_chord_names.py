@@ -0,0 +1,72 @@
+import glob
+import json
+import os
+import random
+
+import pytest
+
+from midi_engine.chord_names import (CALIDADES, SIMBOLOS, calidad_de_nombre, etiquetar_masivo, parsear_acorde,
+                                     reconocer, sugerir_nombre, verificar_nombres)
+from midi_engine.pitch_sets import mascara_de_midi, nota_de_midi
+from storage_engine.voicing_record import VoicingRecord, normalize_voicings
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "storage_engine", "data")
+
+
+def _libreria(path):
+    with open(path, encoding="utf-8") as f:
+        return normalize_voicings(json.load(f)["voicings"])
+
+
+def test_librerias_incluidas_tienen_nombres_correctos():
+    archivos = glob.glob(os.path.join(DATA_DIR, "voicings*.json"))
+    assert archivos
+    for path in archivos:
+        voicings = _libreria(path)
+        assert voicings and all(v.valid for v in voicings)
+        assert verificar_nombres(voicings) == [], os.path.basename(path)
+
+
+def test_nombre_sugerido_en_voicings_cerrados():
+    for v in _libreria(os.path.join(DATA_DIR, "voicingsClose_Harry_Barris.json")):
+        assert calidad_de_nombre(sugerir_nombre(v, v["root"])) == calidad_de_nombre(v["name"])
+
+
+def test_cada_calidad_root_e_inversion():
+    for q, (_, intervalos) in enumerate(CALIDADES):
+        for root in range(12):
+            for k in range(len(intervalos)):
+                midi = [48 + root + iv for iv in intervalos[k:]] + [60 + root + iv for iv in intervalos[:k]]
+                bajo = midi[0] % 12
+                assert reconocer(mascara_de_midi(midi), root, bajo) == (root, q, k)
+
+
+def test_etiquetado_masivo_igual_que_uno_por_uno():
+    rng = random.Random(0)
+    mascaras = [rng.randrange(1, 4096) for _ in range(500)]
+    roots = [rng.choice([-1] + list(range(12))) for _ in mascaras]
+    bajos = [rng.randrange(12) for _ in mascaras]
+    r, q, inv = etiquetar_masivo(mascaras, roots, bajos)
+    for i, (m, root, bajo) in enumerate(zip(mascaras, roots, bajos)):
+        esperado = reconocer(m, None if root < 0 else root, bajo)
+        if esperado is None:
+            assert q[i] < 0
+        else:
+            assert (int(r[i]), int(q[i]), int(inv[i])) == esperado
+
+
+def test_verificar_detecta_nombres_equivocados():
+    notas = [nota_de_midi(m) for m in (48, 51, 55, 57)]  # Cm6
+    voicings = [VoicingRecord(name=n, root="C3", notes=notas) for n in ("m6", "maj7", "m6 1Inv", "m6 2Inv Drop2")]
+    assert verificar_nombres(voicings) == [(1, "maj7", "m6"), (2, "m6 1Inv", "m6")]
+
+
+def test_parsear_acorde():
+    assert parsear_acorde("Cm6") == (0, SIMBOLOS.index("m6"))
+    assert parsear_acorde("F#7") == (6, SIMBOLOS.index("7"))
+    assert parsear_acorde("Bb") == (10, SIMBOLOS.index("maj"))
+    assert parsear_acorde("EbΔ7/G") == (3, SIMBOLOS.index("maj7"))
+    assert parsear_acorde("DDim7") == (2, SIMBOLOS.index("dim7"))
+    for malo in ("H7", "Cxyz"):
+        with pytest.raises(ValueError):
+            parsear_acorde(malo)
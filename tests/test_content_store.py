@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from storage_engine.content_store import (StoreError, VoicingStore, pack_file, unpack_file,
+                                          voicings_from_manifest, write_manifest)
+
+
+def _leer(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_manifiesto_ida_y_vuelta(tmp_path):
+    voicings = [
+        {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"], "hotkey": "1"},
+        {"name": "otra", "root": None, "notes": ["C3", "E3", "G3", "B3"]},
+        {"name": "con id", "notes": ["D3", "F3"], "id": 7, "extra": {"a": 1}, "tags": ["x"]},
+    ]
+    path = tmp_path / "v.json"
+    write_manifest(voicings, path, gen="g1")
+    data = _leer(path)
+    assert data["gen"] == "g1"
+    # las notas repetidas se guardan una sola vez
+    assert len(VoicingStore(tmp_path / "voicing_store")) == 2
+    assert data["voicings"][0]["id"] == data["voicings"][1]["id"] != data["voicings"][2]["id"]
+    assert voicings_from_manifest(data, path) == voicings
+
+
+def test_pack_y_unpack(tmp_path):
+    voicings = [{"name": "a", "root": "C3", "notes": ["C3", "E3"]}]
+    path = tmp_path / "v.json"
+    path.write_text(json.dumps({"gen": "g", "voicings": voicings}), encoding="utf-8")
+    assert pack_file(path) == 1
+    assert _leer(path)["manifest"] == 1
+    assert unpack_file(path) == 1
+    assert _leer(path) == {"voicings": voicings, "gen": "g"}
+
+
+def test_cola_cortada_del_store(tmp_path):
+    store = VoicingStore(tmp_path / "voicing_store")
+    store.put_many([("C3", "E3")])
+    with open(store.path, "a", encoding="utf-8") as f:
+        f.write('{"id": "abc", "no')
+    (k,) = store.put_many([("D3", "F3")])
+    assert len(store.objects()) == 2 and k in store
+    assert all(json.loads(linea) for linea in open(store.path, encoding="utf-8"))
+
+
+def test_objeto_faltante(tmp_path):
+    path = tmp_path / "v.json"
+    write_manifest([{"name": "a", "notes": ["C3"]}], path)
+    (tmp_path / "voicing_store" / "objects.jsonl").write_text("", encoding="utf-8")
+    with pytest.raises(StoreError):
+        voicings_from_manifest(_leer(path), path)
@@ -0,0 +1,70 @@
+import itertools
+import random
+
+import pytest
+
+from rhythm_engine.enumerator import EnumeradorCompases
+from rhythm_engine.patterns import DURACIONES, RitmoPattern
+
+
+def _fuerza_bruta(duraciones, capacidad, max_eventos=None, min_silencios=0):
+    """Todas las secuencias de eventos que llenan el compás, en el orden de `duraciones`."""
+    max_eventos = capacidad if max_eventos is None else max_eventos
+    resultado = []
+    for largo in range(1, max_eventos + 1):
+        for combo in itertools.product(range(len(duraciones)), repeat=largo):
+            eventos = [duraciones[i] for i in combo]
+            if sum(DURACIONES[e] for e in eventos) != capacidad:
+                continue
+            if sum(e.startswith("silencio") for e in eventos) < min_silencios:
+                continue
+            resultado.append((combo, eventos))
+    return [eventos for _, eventos in sorted(resultado)]
+
+
+CASOS = [
+    dict(duraciones=["negra", "corchea", "semicorchea", "silencio_corchea"], capacidad=8),
+    dict(duraciones=["blanca", "negra", "silencio_negra", "corchea"], capacidad=16, max_eventos=5),
+    dict(duraciones=["semicorchea", "corchea", "silencio_semicorchea"], capacidad=6, min_silencios=2),
+]
+
+
+@pytest.mark.parametrize("kwargs", CASOS)
+def test_igual_a_fuerza_bruta(kwargs):
+    e = EnumeradorCompases(**kwargs)
+    esperado = _fuerza_bruta(**kwargs)
+    assert esperado
+    assert e.contar() == len(e) == len(esperado)
+    assert list(e.iter_compases()) == esperado
+
+
+@pytest.mark.parametrize("kwargs", CASOS)
+def test_n_esimo_e_iter_desde_inicio(kwargs):
+    e = EnumeradorCompases(**kwargs)
+    esperado = _fuerza_bruta(**kwargs)
+    for n in (0, 1, len(esperado) // 3, len(esperado) - 1):
+        assert e.compas(n) == esperado[n]
+        assert list(e.iter_compases(n)) == esperado[n:]
+    assert e.compas(-1) == esperado[-1]
+    assert list(e.iter_compases(len(esperado))) == []
+    with pytest.raises(IndexError):
+        e.compas(len(esperado))
+
+
+def test_compas_de_4_4_completo():
+    e = EnumeradorCompases(duraciones=["negra", "corchea", "silencio_negra"], min_silencios=1)
+    for compas in (e.compas(0), e.aleatorio(random.Random(1)), e.compas(-1)):
+        p = RitmoPattern("x", [compas])
+        assert p.is_complete(0)
+        assert any(ev.startswith("silencio") for ev in compas)
+    assert isinstance(e[0], RitmoPattern)
+    assert [p.compases[0] for p in itertools.islice(e, 3)] == list(itertools.islice(e.iter_compases(), 3))
+
+
+def test_restricciones_imposibles_y_tipos_no_validos():
+    e = EnumeradorCompases(duraciones=["negra"], max_eventos=3)
+    assert e.contar() == 0
+    with pytest.raises(ValueError):
+        e.aleatorio()
+    with pytest.raises(ValueError):
+        EnumeradorCompases(duraciones=["fusa"])
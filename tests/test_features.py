@@ -0,0 +1,107 @@
+import copy
+
+import numpy as np
+import pytest
+
+from rhythm_engine.features import COLUMNAS, TablaFeatures, calcular_features, parse_filtro
+from rhythm_engine.patterns import RitmoCompuesto, RitmoPattern
+
+
+def _patrones():
+    return [
+        RitmoPattern("negras", [["negra"] * 4]),
+        RitmoPattern("silencios", [["silencio_negra", "negra", "silencio_negra", "negra"]]),
+        RitmoPattern("sincopa", [["corchea", "negra", "negra", "negra", "corchea"]]),
+        RitmoPattern("larga", [["redonda"], ["blanca", "blanca"]]),
+    ]
+
+
+def _contar_hashes(monkeypatch):
+    llamadas = []
+    original = RitmoPattern.content_hash
+
+    def contar(self):
+        llamadas.append(self.name)
+        return original(self)
+    monkeypatch.setattr(RitmoPattern, "content_hash", contar)
+    return llamadas
+
+
+def test_columnas_basicas():
+    cols = calcular_features(_patrones())
+    assert cols["densidad"].tolist() == [4, 2, 5, 1.5]
+    assert cols["ratio_silencios"][1] == pytest.approx(0.5)
+    assert cols["sincopa"][0] == 0 and cols["sincopa"][2] > 0
+    assert cols["entropia"][0] == pytest.approx(0.5)
+    assert cols["nota_mas_larga"].tolist() == [4, 4, 4, 16]
+
+
+def test_compuesto_igual_que_aplanado():
+    a = RitmoPattern("a", [["negra"] * 4])
+    b = RitmoPattern("b", [["blanca", "corchea", "corchea", "negra"]])
+    comp = RitmoCompuesto("c", [(a, 2), (b, 1)])
+    cols = calcular_features([comp, comp.flatten()])
+    for c in COLUMNAS:
+        assert cols[c][0] == cols[c][1]
+
+
+def test_actualizar_recalcula_solo_lo_nuevo():
+    patrones = _patrones()
+    tabla = TablaFeatures()
+    assert tabla.actualizar(patrones) == 4
+    assert tabla.actualizar(patrones[::-1]) == 0
+    assert tabla["densidad"].tolist() == [1.5, 5, 2, 4]
+    nuevo = RitmoPattern("nuevo", [["blanca", "negra", "negra"]])
+    assert tabla.actualizar(patrones + [nuevo]) == 1
+    esperado = calcular_features(patrones + [nuevo])
+    for c in COLUMNAS:
+        assert np.array_equal(tabla[c], esperado[c])
+
+
+def test_refresco_solo_hashea_objetos_nuevos(monkeypatch):
+    patrones = _patrones()
+    tabla = TablaFeatures()
+    tabla.actualizar(patrones)
+    llamadas = _contar_hashes(monkeypatch)
+    assert tabla.actualizar(patrones) == 0
+    assert llamadas == []
+
+    # editar = reemplazar el objeto (como save() en la GUI)
+    editado = copy.deepcopy(patrones[2])
+    editado.compases[0] = ["blanca", "blanca"]
+    patrones[2] = editado
+    patrones[0].name = "renombrado"  # el nombre no entra en el hash
+    assert tabla.actualizar(patrones) == 1
+    assert llamadas == ["sincopa"]
+    assert tabla["densidad"][2] == 2
+
+
+def test_invalidar_tras_edicion_en_el_lugar(monkeypatch):
+    patrones = _patrones()
+    tabla = TablaFeatures()
+    tabla.actualizar(patrones)
+    patrones[0].compases[0] = ["redonda"]
+    tabla.invalidar(patrones[0])
+    llamadas = _contar_hashes(monkeypatch)
+    assert tabla.actualizar(patrones) == 1
+    assert llamadas == ["negras"]
+    assert tabla["densidad"][0] == 1
+
+
+def test_tabla_cargada_de_disco_reusa_filas():
+    patrones = _patrones()
+    tabla = TablaFeatures()
+    tabla.actualizar(patrones)
+    cargada = TablaFeatures(tabla.hashes, tabla.columnas)
+    assert cargada.actualizar(patrones) == 0
+
+
+def test_filtrar_y_ordenar():
+    tabla = TablaFeatures()
+    tabla.actualizar(_patrones())
+    assert tabla.filtrar("densidad>=2 nota_mas_larga<16").tolist() == [0, 1, 2]
+    assert tabla.filtrar([("densidad", "==", 4)]).tolist() == [0]
+    assert tabla.ordenar("densidad").tolist() == [3, 1, 0, 2]
+    assert tabla.ordenar("densidad", descendente=True, indices=[0, 1]).tolist() == [0, 1]
+    with pytest.raises(ValueError):
+        parse_filtro("tempo>3")
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+import storage_engine.voicing_storage as voicing_storage
+from storage_engine.journal import ChangeJournal, apply_records
+from storage_engine.load_cache import load_cache
+from storage_engine.saver import saver
+
+
+def _voicing(nombre, *notas):
+    return {"name": nombre, "root": notas[0], "notes": list(notas)}
+
+
+@pytest.fixture
+def libreria(tmp_path, monkeypatch):
+    path = tmp_path / "voicings.json"
+    monkeypatch.setattr(voicing_storage, "VOICINGS_DIR", str(tmp_path))
+    monkeypatch.setattr(voicing_storage, "ARCHIVO_VOICINGS", str(path))
+    voicing_storage.save_voicings([_voicing("a", "C3", "E3"), _voicing("b", "D3", "F3"),
+                                   _voicing("c", "E3", "G3")])
+    yield path
+    saver.flush()
+    load_cache.invalidate(str(path))
+
+
+def test_apply_records():
+    items = ["a", "b", "c"]
+    apply_records(items, [
+        {"op": "add", "index": 1, "value": "x"},
+        {"op": "update", "index": 0, "value": "A"},
+        {"op": "move", "index": 3, "to": 0},
+        {"op": "delete", "index": 2},
+        {"op": "delete", "index": 9},
+    ])
+    assert items == ["c", "A", "b"]
+
+
+def test_journal_de_otra_generacion_o_con_linea_cortada(tmp_path):
+    snap = tmp_path / "s.json"
+    snap.write_text("{}")
+    journal = ChangeJournal(snap)
+    journal.append([{"op": "delete", "index": 0}], "g1")
+    assert journal.read("g1") == [{"op": "delete", "index": 0}]
+    assert journal.read("g2") == []
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "del')
+    assert journal.read("g1") == [{"op": "delete", "index": 0}]
+    journal.append([{"op": "delete", "index": 1}], "g2")
+    assert journal.read("g1") == [] and journal.read("g2") == [{"op": "delete", "index": 1}]
+
+
+def test_cambios_se_reaplican_al_cargar(libreria):
+    voicings = voicing_storage.load_voicings()
+    voicings.append(voicing_storage.normalize_voicing(_voicing("d", "F3", "A3")))
+    voicing_storage.record_voicing_changes(voicings, [{"op": "add", "index": 3, "value": voicings[3]}])
+    voicings[0]["name"] = "A"
+    voicing_storage.record_voicing_changes(voicings, [{"op": "update", "index": 0, "value": voicings[0]}])
+    del voicings[1]
+    voicing_storage.record_voicing_changes(voicings, [{"op": "delete", "index": 1}])
+    voicings.insert(0, voicings.pop(2))
+    voicing_storage.record_voicing_changes(voicings, [{"op": "move", "index": 2, "to": 0}])
+
+    assert not saver.has_pending()
+    # el snapshot no se reescribió: los cambios están solo en el journal
+    assert [v["name"] for v in json.loads(libreria.read_text())["voicings"]] == ["a", "b", "c"]
+    assert [v["name"] for v in voicing_storage.load_voicings()] == ["d", "A", "c"]
+
+
+def test_journal_grande_se_compacta(libreria, monkeypatch):
+    monkeypatch.setattr(voicing_storage, "_journal",
+                        lambda: ChangeJournal(voicing_storage.ARCHIVO_VOICINGS, max_bytes=200))
+    voicings = voicing_storage.load_voicings()
+    for i in range(5):
+        voicings[0]["name"] = f"a{i}"
+        voicing_storage.record_voicing_changes(voicings, [{"op": "update", "index": 0, "value": voicings[0]}])
+    assert saver.has_pending()
+    saver.flush()
+    assert [v["name"] for v in json.loads(libreria.read_text())["voicings"]] == ["a4", "b", "c"]
+    assert ChangeJournal(libreria).read(json.loads(libreria.read_text())["gen"]) == []
+    assert voicing_storage.load_voicings() == voicings
+
+
+def test_snapshot_editado_a_mano_descarta_el_journal(libreria):
+    voicings = voicing_storage.load_voicings()
+    del voicings[0]
+    voicing_storage.record_voicing_changes(voicings, [{"op": "delete", "index": 0}])
+
+    # mismo "gen", otro contenido
+    data = json.loads(libreria.read_text())
+    data["voicings"].insert(0, _voicing("nuevo", "G3", "B3"))
+    libreria.write_text(json.dumps(data))
+    assert [v["name"] for v in voicing_storage.load_voicings()] == ["nuevo", "a", "b", "c"]
+
+    # un cambio sobre la lista vieja ya no va al journal: se guarda completa
+    voicing_storage.record_voicing_changes(voicings, [{"op": "delete", "index": 0}])
+    assert saver.has_pending()
+    saver.flush()
+    assert [v["name"] for v in voicing_storage.load_voicings()] == ["b", "c"]
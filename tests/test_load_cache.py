@@ -0,0 +1,74 @@
+import json
+import os
+
+from storage_engine.load_cache import EXPANSION, LoadCache
+
+
+def _lector(lecturas):
+    def leer(path):
+        lecturas.append(path)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return leer
+
+
+def test_segunda_lectura_sale_del_cache(tmp_path):
+    path = tmp_path / "a.json"
+    path.write_text('{"voicings": [1, 2]}')
+    cache, lecturas = LoadCache(), []
+    assert cache.get("voicings", path, _lector(lecturas)) == {"voicings": [1, 2]}
+    assert cache.get("voicings", path, _lector(lecturas)) == {"voicings": [1, 2]}
+    assert len(lecturas) == 1 and cache.hits == 1 and cache.misses == 1
+
+
+def test_se_relee_si_cambia_el_tamano(tmp_path):
+    path = tmp_path / "a.json"
+    path.write_text('{"voicings": [1]}')
+    st = os.stat(path)
+    cache, lecturas = LoadCache(), []
+    cache.get("voicings", path, _lector(lecturas))
+    path.write_text('{"voicings": [1, 2]}')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))  # mismo mtime, otro tamaño
+    assert cache.get("voicings", path, _lector(lecturas)) == {"voicings": [1, 2]}
+    assert len(lecturas) == 2
+
+
+def test_se_relee_si_cambia_el_mtime(tmp_path):
+    path = tmp_path / "a.json"
+    path.write_text('{"voicings": [1]}')
+    cache, lecturas = LoadCache(), []
+    cache.get("voicings", path, _lector(lecturas))
+    path.write_text('{"voicings": [2]}')  # mismo tamaño
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get("voicings", path, _lector(lecturas)) == {"voicings": [2]}
+    assert len(lecturas) == 2
+
+
+def test_copia_e_invalidate(tmp_path):
+    path = tmp_path / "a.json"
+    path.write_text('{"voicings": [1]}')
+    cache, lecturas = LoadCache(), []
+    copia = cache.get("voicings", path, _lector(lecturas), copy=lambda d: {"voicings": list(d["voicings"])})
+    copia["voicings"].append(99)
+    assert cache.get("voicings", path, _lector(lecturas), copy=dict) == {"voicings": [1]}
+    cache.invalidate(path)
+    cache.get("voicings", path, _lector(lecturas))
+    assert len(lecturas) == 2
+
+
+def test_expulsion_lru_por_memoria(tmp_path):
+    paths = []
+    for nombre in "abc":
+        path = tmp_path / f"{nombre}.json"
+        path.write_text("[" + "0," * 49 + "0]")  # 101 bytes
+        paths.append(path)
+    cache, lecturas = LoadCache(max_bytes=2 * 101 * EXPANSION), []
+    for path in paths[:2]:
+        cache.get("x", path, _lector(lecturas))
+    cache.get("x", paths[0], _lector(lecturas))  # a pasa a ser el más reciente
+    cache.get("x", paths[2], _lector(lecturas))  # expulsa b
+    assert cache.total_bytes == 2 * 101 * EXPANSION
+    cache.get("x", paths[0], _lector(lecturas))
+    cache.get("x", paths[1], _lector(lecturas))
+    assert [os.path.basename(p) for p in lecturas] == ["a.json", "b.json", "c.json", "b.json"]
@@ -0,0 +1,69 @@
+from collections import Counter
+
+import pytest
+
+from rhythm_engine.markov import TIPOS, ModeloRitmo
+from rhythm_engine.patterns import DURACIONES, RitmoPattern
+
+PATRONES = [
+    RitmoPattern("a", [["negra", "negra", "corchea", "corchea", "negra"],
+                       ["blanca", "silencio_negra", "negra"]]),
+    RitmoPattern("b", [["corchea"] * 8, ["negra", "corchea", "corchea", "blanca"]]),
+    # compás pasado de 16: el último evento no cabe y no se cuenta
+    RitmoPattern("c", [["blanca", "blanca", "negra"]]),
+]
+
+
+def _conteos_a_mano(patterns, orden, capacidad=16):
+    """(posición, contexto, evento) -> veces, recorriendo cada compás en Python."""
+    modelo = ModeloRitmo(orden=orden)
+    conteos = Counter()
+    for p in patterns:
+        for compas in p.iter_compases():
+            pos = 0
+            previos = []
+            for e in compas:
+                if pos + DURACIONES[e] > capacidad:
+                    break
+                ctx = 0
+                for j in range(1, orden):
+                    prev = previos[-j] if len(previos) >= j else modelo.BOS
+                    ctx += prev * (modelo.V + 1) ** (j - 1)
+                conteos[(pos, ctx, TIPOS.index(e))] += 1
+                previos.append(TIPOS.index(e))
+                pos += DURACIONES[e]
+    return conteos
+
+
+@pytest.mark.parametrize("orden", [1, 2, 3])
+def test_entrenar_igual_a_conteo_a_mano(orden):
+    modelo = ModeloRitmo(orden=orden).entrenar(PATRONES)
+    esperado = _conteos_a_mano(PATRONES, orden)
+    obtenido = {tuple(int(x) for x in i): int(modelo.conteos[i]) for i in zip(*modelo.conteos.nonzero())}
+    assert obtenido == dict(esperado)
+
+
+def test_compases_generados_llenan_el_4_4():
+    modelo = ModeloRitmo(orden=3).entrenar(PATRONES)
+    for compas in modelo.muestrear(500, rng=1):
+        assert sum(DURACIONES[e] for e in compas) == 16
+        assert RitmoPattern("x", [compas]).is_complete(0)
+
+
+def test_sin_suavizado_reproduce_el_unico_estilo():
+    compas = ["negra", "corchea", "corchea", "blanca"]
+    modelo = ModeloRitmo(orden=2, alpha=0).entrenar([RitmoPattern("solo", [compas])] * 3)
+    assert modelo.muestrear(20, rng=0) == [compas] * 20
+
+
+def test_misma_semilla_mismos_compases_y_patrones():
+    modelo = ModeloRitmo().entrenar(PATRONES)
+    assert modelo.muestrear(50, rng=7) == modelo.muestrear(50, rng=7)
+    patrones = modelo.muestrear_patrones(3, compases=2, prefijo="g", rng=7)
+    assert [p.name for p in patrones] == ["g_001", "g_002", "g_003"]
+    assert all(p.num_compases() == 2 for p in patrones)
+
+
+def test_orden_no_valido():
+    with pytest.raises(ValueError):
+        ModeloRitmo(orden=0)
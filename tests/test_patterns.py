@@ -0,0 +1,53 @@
+import pytest
+
+from rhythm_engine.patterns import RitmoCompuesto, RitmoPattern, hash_compas
+
+
+def _ansioso(partes, name="eager"):
+    """Merge "a mano": copia todos los compases."""
+    compases = []
+    for p, veces in partes:
+        for _ in range(veces):
+            compases.extend(list(c) for c in p.compases)
+    return RitmoPattern(name, compases, partes[0][0].tempo)
+
+
+def _partes():
+    intro = RitmoPattern("intro", [["redonda"]])
+    a = RitmoPattern("A", [["negra"] * 4, ["corchea"] * 8])
+    b = RitmoPattern("B", [["blanca", "blanca"], ["silencio_negra", "negra", "blanca"], ["semicorchea"] * 16])
+    return [(intro, 1), (a, 8), (b, 4), (a, 2)]
+
+
+def test_compas_y_flatten_como_el_merge_ansioso():
+    partes = _partes()
+    cancion = RitmoCompuesto("song", partes)
+    esperado = _ansioso(partes)
+    assert cancion.num_compases() == esperado.num_compases() == 1 + 16 + 12 + 4
+    assert [cancion.compas(i) for i in range(cancion.num_compases())] == esperado.compases
+    assert cancion.compas(-1) == esperado.compases[-1]
+    assert cancion.flatten().compases == esperado.compases
+    assert cancion.content_hash() == esperado.content_hash()
+    with pytest.raises(IndexError):
+        cancion.compas(cancion.num_compases())
+
+
+def test_merge_y_repeat_anidados():
+    intro, a, b = (p for p, _ in _partes()[:3])
+    forma = intro.merge(a.repeat(2), "x").merge(b, "y").repeat(3)
+    esperado = _ansioso([(intro, 1), (a, 2), (b, 1)] * 3)
+    assert list(map(list, forma.iter_compases())) == esperado.compases
+    # los compuestos no anidan partes de más
+    assert all(isinstance(p, RitmoPattern) for p, _ in intro.merge(a.repeat(2), "x").partes)
+
+
+def test_flatten_es_independiente():
+    a = RitmoPattern("A", [["negra"] * 4])
+    copia = a.repeat(2).flatten()
+    copia.compases[0][0] = "blanca"
+    assert a.compases == [["negra"] * 4]
+
+
+def test_hash_de_compas_por_contenido():
+    assert hash_compas(["negra", " negra"]) == hash_compas(("negra", "negra"))
+    assert hash_compas(["negra", "blanca"]) != hash_compas(["blanca", "negra"])
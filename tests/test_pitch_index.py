@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from midi_engine.pitch_sets import (CARDINAL, FORMA_T, VECTOR_INTERVALOS, clases_de, invertir, mascara_de_midi,
+                                    mascara_de_nombres, rotar)
+from storage_engine.pitch_index import PitchClassIndex, parse_query
+
+
+def _vector(mascara):
+    clases = clases_de(mascara)
+    vector = [0] * 6
+    for i, a in enumerate(clases):
+        for b in clases[i + 1:]:
+            ic = min((b - a) % 12, (a - b) % 12)
+            vector[ic - 1] += 1
+    return vector
+
+
+def test_tablas_contra_la_definicion():
+    for m in random.Random(0).sample(range(4096), 300):
+        assert CARDINAL[m] == len(clases_de(m))
+        assert FORMA_T[m] == min(rotar(m, k) for k in range(12))
+        assert list(VECTOR_INTERVALOS[m]) == _vector(m)
+        assert invertir(invertir(m)) == m
+
+
+def test_mascaras():
+    assert mascara_de_midi([48, 52, 55, 60]) == mascara_de_nombres(["C", "E4", "G"]) == 0b10010001
+    with pytest.raises(ValueError):
+        mascara_de_nombres(["H"])
+
+
+def _fuerza_bruta(masks, cumple):
+    return [i for i, m in enumerate(masks) if cumple(int(m))]
+
+
+def test_consultas_contra_fuerza_bruta():
+    rng = random.Random(1)
+    masks = [rng.randrange(4096) for _ in range(2000)] + [0b10010001] * 3
+    indice = PitchClassIndex(masks)
+    for q in rng.sample(range(1, 4096), 40) + [0b10010001]:
+        assert list(indice.exact(q)) == _fuerza_bruta(masks, lambda m: m == q)
+        assert list(indice.transpositions(q)) == _fuerza_bruta(masks, lambda m: FORMA_T[m] == FORMA_T[q])
+        assert list(indice.superset(q)) == _fuerza_bruta(masks, lambda m: m & q == q)
+        assert list(indice.subset(q)) == _fuerza_bruta(masks, lambda m: m & ~q & 0xFFF == 0)
+    for ic in range(1, 7):
+        assert list(indice.with_interval(ic)) == _fuerza_bruta(masks, lambda m: _vector(m)[ic - 1] > 0)
+
+
+def test_busqueda_en_texto():
+    assert parse_query("C Eb G A") == ("transpositions", mascara_de_nombres(["C", "Eb", "G", "A"]))
+    assert parse_query("=C, E") == ("exact", 0b10001)
+    assert parse_query("ic6") == ("with_interval", 6)
+    for mala in ("", "=", "=H"):
+        with pytest.raises(ValueError):
+            parse_query(mala)
+    voicings = [{"notes": ["C3", "Eb3", "G3", "A3"]}, {"notes": ["D3", "F3", "A3", "B3"]}, {"notes": ["C3", "E3"]}]
+    indice = PitchClassIndex.from_voicings(voicings)
+    assert list(indice.search("C Eb G A")) == [0, 1]
+    assert list(indice.search("=D F A B")) == [1]
+    assert list(indice.search(">C")) == [0, 2]
+    assert indice.search("ic6").dtype == np.int64
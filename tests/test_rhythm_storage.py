@@ -0,0 +1,64 @@
+import json
+
+from rhythm_engine.patterns import RitmoPattern
+from storage_engine.rhythm_storage import (dedupe_patterns, export_patterns, load_patterns,
+                                           record_pattern_changes, save_patterns)
+from storage_engine.saver import saver
+
+
+def _patterns():
+    rock = [["negra"] * 4, ["corchea"] * 8]
+    return [
+        RitmoPattern("rock", [list(c) for c in rock], 120),
+        RitmoPattern("rock lento", [list(c) for c in rock], 80),
+        RitmoPattern("rock (copia)", [list(c) for c in rock], 120),
+        RitmoPattern("silencios", [["silencio_redonda"], ["negra"] * 4], 100),
+    ]
+
+
+def _como_dicts(patterns):
+    return [p.to_dict() for p in patterns]
+
+
+def test_v2_ida_y_vuelta(tmp_path):
+    path = tmp_path / "rhythms.json"
+    save_patterns(_patterns(), path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["version"] == 2 and data["gen"]
+    # cada compás distinto se guarda una sola vez
+    assert len(data["compases"]) == 3
+    assert [p["compases"] for p in data["patterns"]] == [[0, 1], [0, 1], [0, 1], [2, 0]]
+    assert _como_dicts(load_patterns(path)) == _como_dicts(_patterns())
+
+
+def test_formato_antiguo_se_sigue_leyendo(tmp_path):
+    path = tmp_path / "rhythms.json"
+    path.write_text(json.dumps(_como_dicts(_patterns())), encoding="utf-8")
+    assert _como_dicts(load_patterns(path)) == _como_dicts(_patterns())
+
+
+def test_exportar_escribe_el_formato_antiguo(tmp_path):
+    path = tmp_path / "export.json"
+    export_patterns(_patterns(), path)
+    assert json.loads(path.read_text(encoding="utf-8")) == _como_dicts(_patterns())
+
+
+def test_dedupe_conserva_el_primero(tmp_path):
+    unicos, reporte = dedupe_patterns(_patterns())
+    assert [p.name for p in unicos] == ["rock", "rock lento", "silencios"]
+    assert reporte["patterns_unique"] == 3
+    assert reporte["bars_total"] == 8 and reporte["bars_unique"] == 3
+    assert reporte["duplicates"][0]["names"] == ["rock", "rock (copia)"]
+
+
+def test_cambios_por_journal(tmp_path):
+    path = tmp_path / "rhythms.json"
+    save_patterns(_patterns(), path)
+    patterns = load_patterns(path)
+    nuevo = RitmoPattern("nuevo", [["blanca", "blanca"]], 90)
+    patterns.insert(1, nuevo)
+    record_pattern_changes(patterns, [{"op": "add", "index": 1, "value": nuevo.to_dict()}], path)
+    del patterns[0]
+    record_pattern_changes(patterns, [{"op": "delete", "index": 0}], path)
+    assert not saver.has_pending()
+    assert _como_dicts(load_patterns(path)) == _como_dicts(patterns)
@@ -0,0 +1,30 @@
+import os
+import stat
+
+import pytest
+
+from storage_engine.saver import atomic_write_json, atomic_write_text
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="permisos POSIX")
+
+
+def _modo(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_archivo_nuevo_con_permisos_de_open(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+    path = tmp_path / "nuevo.json"
+    atomic_write_json(path, {"voicings": []})
+    assert _modo(path) == 0o666 & ~umask
+
+
+def test_reemplazo_conserva_los_permisos(tmp_path):
+    path = tmp_path / "voicings.json"
+    path.write_text("{}")
+    os.chmod(path, 0o640)
+    atomic_write_text(path, '{"voicings": []}')
+    assert _modo(path) == 0o640
+    assert path.read_text() == '{"voicings": []}'
+    assert os.listdir(tmp_path) == ["voicings.json"]  # sin temporales sueltos
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from storage_engine.similarity_index import PITCH_CLASSES, REGISTER, VOICE_LEADING, SimilarityIndex
+import storage_engine.similarity_index as similarity_index
+
+
+def _distancia(a, b, width):
+    """La distancia del docstring de similarity_index, sin NumPy."""
+    a = sorted(a) + [max(a)] * (width - len(a))
+    b = sorted(b) + [max(b)] * (width - len(b))
+    movimiento = sum(abs(x - y) for x, y in zip(a, b)) / width
+    clases = len({m % 12 for m in a} ^ {m % 12 for m in b})
+    registro = abs(sum(a) / width - sum(b) / width)
+    return VOICE_LEADING * movimiento + PITCH_CLASSES * clases + REGISTER * registro
+
+
+def _fuerza_bruta(midi_lists, q, k, exclude=None):
+    width = max(max(len(m) for m in midi_lists if m), len(q))
+    todos = sorted((_distancia(q, m, width), i) for i, m in enumerate(midi_lists)
+                   if m and i != exclude)
+    return [(i, d) for d, i in todos[:k]]
+
+
+def _libreria(n, seed):
+    rng = random.Random(seed)
+    midi_lists = []
+    for _ in range(n):
+        base = rng.randrange(36, 72)
+        midi_lists.append([base + rng.randrange(0, 24) for _ in range(rng.randrange(3, 6))])
+    midi_lists[5] = []  # voicing sin notas válidas: no entra al índice
+    return midi_lists
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_nearest_igual_a_fuerza_bruta(monkeypatch, seed):
+    # bloques chicos para que la poda corte de verdad
+    monkeypatch.setattr(similarity_index, "BLOCK", 16)
+    midi_lists = _libreria(600, seed)
+    indice = SimilarityIndex(midi_lists)
+    for consulta in (0, 17, 333, 599):
+        esperado = _fuerza_bruta(midi_lists, midi_lists[consulta], 10, exclude=consulta)
+        obtenido = indice.nearest(midi_lists[consulta], k=10, exclude=consulta)
+        assert [d for _, d in obtenido] == pytest.approx([d for _, d in esperado])
+        # mismos ids salvo empates en la última distancia
+        ultima = esperado[-1][1]
+        assert {i for i, d in obtenido if d < ultima - 1e-9} == {i for i, d in esperado if d < ultima - 1e-9}
+
+
+def test_consulta_mas_ancha_que_el_indice():
+    midi_lists = _libreria(200, 7)
+    indice = SimilarityIndex(midi_lists)
+    q = [40, 47, 52, 55, 59, 62, 66, 71]
+    esperado = _fuerza_bruta(midi_lists, q, 5)
+    obtenido = indice.nearest(q, k=5)
+    assert [d for _, d in obtenido] == pytest.approx([d for _, d in esperado])
+
+
+def test_from_voicings_usa_posiciones_de_la_lista():
+    voicings = [
+        {"name": "a", "notes": ["C3", "E3", "G3"]},
+        {"name": "vacío", "notes": []},
+        {"name": "b", "notes": ["C3", "E3", "A3"]},
+        {"name": "c", "notes": ["C5", "F#5", "B5"]},
+    ]
+    indice = SimilarityIndex.from_voicings(voicings)
+    assert len(indice) == 3
+    assert [i for i, _ in indice.nearest([48, 52, 55], k=2, exclude=0)] == [2, 3]
+    assert indice.nearest([], k=2) == []
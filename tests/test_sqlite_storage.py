@@ -0,0 +1,53 @@
+import json
+
+from rhythm_engine.patterns import RitmoPattern
+from storage_engine.sqlite_storage import SQLiteLibrary, pitch_class_mask
+
+
+def _voicings():
+    return [
+        {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"], "hotkey": "a"},
+        {"name": "C_7", "root": None, "notes": ["C3", "E3", "Bb3"], "tags": ["x"]},
+        {"name": "C%9", "notes": ["C3", "E3", "D4"]},
+        {"name": "Cx7", "root": "C3", "notes": ["C3", "E3", "G3", "Bb3"]},
+    ]
+
+
+def test_voicings_ida_y_vuelta(tmp_path):
+    with SQLiteLibrary(tmp_path / "lib.sqlite") as lib:
+        lib.replace_voicings(_voicings())
+        assert lib.load_voicings() == _voicings()
+        assert lib.count_voicings() == 4
+        assert [v["name"] for v in lib.page_voicings(1, 2)] == ["C_7", "C%9"]
+        assert lib.find_by_hotkey("a")[0]["name"] == "Cmaj7"
+
+
+def test_filtros_de_voicings(tmp_path):
+    with SQLiteLibrary(tmp_path / "lib.sqlite") as lib:
+        lib.replace_voicings(_voicings())
+        # % y _ del prefijo se buscan literalmente
+        assert [v["name"] for v in lib.page_voicings(name="C_")] == ["C_7"]
+        assert [v["name"] for v in lib.page_voicings(name="C%")] == ["C%9"]
+        assert lib.count_voicings(name="C") == 4
+        mascara = pitch_class_mask(["C3", "E3", "G3", "B3"])
+        assert [v["name"] for v in lib.page_voicings(pc_mask=mascara)] == ["Cmaj7"]
+        assert lib.count_voicings(contains_mask=pitch_class_mask(["C3", "E3"])) == 4
+
+
+def test_prefijo_de_patrones_literal(tmp_path):
+    patterns = [RitmoPattern(n, [["negra"] * 4]) for n in ("a_b", "axb", "a%b", "a%c")]
+    with SQLiteLibrary(tmp_path / "lib.sqlite") as lib:
+        lib.replace_patterns(patterns)
+        assert lib.count_patterns() == 4
+        assert lib.count_patterns(name="a_") == 1
+        assert [p.name for p in lib.page_patterns(name="a%")] == ["a%b", "a%c"]
+        assert [p.name for p in lib.page_patterns(1, 2)] == ["axb", "a%b"]
+
+
+def test_exportar_patrones_como_lista_plana(tmp_path):
+    patterns = [RitmoPattern("uno", [["negra"] * 4, ["blanca", "blanca"]], 90)]
+    destino = tmp_path / "ritmos.json"
+    with SQLiteLibrary(tmp_path / "lib.sqlite") as lib:
+        lib.replace_patterns(patterns)
+        lib.export_patterns_json(destino)
+    assert json.loads(destino.read_text(encoding="utf-8")) == [p.to_dict() for p in patterns]
@@ -0,0 +1,54 @@
+from storage_engine.validator import DEFAULT_FIXES, check_voicing, validate_voicings
+
+
+def _libreria():
+    return [
+        {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"]},
+        "no soy un voicing",
+        {"name": "vacío", "root": "C3", "notes": []},
+        {"name": "Dm7", "root": "D3", "notes": ["F3", "D3", "A3", "C4"]},
+        {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"], "hotkey": "a"},
+        {"name": "G7", "root": "G2", "notes": ["G2", "B2", "D3", "F3"], "hotkey": "a"},
+    ]
+
+
+def test_voicing_correcto_sin_cambios():
+    v = {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"]}
+    assert check_voicing(v, DEFAULT_FIXES) == ([], v)
+
+
+def test_solo_revisar_no_devuelve_voicings():
+    voicings, reporte = validate_voicings(_libreria(), workers=1)
+    assert voicings is None
+    assert reporte["counts"] == {"not_an_object": 1, "no_notes": 1, "unsorted_notes": 1,
+                                 "duplicate_name": 1, "duplicate_hotkey": 1}
+    assert reporte["removed"] == reporte["changed"] == 0
+
+
+def test_fix_parcial_no_quita_lo_que_no_se_pidio():
+    libreria = _libreria()
+    voicings, reporte = validate_voicings(libreria, fix=["unsorted_notes"], workers=1)
+    assert len(voicings) == len(libreria)
+    assert reporte["removed"] == 0
+    assert reporte["changed"] == 1
+    assert voicings[1] == "no soy un voicing"
+    assert voicings[2] == libreria[2]
+    assert voicings[3]["notes"] == ["D3", "F3", "A3", "C4"]
+    arreglados = {i["code"]: i["fixed"] for i in reporte["issues"]}
+    assert arreglados == {"not_an_object": False, "no_notes": False, "unsorted_notes": True,
+                          "duplicate_name": False, "duplicate_hotkey": False}
+
+
+def test_fix_por_defecto():
+    voicings, reporte = validate_voicings(_libreria(), fix=True, workers=1)
+    assert reporte["removed"] == 2
+    assert [v["name"] for v in voicings] == ["Cmaj7", "Dm7", "Cmaj7 (2)", "G7"]
+    assert voicings[1]["notes"] == ["F3", "D3", "A3", "C4"]  # unsorted_notes no está por defecto
+    assert "hotkey" not in voicings[3]
+
+
+def test_mismo_resultado_con_varios_procesos(monkeypatch):
+    import storage_engine.validator as validator
+    monkeypatch.setattr(validator, "PARALLEL_MIN", 0)
+    libreria = _libreria() * 400
+    assert validate_voicings(libreria, fix=True, workers=2) == validate_voicings(libreria, fix=True, workers=1)
@@ -0,0 +1,87 @@
+import itertools
+import threading
+
+import numpy as np
+import pytest
+
+from midi_engine.chord_names import CALIDADES, parsear_acorde
+from midi_engine.notes_db import BD_Notas_Midi
+from midi_engine.pitch_sets import nota_de_midi
+from midi_engine.voice_leading import ConduccionDeVoces
+
+
+def _libreria():
+    """maj7, m7, 7 y m6 cerrados sobre C, en estado fundamental y sus inversiones."""
+    voicings = []
+    for calidad in ("maj7", "m7", "7", "m6"):
+        intervalos = dict(CALIDADES)[calidad]
+        for k in range(len(intervalos)):
+            midi = [48 + iv for iv in intervalos[k:]] + [60 + iv for iv in intervalos[:k]]
+            voicings.append({"name": f"{calidad} {k}Inv" if k else calidad, "root": "C3",
+                             "notes": [nota_de_midi(m) for m in midi]})
+    return voicings
+
+
+def _movimiento(a, b):
+    return int(np.abs(np.asarray(a, dtype=np.int32) - np.asarray(b, dtype=np.int32)).sum())
+
+
+def _fuerza_bruta(conduccion, progresion, agudas=None):
+    cands = []
+    for i, simbolo in enumerate(progresion):
+        aguda = None if agudas is None else BD_Notas_Midi[agudas[i]]
+        cands.append(conduccion.candidatos(*parsear_acorde(simbolo), aguda=aguda)[0])
+    return min(sum(_movimiento(a, b) for a, b in zip(camino, camino[1:]))
+               for camino in itertools.product(*cands))
+
+
+@pytest.mark.parametrize("progresion", ["Dm7 G7 Cmaj7", "Cm6 F7 Bbmaj7 Ebm6", "G7 Cmaj7 A7 Dm7 G7"])
+def test_viterbi_igual_a_fuerza_bruta(progresion):
+    conduccion = ConduccionDeVoces(_libreria())
+    resultado, total = conduccion.optimizar(progresion)
+    assert total == _fuerza_bruta(conduccion, progresion.split())
+
+    # el camino devuelto cuesta lo que dice
+    midi = [sorted(BD_Notas_Midi[n] for n in v["notes"]) for v in resultado]
+    assert sum(_movimiento(a, b) for a, b in zip(midi, midi[1:])) == total
+
+
+def test_candidatos_forman_el_acorde():
+    conduccion = ConduccionDeVoces(_libreria())
+    for simbolo in ("Dm7", "G7", "Ebmaj7", "F#m6"):
+        root, calidad = parsear_acorde(simbolo)
+        clases = {(root + iv) % 12 for iv in CALIDADES[calidad][1]}
+        midi, filas, desplazamientos = conduccion.candidatos(root, calidad)
+        assert len(midi)
+        for notas, d in zip(midi.tolist(), desplazamientos.tolist()):
+            assert {m % 12 for m in notas} == clases
+            assert -5 <= d <= 6
+
+
+def test_nota_aguda_fija():
+    conduccion = ConduccionDeVoces(_libreria())
+    agudas = ["C5", None, "B4"]
+    resultado, total = conduccion.optimizar("Dm7 G7 Cmaj7", agudas=agudas)
+    tops = [max(BD_Notas_Midi[n] for n in v["notes"]) for v in resultado]
+    assert tops[0] == BD_Notas_Midi["C5"] and tops[2] == BD_Notas_Midi["B4"]
+    assert total >= conduccion.optimizar("Dm7 G7 Cmaj7")[1]
+
+
+def test_sin_transponer_solo_roots_de_la_libreria():
+    conduccion = ConduccionDeVoces(_libreria())
+    resultado, _ = conduccion.optimizar("Cmaj7 Cm6", transponer=False)
+    assert [v["root"] for v in resultado] == ["C3", "C3"]
+    with pytest.raises(ValueError):
+        conduccion.optimizar("Dm7", transponer=False)
+
+
+def test_errores_y_cancelacion():
+    conduccion = ConduccionDeVoces(_libreria())
+    with pytest.raises(ValueError):
+        conduccion.optimizar("Cdim7")  # no hay dim7 en la librería
+    with pytest.raises(ValueError):
+        conduccion.optimizar("Dm7 G7", agudas=["C5"])
+    assert conduccion.optimizar("") == ([], 0)
+    cancelado = threading.Event()
+    cancelado.set()
+    assert conduccion.optimizar("Dm7 G7 Cmaj7", cancelado=cancelado) == (None, None)
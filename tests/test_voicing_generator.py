@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import midi_engine.voicing_generator as voicing_generator
+from midi_engine.notes_db import BD_Notas_Midi
+from midi_engine.voicing_generator import RANGO, generar_variantes
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "storage_engine", "data")
+
+
+def _libreria(nombre):
+    with open(os.path.join(DATA_DIR, nombre), encoding="utf-8") as f:
+        return json.load(f)["voicings"]
+
+
+def _midi(v):
+    return [BD_Notas_Midi[n] for n in v["notes"]]
+
+
+def _todas(*args, **kwargs):
+    return [v for lote in generar_variantes(*args, **kwargs) for v in lote]
+
+
+def _forma(midi):
+    return [m - midi[0] for m in midi]
+
+
+@pytest.mark.parametrize("drop", ["Drop2", "Drop24"])
+def test_como_las_librerias_drop_incluidas(drop):
+    # m6 y dim7 en estado fundamental: sus inversiones y drops tienen que ser
+    # los de la librería incluida (mismo nombre, notas en el orden del voicing
+    # cerrado); la librería está escrita una octava más arriba
+    cerrados = [v for v in _libreria("voicingsClose_Harry_Barris.json") if v["name"] in ("m6", "dim7")]
+    generados = {v["name"].lower(): v for v in _todas(cerrados, drops=(drop,), transponer=False)}
+    incluidos = [v for v in _libreria(f"voicings{drop}_Harry_Barris.json") if v["name"].split()[1:2] != ["2"]]
+    assert len(incluidos) == 8
+    for v in incluidos:
+        g = generados[v["name"].lower()]
+        assert _forma(_midi(g)) == _forma(_midi(v))
+        assert BD_Notas_Midi[g["root"]] % 12 == BD_Notas_Midi[v["root"]] % 12
+
+
+def test_cerrados_como_la_libreria_close():
+    cerrados = [v for v in _libreria("voicingsClose_Harry_Barris.json") if v["name"] in ("m6", "dim7")]
+    generados = {v["name"]: _midi(v) for v in _todas(cerrados, drops=(), transponer=False)}
+    for v in _libreria("voicingsClose_Harry_Barris.json"):
+        if v["name"] != "m6 2":
+            assert generados[v["name"].replace("Dim7", "dim7")] == _midi(v)
+
+
+def test_transposiciones_en_rango_y_sin_repetidos(monkeypatch):
+    monkeypatch.setattr(voicing_generator, "BLOQUE", 2)
+    cerrados = _libreria("voicingsClose_Harry_Barris.json")[:2] * 3
+    salida = _todas(cerrados, lote=7)
+    claves = [(tuple(_midi(v)), v["root"]) for v in salida]
+    assert len(claves) == len(set(claves))
+    assert all(RANGO[0] <= m <= RANGO[1] for v in salida for m in _midi(v))
+    # m6 cerrado: 12 transposiciones
+    assert sum(1 for v in salida if v["name"] == "m6") == 12
+    transpuestos = [v for v in salida if v["name"] == "m6 Drop2"]
+    assert {BD_Notas_Midi[v["root"]] - _midi(v)[0] for v in transpuestos} == {0}
+
+
+def test_lotes_y_bemoles():
+    cerrados = _libreria("voicingsClose_Harry_Barris.json")[:1]
+    lotes = list(generar_variantes(cerrados, lote=10))
+    assert all(len(lote) == 10 for lote in lotes[:-1]) and 0 < len(lotes[-1]) <= 10
+    assert not any("#" in n for v in _todas(cerrados, bemoles=True) for n in v["notes"])
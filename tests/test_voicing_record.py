@@ -0,0 +1,50 @@
+import json
+import pickle
+
+from midi_engine.pitch_sets import mascara_de_midi
+from storage_engine.saver import json_default
+from storage_engine.voicing_record import NOMBRES_DE_NOTA, VoicingRecord, normalize_voicings
+
+
+def test_se_usa_como_el_dict_original():
+    d = {"name": "Cmaj7", "root": "C3", "notes": ["C3", "E3", "G3", "B3"], "hotkey": "a", "tags": ["x"]}
+    v = VoicingRecord(d)
+    assert v == d
+    assert list(v) == ["name", "root", "notes", "hotkey", "tags"]
+    assert json.loads(json.dumps(v, default=json_default)) == d
+    assert pickle.loads(pickle.dumps(v)) == d
+    del v["hotkey"]
+    assert "hotkey" not in v and v.get("hotkey") is None
+
+
+def test_root_nula_no_es_lo_mismo_que_sin_root():
+    assert VoicingRecord({"root": None, "notes": []}).to_dict() == {"root": None, "notes": []}
+    assert "root" not in VoicingRecord({"notes": []})
+
+
+def test_datos_midi_se_actualizan_al_asignar_notas():
+    v = VoicingRecord({"notes": ["G3", "C3", "E3"]})
+    assert v.midi == bytes([55, 48, 52])
+    assert v.midi_sorted == bytes([48, 52, 55])
+    assert v.pc_mask == mascara_de_midi([48, 52, 55])
+    copia = v.copy()
+    v["notes"] = ["D3", "A3"]
+    assert v.midi_sorted == bytes([50, 57])
+    assert v.pc_mask == mascara_de_midi([50, 57])
+    assert copia.midi_sorted == bytes([48, 52, 55])
+    del v["notes"]
+    assert v.midi_sorted == b"" and v.pc_mask == 0
+
+
+def test_notas_desconocidas_quedan_tal_cual():
+    tabla = len(NOMBRES_DE_NOTA)
+    v = VoicingRecord({"notes": ["C3", "H9", 7]})
+    assert v["notes"] == ["C3", "H9", 7]
+    assert v.unknown == ("H9", 7)
+    assert not v.valid
+    assert v.midi_sorted == bytes([48]) and v.pc_mask == 1
+    assert len(NOMBRES_DE_NOTA) == tabla
+
+
+def test_normalize_voicings_saltea_lo_que_no_es_objeto():
+    assert normalize_voicings([{"notes": ["C3"]}, "x", None]) == [{"notes": ["C3"]}]
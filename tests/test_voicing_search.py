@@ -0,0 +1,86 @@
+import itertools
+import random
+
+import pytest
+
+from midi_engine.notes_db import BD_Notas_Midi
+from midi_engine.voicing_search import EnumeradorVoicings
+
+
+def _fuerza_bruta(e, intervalos, omitibles=(), duplicables=None):
+    """Todos los voicings que cumplen las restricciones, probando cada combinación."""
+    notas = [m for m in range(e.grave, e.agudo + 1) if (m - e.root) % 12 in intervalos]
+    duplicables = intervalos if duplicables is None else duplicables
+    resultado = []
+    for combo in itertools.combinations(notas, e.n_notas):
+        saltos = [b - a for a, b in zip(combo, combo[1:])]
+        if any(s < e.min_salto or s > e.max_salto for s in saltos):
+            continue
+        ivs = [(m - e.root) % 12 for m in combo]
+        if set(intervalos) - set(omitibles) - set(ivs):
+            continue
+        dobles = len(ivs) - len(set(ivs))
+        if dobles > e.max_dobles or any(ivs.count(iv) > 1 and iv not in duplicables for iv in ivs):
+            continue
+        if e._aguda is not None and ivs[-1] != e._aguda:
+            continue
+        if e._bajo is not None and ivs[0] != e._bajo:
+            continue
+        resultado.append(list(combo))
+    return resultado
+
+
+CASOS = [
+    (dict(acorde="C7", n_notas=4, rango=("C3", "C6"), max_salto=7, aguda=10), (0, 4, 7, 10), (), None),
+    (dict(acorde="Ebm6", n_notas=4, rango=("C3", "C5")), (0, 3, 7, 9), (), None),
+    (dict(acorde="C7", n_notas=5, rango=("C3", "C5"), max_dobles=1, duplicables=(0, 7), omitibles=(7,)),
+     (0, 4, 7, 10), (7,), (0, 7)),
+    (dict(acorde="C", n_notas=3, rango=("C3", "C5"), bajo=4), (0, 4, 7), (), None),
+]
+
+
+@pytest.mark.parametrize("kwargs, intervalos, omitibles, duplicables", CASOS)
+def test_igual_a_fuerza_bruta(kwargs, intervalos, omitibles, duplicables):
+    e = EnumeradorVoicings(**kwargs)
+    esperado = _fuerza_bruta(e, intervalos, omitibles, duplicables)
+    assert esperado, "el caso tiene que tener soluciones"
+    assert e.contar() == len(e) == len(esperado)
+    # el orden de enumeración es el lexicográfico de grave a agudo
+    assert list(e.iter_midi()) == esperado
+
+
+@pytest.mark.parametrize("kwargs, intervalos, omitibles, duplicables", CASOS)
+def test_n_esimo_e_iter_desde_inicio(kwargs, intervalos, omitibles, duplicables):
+    e = EnumeradorVoicings(**kwargs)
+    esperado = _fuerza_bruta(e, intervalos, omitibles, duplicables)
+    for n in (0, 1, len(esperado) // 2, len(esperado) - 1):
+        assert e.notas_midi(n) == esperado[n]
+        assert list(e.iter_midi(n)) == esperado[n:]
+    assert e.notas_midi(-1) == esperado[-1]
+    assert list(e.iter_midi(len(esperado))) == []
+    with pytest.raises(IndexError):
+        e.notas_midi(len(esperado))
+
+
+def test_voicing_en_formato_de_la_libreria():
+    e = EnumeradorVoicings("C7", 4, rango=("C3", "C6"), max_salto=7, aguda=10)
+    v = e.voicing(0)
+    assert set(v) == {"name", "root", "notes"}
+    assert [BD_Notas_Midi[n] for n in v["notes"]] == e.notas_midi(0)
+    assert BD_Notas_Midi[v["root"]] % 12 == 0
+    assert v == e[0] == next(iter(e))
+
+
+def test_aleatorio_y_sin_soluciones():
+    e = EnumeradorVoicings("C7", 4, rango=("C3", "C6"), max_salto=7, aguda=10)
+    todos = [tuple(m) for m in e.iter_midi()]
+    v = e.aleatorio(random.Random(3))
+    assert tuple(BD_Notas_Midi[n] for n in v["notes"]) in todos
+
+    imposible = EnumeradorVoicings("C7", 3, rango=("C3", "C6"))  # 4 intervalos obligatorios
+    assert imposible.contar() == 0
+    assert list(imposible.iter_midi()) == []
+    with pytest.raises(ValueError):
+        imposible.aleatorio()
+    with pytest.raises(ValueError):
+        EnumeradorVoicings("C7", 4, aguda=2)
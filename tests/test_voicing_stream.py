@@ -0,0 +1,57 @@
+import glob
+import json
+import os
+
+import pytest
+
+from storage_engine.voicing_stream import iter_voicing_batches, iter_voicings
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "storage_engine", "data")
+
+
+def _escribir(path, texto):
+    path.write_text(texto, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_igual_que_json_load(tmp_path, chunk_size):
+    voicings = [{"name": f"v{i} ñ \"x\"", "root": None if i % 3 else "C3", "notes": ["C3", "E3"],
+                 "n": i * 1.5, "tags": [{"a": [1, 2]}]} for i in range(200)]
+    texto = json.dumps({"gen": "abc", "voicings": voicings, "otro": {"voicings": 1}}, indent=4,
+                       ensure_ascii=False)
+    path = _escribir(tmp_path / "v.json", texto)
+    assert list(iter_voicings(path, chunk_size=chunk_size)) == json.loads(texto)["voicings"]
+
+
+def test_librerias_incluidas():
+    archivos = glob.glob(os.path.join(DATA_DIR, "voicings*.json"))
+    assert archivos
+    for path in archivos:
+        with open(path, encoding="utf-8") as f:
+            esperado = [v for v in json.load(f).get("voicings", []) if isinstance(v, dict)]
+        assert list(iter_voicings(path, chunk_size=1000)) == esperado
+
+
+def test_casos_borde(tmp_path):
+    assert list(iter_voicings(_escribir(tmp_path / "a.json", "{}"))) == []
+    assert list(iter_voicings(_escribir(tmp_path / "b.json", '{"voicings": []}'))) == []
+    # un número partido entre dos bloques
+    assert list(iter_voicings(_escribir(tmp_path / "c.json", '{"voicings": [{"n": 123456}]}'),
+                              chunk_size=20)) == [{"n": 123456}]
+
+
+def test_json_roto(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_voicings(_escribir(tmp_path / "a.json", '{"voicings": [{"n": 1} {"n": 2}]}')))
+    with pytest.raises(ValueError):
+        list(iter_voicings(_escribir(tmp_path / "b.json", '{"voicings": [{"n": 1}, {"n"')))
+
+
+def test_lotes_y_progreso(tmp_path):
+    texto = json.dumps({"voicings": [{"i": i} for i in range(25)]})
+    path = _escribir(tmp_path / "v.json", texto)
+    leidos = []
+    lotes = list(iter_voicing_batches(path, size=10, chunk_size=32, progreso=leidos.append))
+    assert [len(lote) for lote in lotes] == [10, 10, 5]
+    assert leidos == sorted(leidos) and leidos[-1] == len(texto)
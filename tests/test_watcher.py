@@ -0,0 +1,88 @@
+import os
+import random
+
+import pytest
+
+from rhythm_engine.patterns import RitmoPattern
+from storage_engine.saver import saver
+from storage_engine.watcher import (FileWatcher, apply_diff, diff_lists, pattern_diff_key, remap_index,
+                                    voicing_diff_key)
+
+
+def _v(nombre, *notas):
+    return {"name": nombre, "root": notas[0], "notes": list(notas)}
+
+
+def test_diff_minimo_de_voicings():
+    viejos = [_v("a", "C3"), _v("b", "D3"), _v("c", "E3"), _v("d", "F3")]
+    nuevos = [_v("a", "C3"), _v("B", "D3"), _v("c", "E3"), _v("x", "G3"), _v("d", "F3")]
+    ops = diff_lists(viejos, nuevos, voicing_diff_key)
+    assert ops == [("replace", 1, 2, 1, 2), ("insert", 3, 3, 3, 4)]
+    assert diff_lists(nuevos, [dict(v) for v in nuevos], voicing_diff_key) == []
+
+
+def test_apply_diff_con_callbacks():
+    viejos = [_v("a", "C3"), _v("b", "D3"), _v("c", "E3"), _v("d", "F3")]
+    nuevos = [_v("c", "E3"), _v("d", "F3"), _v("e", "G3")]
+    borrados, insertados = [], []
+    items = list(viejos)
+    apply_diff(items, diff_lists(viejos, nuevos, voicing_diff_key), nuevos,
+               on_delete=lambda i1, i2: borrados.append((i1, i2)),
+               on_insert=lambda i, vs: insertados.append((i, [v["name"] for v in vs])))
+    assert items == nuevos
+    # de atrás para adelante: el insert se hace antes del delete
+    assert insertados == [(4, ["e"])] and borrados == [(0, 2)]
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_apply_diff_aleatorio(semilla):
+    rng = random.Random(semilla)
+    viejos = [rng.randrange(10) for _ in range(rng.randrange(30))]
+    nuevos = [rng.randrange(10) for _ in range(rng.randrange(30))]
+    items = list(viejos)
+    apply_diff(items, diff_lists(viejos, nuevos, lambda x: x), nuevos)
+    assert items == nuevos
+
+
+def test_remap_index():
+    ops = [("delete", 0, 1, 0, 0), ("replace", 2, 3, 1, 2), ("insert", 4, 4, 3, 5)]
+    assert remap_index(ops, 0) is None
+    assert remap_index(ops, 1) == 0
+    assert remap_index(ops, 2) is None
+    assert remap_index(ops, 2, follow_replace=True) == 1
+    assert remap_index(ops, 5) == 6
+
+
+def test_patrones_por_contenido():
+    a = RitmoPattern("a", [["negra"] * 4])
+    assert pattern_diff_key(a) == pattern_diff_key(RitmoPattern("a", [["negra"] * 4]))
+    assert pattern_diff_key(a) != pattern_diff_key(RitmoPattern("a", [["blanca"] * 2]))
+
+
+def test_poll_reporta_cambios_externos(tmp_path):
+    path = tmp_path / "v.json"
+    path.write_text("{}")
+    vistos = []
+    watcher = FileWatcher()
+    watcher.watch(path, vistos.append)
+    assert watcher.poll() == []
+    path.write_text('{"voicings": []}')
+    assert watcher.poll() == [os.path.abspath(path)] and len(vistos) == 1
+    assert watcher.poll() == []
+    watcher.invalidate(path)
+    assert len(watcher.poll()) == 1
+    path.write_text("{ }")
+    watcher.acknowledge(path)
+    assert watcher.poll() == []
+
+
+def test_guardado_propio_pendiente_no_se_reporta(tmp_path):
+    path = tmp_path / "v.json"
+    path.write_text("{}")
+    watcher = FileWatcher()
+    watcher.watch(path, lambda p: None)
+    saver.schedule(os.path.abspath(path), lambda: path.write_text('{"voicings": [1]}'))
+    assert watcher.poll() == []
+    saver.flush()
+    watcher.acknowledge(path)
+    assert watcher.poll() == []
@@ -0,0 +1,87 @@
+import pytest
+
+from storage_engine.workspace import VoicingWorkspace, qualified_name
+
+
+def _libreria(nombre):
+    return [{"name": f"{nombre} m6", "root": "C3", "notes": ["C3", "D#3", "G3", "A3"], "hotkey": nombre},
+            {"name": "dim7", "root": "D3", "notes": ["D3", "F3", "G#3", "B3"]}]
+
+
+def _workspace(max_loaded, archivos="abcd"):
+    lecturas = []
+
+    def leer(path):
+        lecturas.append(path.rsplit("/", 1)[-1])
+        return _libreria(path.rsplit("/", 1)[-1].split(".")[0])
+
+    ws = VoicingWorkspace(max_loaded=max_loaded, loader=leer)
+    for nombre in archivos:
+        ws.add(f"/libs/{nombre}.json")
+    return ws, lecturas
+
+
+def test_carga_perezosa_y_lru():
+    ws, lecturas = _workspace(2)
+    assert ws.unloaded() == ["a", "b", "c", "d"] and lecturas == []
+    ws.load("a")
+    ws.load("b")
+    ws.load("a")  # a pasa a ser el más reciente
+    ws.load("c")  # expulsa b
+    assert [ns for ns in ws.namespaces() if ws.is_loaded(ns)] == ["a", "c"]
+    assert ws.unloaded() == ["b", "d"]
+    ws.load("b")
+    assert lecturas == ["a.json", "b.json", "c.json", "b.json"]
+
+
+def test_hotkey_cuenta_como_uso():
+    ws, _ = _workspace(2)
+    ws.load("a")
+    ws.load("b")
+    assert ws.hotkey("a")[0] == "a"
+    ws.load("c")  # expulsa b, no a
+    assert ws.is_loaded("a") and not ws.is_loaded("b")
+    assert ws.hotkey("b") is None  # los no cargados no participan
+
+
+def test_residentes_no_se_expulsan():
+    ws, lecturas = _workspace(1)
+    ws.pin("a")
+    ws.pin("b")
+    for ns in "abcd":
+        ws.load(ns)
+    assert [ns for ns in "abcd" if ws.is_loaded(ns)] == ["a", "b", "d"]
+    assert ws.hotkey("a")[0] == "a" and ws.hotkey("b")[0] == "b"
+    # vuelve a contar para max_loaded: queda a (su hotkey es el uso más reciente)
+    ws.pin("a", False)
+    assert ws.is_loaded("a") and not ws.is_loaded("d")
+    assert ws.evict("b") and not ws.is_loaded("b")
+
+
+def test_adjuntado_va_primero_y_no_se_expulsa():
+    ws, _ = _workspace(1, archivos="")
+    editada = _libreria("a")
+    ws.attach("working", editada)
+    ws.add("/libs/a.json")
+    ws.load("a")
+    encontrado = ws.hotkey("a")
+    assert encontrado[0] == "working" and encontrado[2] is editada[0]
+    assert not ws.evict("working") and ws.is_loaded("working")
+    assert [ns for ns, _, _ in ws.find_name("dim7")] == ["working", "a"]
+    assert [i for _, i, _ in ws.find_name("a:dim7")] == [1]
+    assert [ns for ns, _, _ in ws.search("=D F G# B")] == ["working", "a"]
+    editada.append({"name": "dim7", "notes": ["C3"]})
+    ws.attach("working", editada)  # índice nuevo
+    assert len(ws.find_name("working:dim7")) == 2
+
+
+def test_namespaces():
+    ws, _ = _workspace(4, archivos="")
+    assert ws.add("/x/lib.json") == "lib"
+    assert ws.add("/y/lib.json") == "lib-2"
+    assert ws.add("/x/lib.json") == "lib"
+    with pytest.raises(ValueError):
+        ws.add("/z/otra.json", namespace="a:b")
+    ws.remove("lib")
+    assert "lib" not in ws and len(ws) == 1
+    assert qualified_name("lib-2", {"name": "m6"}) == "lib-2:m6"